@@ -0,0 +1,202 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import logging
+from pathlib import Path
+
+
+_DIGITS_RE = re.compile(r'\d+')
+
+
+def _line_key(line):
+    """Forma da linha usada no hash: minúsculas, dígitos mascarados, espaços simples"""
+    return _DIGITS_RE.sub('0', ' '.join(line.lower().split()))
+
+
+def _hash(value):
+    """Hash estável entre execuções (o hash() do Python é aleatorizado)"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class BoilerplateModel:
+    """Aprende sequências de linhas repetidas nas bordas dos documentos e as remove"""
+
+    def __init__(self, model_file='boilerplate.json', shingle_size=2, edge_lines=30,
+                 min_fraction=0.3, min_docs=3):
+        self.model_file = model_file
+        self.shingle_size = shingle_size
+        self.edge_lines = edge_lines
+        self.min_fraction = min_fraction
+        self.min_docs = min_docs
+
+        # Frequência de documentos por shingle (só regiões de borda)
+        self.counts = {}
+        self.n_docs = 0
+        # Shingles frequentes fixados por freeze(): strip deixa de mudar com o aprendizado
+        self.frozen = None
+        self._load()
+
+    def _load(self):
+        """Carrega o modelo salvo"""
+        if not self.model_file or not os.path.exists(self.model_file):
+            return
+        with open(self.model_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.n_docs = data['n_docs']
+        self.counts = {int(h, 16): n for h, n in data['counts'].items()}
+
+    def save(self):
+        """Grava o modelo de forma atômica"""
+        if not self.model_file:
+            return
+        data = {'n_docs': self.n_docs, 'counts': {f"{h:016x}": n for h, n in self.counts.items()}}
+        temp_path = self.model_file + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.model_file)
+
+    def _shingles(self, keys):
+        """Hashes das janelas de shingle_size linhas consecutivas"""
+        size = self.shingle_size
+        return [_hash('\n'.join(keys[i:i + size])) for i in range(max(len(keys) - size + 1, 0))]
+
+    def _edges(self, lines):
+        """Linhas não vazias do começo e do fim do documento"""
+        keys = [_line_key(line) for line in lines if line.strip()]
+        if len(keys) <= 2 * self.edge_lines:
+            return [keys]
+        return [keys[:self.edge_lines], keys[-self.edge_lines:]]
+
+    @property
+    def threshold(self):
+        """Número de documentos a partir do qual um shingle é boilerplate"""
+        return max(self.min_docs, self.min_fraction * self.n_docs)
+
+    def document_shingles(self, text):
+        """Shingles distintos das bordas de um documento (parte pesada do aprendizado)"""
+        seen = set()
+        for keys in self._edges(text.split('\n')):
+            seen.update(self._shingles(keys))
+        return seen
+
+    def add_shingles(self, shingles):
+        """Conta um documento a partir dos shingles já calculados (ex.: em outro processo)"""
+        for shingle in shingles:
+            self.counts[shingle] = self.counts.get(shingle, 0) + 1
+        self.n_docs += 1
+
+    def add_document(self, text):
+        """Atualiza incrementalmente as frequências com um novo documento"""
+        self.add_shingles(self.document_shingles(text))
+
+    def freeze(self):
+        """Fixa o que strip remove no estado atual do modelo.
+
+        Numa execução de scraping todos os documentos são limpos pelo mesmo
+        modelo (treinado antes); o que eles ensinam só vale na próxima.
+        """
+        threshold = self.threshold
+        self.frozen = frozenset(h for h, n in self.counts.items() if n >= threshold)
+
+    def strip(self, text, keep=None):
+        """Remove, em uma passada, os trechos de boilerplate do início e do fim
+
+        keep(linha) marca linhas que nunca são removidas (ex.: o título do
+        próprio documento, que com os dígitos mascarados se repete no corpus).
+        """
+        lines = text.split('\n')
+        content = [i for i, line in enumerate(lines) if line.strip()]
+        if len(content) <= self.shingle_size:
+            return text
+
+        shingles = self._shingles([_line_key(lines[i]) for i in content])
+        if self.frozen is not None:
+            frequent = [h in self.frozen for h in shingles]
+        else:
+            threshold = self.threshold
+            frequent = [self.counts.get(h, 0) >= threshold for h in shingles]
+
+        # Uma linha é boilerplate se alguma janela que a contém é frequente
+        covered = [False] * len(content)
+        for position, is_frequent in enumerate(frequent):
+            if is_frequent:
+                for offset in range(self.shingle_size):
+                    covered[position + offset] = True
+        if keep is not None:
+            covered = [is_covered and not keep(lines[i]) for i, is_covered in zip(content, covered)]
+
+        start = 0
+        while start < len(content) and covered[start]:
+            start += 1
+        end = len(content)
+        while end > start and covered[end - 1]:
+            end -= 1
+
+        if start == 0 and end == len(content):
+            return text
+        if start == end:
+            # Documento inteiro parece boilerplate: não arriscar apagar tudo
+            return text
+        return '\n'.join(lines[content[start]:content[end - 1] + 1])
+
+    def learn_directory(self, directory='normativos_txt'):
+        """Treina o modelo com os corpos dos .txt existentes"""
+        from bcb_storage import parse_document
+
+        for path in sorted(Path(directory).glob('*.txt')):
+            _, body = parse_document(path.read_text(encoding='utf-8'))
+            self.add_document(body)
+        self.save()
+        logging.info(f"Modelo de boilerplate treinado com {self.n_docs} documentos")
+
+    def boilerplate_lines(self, text):
+        """Linhas que seriam removidas (para inspeção)"""
+        kept = set(self.strip(text).split('\n'))
+        return [line for line in text.split('\n') if line.strip() and line not in kept]
+
+
+def strip_directory(directory='normativos_txt', model=None):
+    """Remove o boilerplate dos .txt do corpus, preservando o cabeçalho"""
+    from bcb_output_writer import AtomicOutputWriter
+    from bcb_storage import parse_document
+
+    model = model or BoilerplateModel()
+    saved_bytes = 0
+    with AtomicOutputWriter(directory) as writer:
+        for path in sorted(Path(directory).glob('*.txt')):
+            text = path.read_text(encoding='utf-8')
+            _, body = parse_document(text)
+            stripped = model.strip(body)
+            if stripped != body:
+                saved_bytes += len(body.encode('utf-8')) - len(stripped.encode('utf-8'))
+                writer.write(path.name, text[:len(text) - len(body)] + stripped)
+
+    logging.info(f"Boilerplate removido: {saved_bytes} bytes")
+    return saved_bytes
+
+
+def main():
+    """Treina o modelo (learn), mostra (show ARQUIVO) ou remove o boilerplate (strip)"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    directory = sys.argv[2] if len(sys.argv) > 2 else 'normativos_txt'
+    model = BoilerplateModel()
+
+    if command == 'learn':
+        model.learn_directory(directory)
+    elif command == 'show' and len(sys.argv) > 2:
+        from bcb_storage import parse_document
+        _, body = parse_document(Path(sys.argv[2]).read_text(encoding='utf-8'))
+        for line in model.boilerplate_lines(body):
+            print(line)
+    elif command == 'strip':
+        print(f"{strip_directory(directory, model)} bytes removidos")
+    else:
+        print("Uso: python bcb_boilerplate.py learn [dir] | show ARQUIVO | strip [dir]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+import os
+import sys
+import csv
+import json
+import struct
+import bisect
+import logging
+import tempfile
+from array import array
+from datetime import date
+
+from bcb_identity import canonical_numero, canonical_tipo, display_numero
+from bcb_text_normalizer import normalize_text
+
+
+# BCBCAT02: sem a coluna scraped, que agora é derivada dos manifestos
+CATALOG_MAGIC = b'BCBCAT02'
+# Número não numérico (raro): fica em numeros_texto e a coluna guarda -1
+NO_NUMBER = -1
+# Data ausente ou inválida na coluna de ordinais
+NO_DATE = 0
+# Colunas de texto por linha, guardadas em um único blob UTF-8 com offsets
+STRING_COLUMNS = ['url', 'assunto', 'situacao']
+
+_HEADER = struct.Struct('<8sQII')
+
+
+def parse_date(value):
+    """Data d/m/aaaa do catálogo como ordinal (NO_DATE se inválida)"""
+    try:
+        day, month, year = (int(part) for part in str(value).strip().split('/'))
+        return date(year, month, day).toordinal()
+    except (TypeError, ValueError):
+        return NO_DATE
+
+
+def _numeric(numero):
+    """Chave numérica normalizada ('4.593' -> 4593, '501.0' -> 501) ou None"""
+    numero_str = canonical_numero(numero)
+    return int(numero_str) if numero_str.isdigit() else None
+
+
+class DocumentCatalog:
+    """Catálogo compacto do CSV: colunas em arrays, tipos internados e índices.
+
+    Cada documento é uma linha: tipo (id na tabela de tipos), número (inteiro),
+    data (ordinal) e os textos url/assunto/situacao em um blob com offsets,
+    decodificados só quando pedidos. O índice hash (tipo, numero) -> linha é
+    refeito na carga; a ordem por data vem pronta no arquivo.
+    """
+
+    def __init__(self):
+        self.tipos = []            # tipo de exibição por id
+        self._tipo_ids = {}        # tipo canônico -> id
+        self.tipo_col = array('H')
+        self.numero_col = array('q')
+        self.date_col = array('i')
+        # Já gravados segundo mark_scraped; com track(writer), consultado ao vivo
+        self.scraped = bytearray()
+        self.writer = None
+        self.numeros_texto = {}    # linha -> número não numérico
+        self._strings = b''
+        self._offsets = array('I', [0])
+        self.date_order = array('I')
+        self.index = {}
+        self._sorted_dates = array('i')
+        self.source = {}           # mtime/tamanho do CSV de origem
+
+    def __len__(self):
+        return len(self.tipo_col)
+
+    def _intern_tipo(self, tipo):
+        """Id do tipo, criando a entrada na primeira vez"""
+        key = canonical_tipo(tipo)
+        tipo_id = self._tipo_ids.get(key)
+        if tipo_id is None:
+            tipo_id = self._tipo_ids[key] = len(self.tipos)
+            self.tipos.append(' '.join(str(tipo).split()))
+        return tipo_id
+
+    def _key(self, tipo, numero):
+        """Chave do índice hash, ou None se o tipo não existe no catálogo"""
+        tipo_id = self._tipo_ids.get(canonical_tipo(tipo))
+        if tipo_id is None:
+            return None
+        number = _numeric(numero)
+        return (tipo_id, number if number is not None else canonical_numero(numero))
+
+    def _build_indexes(self):
+        """Índice hash (tipo, numero) -> linha e datas na ordem do índice de data"""
+        self._sorted_dates = array('i', (self.date_col[position] for position in self.date_order))
+        self.index = {}
+        for row, (tipo_id, number) in enumerate(zip(self.tipo_col, self.numero_col)):
+            if number == NO_NUMBER:
+                number = self.numeros_texto[row]
+            self.index[(tipo_id, number)] = row
+
+    @classmethod
+    def from_csv(cls, csv_file='normativos_spb_bcb.csv'):
+        """Monta o catálogo a partir do CSV (tipo e assunto com encoding reparado)"""
+        catalog = cls()
+        strings = []
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                if not row.get('tipo') or not row.get('numero'):
+                    continue
+                position = len(catalog.tipo_col)
+                catalog.tipo_col.append(catalog._intern_tipo(normalize_text(row['tipo'])))
+                number = _numeric(row['numero'])
+                if number is None:
+                    catalog.numeros_texto[position] = canonical_numero(row['numero'])
+                    number = NO_NUMBER
+                catalog.numero_col.append(number)
+                catalog.date_col.append(parse_date(row.get('data')))
+                catalog.scraped.append(0)
+                for column in STRING_COLUMNS:
+                    # No CSV a URL vem na coluna url_bcb
+                    value = row.get('url_bcb' if column == 'url' else column) or ''
+                    strings.append(normalize_text(value) if column == 'assunto' else value)
+
+        encoded = [value.encode('utf-8') for value in strings]
+        for value in encoded:
+            catalog._offsets.append(catalog._offsets[-1] + len(value))
+        catalog._strings = b''.join(encoded)
+
+        catalog.date_order = array('I', sorted(range(len(catalog)), key=catalog.date_col.__getitem__))
+        stat = os.stat(csv_file)
+        catalog.source = {'csv': os.path.abspath(csv_file), 'mtime_ns': stat.st_mtime_ns, 'bytes': stat.st_size}
+        catalog._build_indexes()
+        return catalog
+
+    def _string(self, row, column):
+        """Texto de uma coluna, decodificado sob demanda"""
+        position = row * len(STRING_COLUMNS) + STRING_COLUMNS.index(column)
+        return self._strings[self._offsets[position]:self._offsets[position + 1]].decode('utf-8')
+
+    def find(self, tipo, numero):
+        """Linha do documento ou None, em O(1)"""
+        key = self._key(tipo, numero)
+        return None if key is None else self.index.get(key)
+
+    def _record(self, position):
+        number = self.numero_col[position]
+        ordinal = self.date_col[position]
+        record = {
+            'tipo': self.tipos[self.tipo_col[position]],
+            'numero': self.numeros_texto[position] if number == NO_NUMBER else display_numero(number),
+            'data': None,
+        }
+        if ordinal != NO_DATE:
+            day = date.fromordinal(ordinal)
+            record['data'] = f"{day.day}/{day.month}/{day.year}"
+        for column in STRING_COLUMNS:
+            record[column] = self._string(position, column) or None
+        return record
+
+    def row(self, position):
+        """Linha como dicionário (mesmos campos do CSV)"""
+        record = self._record(position)
+        record['scraped'] = self._scraped(position, record)
+        return record
+
+    def records(self):
+        """Linhas na ordem do CSV, com os campos e os nomes de coluna do CSV"""
+        for position in range(len(self)):
+            row = self._record(position)
+            yield {'tipo': row['tipo'], 'numero': row['numero'], 'data': row['data'],
+                   'assunto': row['assunto'] or '', 'situacao': row['situacao'], 'url_bcb': row['url']}
+
+    def filenames(self, position, row=None):
+        """Nomes que os scrapers dão ao .txt do documento (catálogo e por URL)"""
+        from bcb_postprocess import catalog_filename, url_filename
+
+        row = row or self._record(position)
+        names = [catalog_filename(row['tipo'], row['numero'], row['assunto'] or '')]
+        if row['data']:
+            names.append(url_filename(row['tipo'], row['numero'], row['data']))
+        return names
+
+    def lookup(self, tipo, numero):
+        """Dados do documento ou None"""
+        position = self.find(tipo, numero)
+        return None if position is None else self.row(position)
+
+    def url(self, tipo, numero):
+        """URL do catálogo (None se o documento não está no CSV ou não tem URL)"""
+        position = self.find(tipo, numero)
+        return None if position is None else (self._string(position, 'url') or None)
+
+    def _scraped(self, position, row=None):
+        if self.scraped[position]:
+            return True
+        return self.writer is not None and any(map(self.writer.is_complete, self.filenames(position, row)))
+
+    def is_scraped(self, tipo, numero):
+        """Se o documento já está no diretório de saída (mark_scraped ou o writer de track)"""
+        position = self.find(tipo, numero)
+        return position is not None and self._scraped(position)
+
+    def track(self, writer):
+        """Passa a consultar o AtomicOutputWriter em uso (manifesto e lote pendente) em scraped"""
+        self.writer = writer
+
+    def between(self, start, end):
+        """Linhas com data em [start, end] (datetime.date), em ordem de data"""
+        low = bisect.bisect_left(self._sorted_dates, max(start.toordinal(), NO_DATE + 1))
+        high = bisect.bisect_right(self._sorted_dates, end.toordinal())
+        return [self.date_order[position] for position in range(low, high)]
+
+    def mark_scraped(self, output_dir='normativos_txt'):
+        """Marca os documentos já gravados em output_dir segundo os manifestos do writer.
+
+        Os nomes esperados de cada linha são conferidos contra completed_files;
+        só os .txt com outro nome (ex.: do BC Correio) têm o cabeçalho lido.
+        """
+        from bcb_corpus_reader import CorpusReader
+        from bcb_output_writer import completed_files
+
+        by_name = {}
+        for position in range(len(self)):
+            for name in self.filenames(position):
+                by_name[name] = position
+
+        self.scraped = bytearray(len(self))
+        unmatched = []
+        for name in completed_files(output_dir):
+            position = by_name.get(name)
+            if position is not None:
+                self.scraped[position] = 1
+            elif name.endswith('.txt'):
+                unmatched.append(name)
+
+        if unmatched:
+            with CorpusReader(output_dir, paths=[os.path.join(output_dir, name) for name in unmatched]) as reader:
+                for _, meta in reader.headers():
+                    if 'tipo' in meta and 'numero' in meta:
+                        position = self.find(meta['tipo'], meta['numero'])
+                        if position is not None:
+                            self.scraped[position] = 1
+        return sum(self.scraped)
+
+    def save(self, catalog_file='normativos_catalog.bin'):
+        """Grava o arquivo binário de forma atômica"""
+        meta = json.dumps({
+            'tipos': self.tipos,
+            'numeros_texto': {str(row): value for row, value in self.numeros_texto.items()},
+            'source': self.source,
+        }, ensure_ascii=False).encode('utf-8')
+        columns = [self.tipo_col, self.numero_col, self.date_col, self._offsets, self.date_order]
+        if sys.byteorder != 'little':
+            columns = [array(column.typecode, column) for column in columns]
+            for column in columns:
+                column.byteswap()
+
+        directory = os.path.dirname(os.path.abspath(catalog_file))
+        fd, temp_path = tempfile.mkstemp(prefix='.catalog.', suffix='.tmp', dir=directory)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER.pack(CATALOG_MAGIC, len(self), len(meta), len(self._strings)))
+            f.write(meta)
+            for column in columns:
+                f.write(column.tobytes())
+            f.write(self._strings)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, catalog_file)
+
+    @classmethod
+    def load(cls, catalog_file='normativos_catalog.bin'):
+        """Carrega o arquivo binário: uma leitura e cópias diretas para os arrays"""
+        with open(catalog_file, 'rb') as f:
+            data = f.read()
+        magic, rows, meta_length, strings_length = _HEADER.unpack_from(data)
+        if magic != CATALOG_MAGIC:
+            raise ValueError(f"Arquivo não é um catálogo de normativos: {catalog_file}")
+
+        catalog = cls()
+        offset = _HEADER.size
+        meta = json.loads(data[offset:offset + meta_length])
+        offset += meta_length
+        catalog.tipos = meta['tipos']
+        catalog._tipo_ids = {canonical_tipo(tipo): tipo_id for tipo_id, tipo in enumerate(catalog.tipos)}
+        catalog.numeros_texto = {int(row): value for row, value in meta['numeros_texto'].items()}
+        catalog.source = meta['source']
+
+        lengths = {'tipo_col': rows, 'numero_col': rows, 'date_col': rows,
+                   '_offsets': rows * len(STRING_COLUMNS) + 1, 'date_order': rows}
+        for name, count in lengths.items():
+            column = array(getattr(catalog, name).typecode)
+            size = count * column.itemsize
+            column.frombytes(data[offset:offset + size])
+            if sys.byteorder != 'little':
+                column.byteswap()
+            setattr(catalog, name, column)
+            offset += size
+        catalog.scraped = bytearray(rows)
+        catalog._strings = data[offset:offset + strings_length]
+
+        catalog._build_indexes()
+        return catalog
+
+    def is_stale(self, csv_file):
+        """Se o CSV mudou desde que o catálogo foi montado"""
+        try:
+            stat = os.stat(csv_file)
+        except OSError:
+            return False
+        return ((os.path.abspath(csv_file), stat.st_mtime_ns, stat.st_size)
+                != (self.source.get('csv'), self.source.get('mtime_ns'), self.source.get('bytes')))
+
+
+def load_catalog(csv_file='normativos_spb_bcb.csv', catalog_file='normativos_catalog.bin',
+                 output_dir='normativos_txt', writer=None, save=True):
+    """Catálogo do arquivo binário, remontado do CSV quando ausente ou desatualizado.
+
+    scraped é sempre derivado na carga, dos manifestos de output_dir (None
+    pula); com writer, também acompanha o que for gravado depois. Com
+    save=False o catálogo remontado não é gravado (consultas só de leitura).
+    """
+    catalog = None
+    if os.path.exists(catalog_file):
+        try:
+            catalog = DocumentCatalog.load(catalog_file)
+            if catalog.is_stale(csv_file):
+                catalog = None
+        except (ValueError, struct.error, KeyError) as e:
+            logging.warning(f"Catálogo binário inválido, remontando: {e}")
+            catalog = None
+
+    if catalog is None:
+        catalog = DocumentCatalog.from_csv(csv_file)
+        if save:
+            catalog.save(catalog_file)
+            logging.info(f"Catálogo montado com {len(catalog)} documentos em {catalog_file}")
+    if output_dir:
+        catalog.mark_scraped(output_dir)
+    if writer is not None:
+        catalog.track(writer)
+    return catalog
+
+
+def main():
+    """build [csv] [saida] | lookup TIPO NUMERO | between DD/MM/AAAA DD/MM/AAAA"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'build':
+        csv_file = sys.argv[2] if len(sys.argv) > 2 else 'normativos_spb_bcb.csv'
+        catalog = DocumentCatalog.from_csv(csv_file)
+        scraped = catalog.mark_scraped(sys.argv[3] if len(sys.argv) > 3 else 'normativos_txt')
+        catalog.save()
+        print(f"{len(catalog)} documentos no catálogo, {scraped} já baixados")
+    elif command == 'lookup' and len(sys.argv) > 3:
+        print(load_catalog().lookup(sys.argv[2], sys.argv[3]))
+    elif command == 'between' and len(sys.argv) > 3:
+        catalog = load_catalog()
+        start, end = (date.fromordinal(parse_date(value)) for value in sys.argv[2:4])
+        for position in catalog.between(start, end):
+            row = catalog.row(position)
+            print(f"{row['data']:>10}  {row['tipo']} nro. {row['numero']}")
+    else:
+        print("Uso: python bcb_catalog.py build [csv] [saida] | lookup TIPO NUMERO | "
+              "between DD/MM/AAAA DD/MM/AAAA")
+
+
+if __name__ == "__main__":
+    main()
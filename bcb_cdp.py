@@ -0,0 +1,597 @@
+import os
+import json
+import time
+import base64
+import shutil
+import logging
+import tempfile
+import itertools
+import threading
+import subprocess
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from selenium.common.exceptions import (JavascriptException, NoSuchElementException,
+                                        TimeoutException, WebDriverException)
+
+try:
+    import websocket  # pacote websocket-client
+except ImportError:  # só é necessário no backend CDP
+    websocket = None
+
+try:
+    import psutil
+except ImportError:  # psutil é opcional; sem ele a memória vem do /proc (Linux)
+    psutil = None
+
+
+# Binários procurados quando CHROME_BIN não está definido
+CHROME_CANDIDATES = ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome',
+                     '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome']
+# Opções do Selenium que não existem como argumento de linha de comando
+_IGNORED_ARGUMENTS = ('--remote-debugging-port', '--user-data-dir')
+
+# Grupos de RemoteObjects: os elementos localizados vivem até a próxima navegação;
+# os objetos auxiliares de execute_script são soltos logo após a chamada
+ELEMENT_GROUP = 'bcb-elements'
+SCRIPT_GROUP = 'bcb-script'
+
+# Localizadores do Selenium (By.*) em JavaScript; "root" é o document ou o elemento
+_LOCATORS = {
+    'css selector': ("root.querySelector({0})", "root.querySelectorAll({0})"),
+    'tag name': ("root.querySelector({0})", "root.querySelectorAll({0})"),
+    'id': ("root.querySelector('#' + CSS.escape({0}))", "root.querySelectorAll('#' + CSS.escape({0}))"),
+    'class name': ("root.querySelector('.' + CSS.escape({0}))", "root.querySelectorAll('.' + CSS.escape({0}))"),
+    'name': ("root.querySelector('[name=\"' + {0} + '\"]')", "root.querySelectorAll('[name=\"' + {0} + '\"]')"),
+    'xpath': (
+        "document.evaluate({0}, root, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue",
+        "(function(){{var r = document.evaluate({0}, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);"
+        " var a = []; for (var i = 0; i < r.snapshotLength; i++) a.push(r.snapshotItem(i)); return a;}})()",
+    ),
+    'link text': (
+        "Array.from(root.querySelectorAll('a')).find(a => a.innerText.trim() === {0}) || null",
+        "Array.from(root.querySelectorAll('a')).filter(a => a.innerText.trim() === {0})",
+    ),
+    'partial link text': (
+        "Array.from(root.querySelectorAll('a')).find(a => a.innerText.includes({0})) || null",
+        "Array.from(root.querySelectorAll('a')).filter(a => a.innerText.includes({0}))",
+    ),
+}
+
+
+class CDPError(WebDriverException):
+    """Erro devolvido pelo Chrome para um comando CDP"""
+
+
+def find_chrome():
+    """Caminho do Chrome/Chromium (CHROME_BIN ou o primeiro encontrado no PATH)"""
+    if os.environ.get('CHROME_BIN'):
+        return os.environ['CHROME_BIN']
+    for candidate in CHROME_CANDIDATES:
+        path = shutil.which(candidate) or (candidate if os.path.isfile(candidate) else None)
+        if path:
+            return path
+    raise WebDriverException("Chrome não encontrado; defina CHROME_BIN")
+
+
+class CDPConnection:
+    """Conexão websocket com o Chrome: comandos assíncronos e assinatura de eventos.
+
+    send() devolve um Future resolvido pela thread leitora quando a resposta
+    chega, então vários comandos podem estar em voo ao mesmo tempo; call()
+    espera o resultado. Eventos são entregues aos callbacks de on() e aos
+    Futures de expect() na thread leitora: callbacks não podem chamar call()
+    (só send()), senão a leitora espera por ela mesma.
+    """
+
+    def __init__(self, ws_url, timeout=30):
+        if websocket is None:
+            raise WebDriverException("Backend CDP requer o pacote websocket-client")
+        self.ws_url = ws_url
+        self.timeout = timeout
+        self._ws = websocket.create_connection(ws_url, timeout=timeout, suppress_origin=True,
+                                               enable_multithread=True)
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._listeners = {}
+        self._lock = threading.Lock()
+        self.closed = False
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def _read_loop(self):
+        """Thread leitora: resolve respostas e despacha eventos"""
+        self._ws.settimeout(None)
+        try:
+            while True:
+                message = json.loads(self._ws.recv())
+                if 'id' in message:
+                    with self._lock:
+                        future = self._pending.pop(message['id'], None)
+                    if future is None:
+                        continue
+                    if 'error' in message:
+                        future.set_exception(CDPError(message['error'].get('message', str(message['error']))))
+                    else:
+                        future.set_result(message.get('result', {}))
+                else:
+                    self._dispatch(message.get('method'), message.get('params', {}), message.get('sessionId'))
+        except Exception as e:
+            if not self.closed:
+                logging.warning(f"Conexão CDP encerrada: {e}")
+        finally:
+            self.closed = True
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(WebDriverException("Conexão CDP encerrada"))
+
+    def _dispatch(self, method, params, session_id):
+        """Entrega o evento aos ouvintes da sessão e aos globais (session_id=None)"""
+        with self._lock:
+            listeners = (list(self._listeners.get((session_id, method), ())) +
+                         (list(self._listeners.get((None, method), ())) if session_id else []))
+        for callback in listeners:
+            try:
+                callback(params)
+            except Exception as e:
+                logging.warning(f"Erro no ouvinte de {method}: {e}")
+
+    def send(self, method, params=None, session_id=None):
+        """Envia o comando e devolve um Future com o resultado"""
+        future = Future()
+        if self.closed:
+            future.set_exception(WebDriverException("Conexão CDP encerrada"))
+            return future
+        message_id = next(self._ids)
+        message = {'id': message_id, 'method': method, 'params': params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        with self._lock:
+            self._pending[message_id] = future
+        try:
+            self._ws.send(json.dumps(message))
+        except Exception as e:
+            with self._lock:
+                self._pending.pop(message_id, None)
+            future.set_exception(WebDriverException(f"Falha ao enviar {method}: {e}"))
+        return future
+
+    def call(self, method, params=None, session_id=None, timeout=None):
+        """Envia o comando e espera o resultado"""
+        try:
+            return self.send(method, params, session_id).result(timeout or self.timeout)
+        except FutureTimeout:
+            raise TimeoutException(f"Sem resposta para {method} em {timeout or self.timeout}s")
+
+    def on(self, method, callback, session_id=None):
+        """Assina um evento; devolve o identificador usado em off()"""
+        handle = (session_id, method, callback)
+        with self._lock:
+            self._listeners.setdefault((session_id, method), []).append(callback)
+        return handle
+
+    def off(self, handle):
+        """Cancela a assinatura feita com on()"""
+        session_id, method, callback = handle
+        with self._lock:
+            listeners = self._listeners.get((session_id, method), [])
+            if callback in listeners:
+                listeners.remove(callback)
+
+    def expect(self, method, predicate=None, session_id=None):
+        """Future do próximo evento (registrado antes do comando que o provoca)"""
+        future = Future()
+
+        def listener(params):
+            if not future.done() and (predicate is None or predicate(params)):
+                future.set_result(params)
+                self.off((session_id, method, listener))
+
+        self.on(method, listener, session_id)
+        return future
+
+    def close(self):
+        """Fecha o websocket (a thread leitora falha os comandos pendentes)"""
+        self.closed = True
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+
+
+def process_tree_rss(pid, recursive=True):
+    """RSS (bytes) do processo e de todos os descendentes (renderizadores, GPU, ...); None se indisponível"""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + (root.children(recursive=True) if recursive else [])
+        except psutil.NoSuchProcess:
+            return None
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.NoSuchProcess:
+                continue
+        return total
+
+    if not os.path.isdir('/proc'):
+        return None
+    children = {}
+    for entry in (os.listdir('/proc') if recursive else ()):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                # O nome (campo 2) pode ter espaços; o ppid vem logo depois do ')'
+                parent = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    found = False
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/statm', 'r') as f:
+                total += int(f.read().split()[1]) * page_size
+            found = True
+        except (OSError, IndexError, ValueError):
+            pass
+        pending.extend(children.get(current, ()))
+    return total if found else None
+
+
+class ChromeProcess:
+    """Processo do Chrome com depuração remota em porta livre"""
+
+    def __init__(self, binary=None, arguments=(), user_data_dir=None, startup_timeout=30):
+        self.binary = binary or find_chrome()
+        self._own_profile = user_data_dir is None
+        self.user_data_dir = user_data_dir or tempfile.mkdtemp(prefix='bcb_chrome_')
+        port_file = os.path.join(self.user_data_dir, 'DevToolsActivePort')
+        if os.path.exists(port_file):
+            os.remove(port_file)
+
+        command = [self.binary, '--remote-debugging-port=0', f'--user-data-dir={self.user_data_dir}',
+                   '--no-first-run', '--no-default-browser-check']
+        command += [argument for argument in arguments if not argument.startswith(_IGNORED_ARGUMENTS)]
+        command.append('about:blank')
+        self.process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        # O Chrome escreve a porta e o caminho do websocket quando está pronto
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if os.path.exists(port_file):
+                with open(port_file, 'r') as f:
+                    lines = f.read().split('\n')
+                if len(lines) >= 2 and lines[1]:
+                    self.ws_url = f"ws://127.0.0.1:{lines[0].strip()}{lines[1].strip()}"
+                    break
+            if self.process.poll() is not None:
+                raise WebDriverException(f"Chrome encerrou na partida (código {self.process.returncode})")
+            if time.monotonic() > deadline:
+                self.close()
+                raise WebDriverException("Chrome não abriu a porta de depuração a tempo")
+            time.sleep(0.05)
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def rss(self):
+        """Memória residente do Chrome com todos os processos filhos (bytes)"""
+        return process_tree_rss(self.pid)
+
+    def close(self):
+        """Encerra o Chrome e remove o perfil temporário"""
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self._own_profile:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+class CDPBrowser:
+    """Um Chrome e a conexão CDP do navegador; cada aba é uma sessão (flatten)"""
+
+    def __init__(self, headless=True, arguments=(), binary=None, command_timeout=30):
+        arguments = list(arguments)
+        if headless and not any(argument.startswith('--headless') for argument in arguments):
+            arguments.insert(0, '--headless=new')
+        # Guardados para as abas novas (ex.: --user-agent vira override em cada sessão)
+        self.arguments = arguments
+        self.process = ChromeProcess(binary, arguments)
+        try:
+            self.connection = CDPConnection(self.process.ws_url, timeout=command_timeout)
+        except Exception:
+            self.process.close()
+            raise
+
+    def new_tab(self, url='about:blank'):
+        """Abre uma aba e devolve o CDPDriver ligado a ela"""
+        target_id = self.connection.call('Target.createTarget', {'url': url})['targetId']
+        session_id = self.connection.call('Target.attachToTarget', {'targetId': target_id, 'flatten': True})['sessionId']
+        return CDPDriver(browser=self, target_id=target_id, session_id=session_id, arguments=self.arguments)
+
+    def close(self):
+        """Fecha a conexão e o processo"""
+        try:
+            self.connection.call('Browser.close', timeout=5)
+        except Exception:
+            pass
+        self.connection.close()
+        self.process.close()
+
+
+class CDPElement:
+    """Elemento remoto (RemoteObject) com a parte da API do WebElement usada nos scrapers"""
+
+    def __init__(self, driver, object_id):
+        self._driver = driver
+        self.id = object_id
+
+    def _call(self, function, *args):
+        return self._driver._call_function(self.id, function, args)
+
+    @property
+    def text(self):
+        return self._call("function(){return this.innerText || this.textContent || '';}")
+
+    @property
+    def tag_name(self):
+        return self._call("function(){return this.tagName.toLowerCase();}")
+
+    def get_attribute(self, name):
+        # Como no Selenium: a propriedade (href absoluto, value atual) ou o atributo
+        return self._call("function(n){var v = this[n]; if (v === undefined || v === null || typeof v === 'object')"
+                          " v = this.getAttribute(n); return v === null || v === undefined ? null : String(v);}", name)
+
+    def is_displayed(self):
+        return self._call("function(){var r = this.getBoundingClientRect(); var s = getComputedStyle(this);"
+                          " return r.width > 0 && r.height > 0 && s.visibility !== 'hidden' && s.display !== 'none';}")
+
+    def is_enabled(self):
+        return self._call("function(){return !this.disabled;}")
+
+    def click(self):
+        self._call("function(){this.scrollIntoView({block: 'center'}); this.click();}")
+
+    def clear(self):
+        self._call("function(){this.value = ''; this.dispatchEvent(new Event('input', {bubbles: true}));}")
+
+    def send_keys(self, *values):
+        self._call("function(){this.focus();}")
+        self._driver._call('Input.insertText', {'text': ''.join(str(value) for value in values)})
+
+    def find_element(self, by, value):
+        return self._driver._find(by, value, root=self.id)
+
+    def find_elements(self, by, value):
+        return self._driver._find_all(by, value, root=self.id)
+
+
+class CDPDriver:
+    """Backend de navegador que fala CDP direto com o Chrome, sem o chromedriver.
+
+    Implementa a parte da interface do webdriver.Chrome usada pelos scrapers
+    (get, page_source, current_url, find_element(s), execute_script, ...),
+    então WebDriverWait e o restante do código funcionam sem mudança. Cada
+    comando é uma mensagem no websocket em vez de um HTTP ao chromedriver.
+    Sem browser, abre o próprio Chrome e usa a primeira aba.
+    """
+
+    def __init__(self, browser=None, target_id=None, session_id=None, headless=True, arguments=(),
+                 binary=None):
+        self._owns_browser = browser is None
+        if browser is None:
+            browser = CDPBrowser(headless=headless, arguments=arguments, binary=binary)
+            targets = browser.connection.call('Target.getTargets')['targetInfos']
+            target_id = next(t['targetId'] for t in targets if t['type'] == 'page')
+            session_id = browser.connection.call('Target.attachToTarget',
+                                                 {'targetId': target_id, 'flatten': True})['sessionId']
+        self.browser = browser
+        self.connection = browser.connection
+        self.target_id = target_id
+        self.session_id = session_id
+        self.page_load_timeout = 60
+        self.implicit_wait = 0
+
+        for domain in ('Page.enable', 'Network.enable'):
+            self._call(domain)
+        user_agent = next((a.split('=', 1)[1] for a in arguments if a.startswith('--user-agent=')), None)
+        if user_agent:
+            self._call('Network.setUserAgentOverride', {'userAgent': user_agent, 'acceptLanguage': 'pt-BR,pt;q=0.9'})
+
+    @classmethod
+    def from_options(cls, options, binary=None):
+        """Abre o Chrome com os argumentos de um ChromeOptions do Selenium"""
+        arguments = list(options.arguments)
+        prefs = options.experimental_options.get('prefs', {})
+        if prefs.get('profile.managed_default_content_settings.images') == 2:
+            arguments.append('--blink-settings=imagesEnabled=false')
+        return cls(headless=False, arguments=arguments, binary=binary or options.binary_location or None)
+
+    # Comandos e eventos
+
+    def _call(self, method, params=None, timeout=None):
+        return self.connection.call(method, params, self.session_id, timeout)
+
+    def send(self, method, params=None):
+        """Comando assíncrono na aba: devolve um Future"""
+        return self.connection.send(method, params, self.session_id)
+
+    def on(self, event, callback):
+        """Assina um evento da aba (ex.: 'Network.responseReceived')"""
+        return self.connection.on(event, callback, self.session_id)
+
+    def off(self, handle):
+        self.connection.off(handle)
+
+    def expect(self, event, predicate=None):
+        """Future do próximo evento da aba"""
+        return self.connection.expect(event, predicate, self.session_id)
+
+    # Interface do webdriver
+
+    def set_page_load_timeout(self, seconds):
+        self.page_load_timeout = seconds
+
+    def implicitly_wait(self, seconds):
+        self.implicit_wait = seconds
+
+    def navigate(self, url):
+        """Inicia a navegação sem esperar a carga; devolve o Future do evento load"""
+        # Elementos da página anterior ficariam obsoletos de qualquer forma
+        self.release_elements()
+        loaded = self.expect('Page.loadEventFired')
+        result = self._call('Page.navigate', {'url': url})
+        if result.get('errorText'):
+            raise WebDriverException(f"Falha ao navegar para {url}: {result['errorText']}")
+        return loaded
+
+    def get(self, url):
+        """Navega e espera o evento load (como o pageLoadStrategy normal do Selenium)"""
+        loaded = self.navigate(url)
+        try:
+            loaded.result(self.page_load_timeout)
+        except FutureTimeout:
+            raise TimeoutException(f"Página não carregou em {self.page_load_timeout}s: {url}")
+
+    def _evaluate(self, expression, by_value=True, group=None):
+        params = {'expression': expression, 'returnByValue': by_value, 'awaitPromise': True}
+        if group:
+            params['objectGroup'] = group
+        result = self._call('Runtime.evaluate', params)
+        if 'exceptionDetails' in result:
+            details = result['exceptionDetails']
+            raise JavascriptException(details.get('exception', {}).get('description', details.get('text')))
+        return result['result']
+
+    def _call_function(self, object_id, function, args=()):
+        """Executa a função com this = objeto remoto; argumentos CDPElement viram referências"""
+        arguments = [{'objectId': arg.id} if isinstance(arg, CDPElement) else {'value': arg} for arg in args]
+        result = self._call('Runtime.callFunctionOn', {'objectId': object_id, 'functionDeclaration': function,
+                                                       'arguments': arguments, 'returnByValue': True,
+                                                       'awaitPromise': True})
+        if 'exceptionDetails' in result:
+            details = result['exceptionDetails']
+            raise JavascriptException(details.get('exception', {}).get('description', details.get('text')))
+        return result['result'].get('value')
+
+    def execute_script(self, script, *args):
+        """Como no Selenium: corpo de função com 'arguments' e 'return'"""
+        window = self._evaluate('window', by_value=False, group=SCRIPT_GROUP)['objectId']
+        try:
+            return self._call_function(window, f"function(){{{script}\n}}", args)
+        finally:
+            self.send('Runtime.releaseObjectGroup', {'objectGroup': SCRIPT_GROUP})
+
+    def release_elements(self):
+        """Solta no Chrome os RemoteObjects de todos os elementos localizados até aqui"""
+        self.send('Runtime.releaseObjectGroup', {'objectGroup': ELEMENT_GROUP})
+
+    @property
+    def page_source(self):
+        return self._evaluate('document.documentElement.outerHTML')['value']
+
+    @property
+    def current_url(self):
+        return self._evaluate('location.href')['value']
+
+    @property
+    def title(self):
+        return self._evaluate('document.title')['value']
+
+    def _locate(self, by, value, root, multiple):
+        """RemoteObject do resultado da busca (null/array)"""
+        if by not in _LOCATORS:
+            raise WebDriverException(f"Localizador não suportado no backend CDP: {by}")
+        expression = _LOCATORS[by][1 if multiple else 0].format(json.dumps(value))
+        if root is None:
+            # Busca no document direto no evaluate, sem um RemoteObject para ele
+            result = self._call('Runtime.evaluate', {
+                'expression': f"(function(){{var root = document; return {expression};}})()",
+                'returnByValue': False, 'objectGroup': ELEMENT_GROUP})
+        else:
+            result = self._call('Runtime.callFunctionOn', {
+                'objectId': root, 'functionDeclaration': f"function(){{var root = this; return {expression};}}",
+                'returnByValue': False, 'objectGroup': ELEMENT_GROUP})
+        if 'exceptionDetails' in result:
+            raise NoSuchElementException(f"Busca inválida ({by}={value})")
+        return result['result']
+
+    def _find(self, by, value, root=None):
+        deadline = time.monotonic() + self.implicit_wait
+        while True:
+            found = self._locate(by, value, root, multiple=False)
+            if found.get('objectId'):
+                return CDPElement(self, found['objectId'])
+            if time.monotonic() >= deadline:
+                raise NoSuchElementException(f"Elemento não encontrado: {by}={value}")
+            time.sleep(0.1)
+
+    def _find_all(self, by, value, root=None):
+        found = self._locate(by, value, root, multiple=True)
+        if not found.get('objectId'):
+            return []
+        properties = self._call('Runtime.getProperties', {'objectId': found['objectId'], 'ownProperties': True})
+        elements = [(int(p['name']), CDPElement(self, p['value']['objectId']))
+                    for p in properties['result'] if p['name'].isdigit() and p.get('value', {}).get('objectId')]
+        self.send('Runtime.releaseObject', {'objectId': found['objectId']})
+        return [element for _, element in sorted(elements, key=lambda item: item[0])]
+
+    def find_element(self, by, value):
+        return self._find(by, value)
+
+    def find_elements(self, by, value):
+        return self._find_all(by, value)
+
+    def save_screenshot(self, filename):
+        data = self._call('Page.captureScreenshot', {'format': 'png'})['data']
+        with open(filename, 'wb') as f:
+            f.write(base64.b64decode(data))
+        return True
+
+    def get_cookies(self):
+        cookies = self._call('Network.getCookies')['cookies']
+        return [{'name': c['name'], 'value': c['value'], 'domain': c['domain'], 'path': c['path'],
+                 'secure': c['secure'], 'httpOnly': c['httpOnly'],
+                 **({'expiry': int(c['expires'])} if c.get('expires', -1) > 0 else {})} for c in cookies]
+
+    def add_cookie(self, cookie):
+        params = {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly') if key in cookie}
+        if 'expiry' in cookie:
+            params['expires'] = cookie['expiry']
+        if 'domain' not in params:
+            params['url'] = self.current_url
+        self._call('Network.setCookie', params)
+
+    def add_script_on_new_document(self, source):
+        """Roda o script em todo documento novo, antes dos scripts da página"""
+        self._call('Page.addScriptToEvaluateOnNewDocument', {'source': source})
+
+    def delete_all_cookies(self):
+        self._call('Network.clearBrowserCookies')
+
+    def close(self):
+        """Fecha a aba"""
+        self.connection.call('Target.closeTarget', {'targetId': self.target_id})
+
+    def quit(self):
+        """Fecha a aba e, se o Chrome foi aberto por este driver, o navegador"""
+        if self._owns_browser:
+            self.browser.close()
+        else:
+            try:
+                self.close()
+            except WebDriverException:
+                pass
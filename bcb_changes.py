@@ -0,0 +1,198 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import logging
+import unicodedata
+from pathlib import Path
+from datetime import datetime
+
+from bcb_identity import canonical_key, canonical_numero, canonical_tipo
+from bcb_storage import parse_document
+from bcb_text_normalizer import TextNormalizer
+from bcb_corpus_reader import split_articles, split_paragraphs
+
+
+_WHITESPACE_RE = re.compile(r'\s+')
+# Caminho usado quando o corpo mudou sem nenhum artigo diferente (ex.: redação anterior
+# de um artigo cujo caminho se repete no texto compilado)
+BODY_PATH = 'corpo'
+
+
+def _collapse(text):
+    """Quebras de linha e espaços repetidos não contam como mudança"""
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def _digest(text):
+    """Hash curto (64 bits) de um trecho já normalizado"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class ChangeDetector:
+    """Detecta mudanças de conteúdo por artigo entre uma busca e a seguinte.
+
+    Para cada normativo guarda só hashes: do arquivo bruto, do corpo
+    normalizado (encoding, aspas, ordinais e espaços) e de cada artigo e
+    parágrafo. Corpo bruto igual encerra a comparação em O(1); corpo
+    normalizado igual é mudança só de formatação; nos demais casos só os
+    artigos com hash diferente são abertos para ver quais parágrafos
+    mudaram. Cada mudança vira uma linha no feed do dia
+    (feed_dir/AAAA-MM-DD.jsonl).
+    """
+
+    STATE_NAME = 'article_hashes.json'
+
+    def __init__(self, feed_dir='normativos_changes'):
+        self.feed_dir = feed_dir
+        self.state_path = os.path.join(feed_dir, self.STATE_NAME)
+        self.normalizer = TextNormalizer()
+        self.stats = {'sem_mudanca': 0, 'formatacao': 0, 'substancial': 0, 'novo': 0}
+        Path(self.feed_dir).mkdir(parents=True, exist_ok=True)
+
+        # Por chave canônica: {'bruto', 'normalizado', 'artigos': {caminho: [hash, {parágrafo: hash}]}}
+        self.state = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+
+    def fingerprint(self, text):
+        """Hashes do corpo e de cada artigo/parágrafo, sem o ruído de formatação"""
+        # Reparos do normalizador uma vez no corpo; nos trechos só os espaços são colapsados
+        normalized = unicodedata.normalize('NFC', self.normalizer.normalize(text) or '')
+        articles = {}
+        for path, article in split_articles(normalized):
+            paragraphs = {name: _digest(_collapse(part)) for name, part in split_paragraphs(article)}
+            articles[path] = [_digest(_collapse(article)), paragraphs]
+        return {
+            'bruto': hashlib.sha256(text.encode('utf-8')).hexdigest(),
+            'normalizado': _digest(_collapse(normalized)),
+            'artigos': articles,
+        }
+
+    @staticmethod
+    def _compare(old, new):
+        """Artigos adicionados, removidos e modificados (com os parágrafos que mudaram)"""
+        old_articles = old['artigos']
+        new_articles = new['artigos']
+        added = [path for path in new_articles if path not in old_articles]
+        removed = [path for path in old_articles if path not in new_articles]
+        modified = {}
+        for path, (digest, paragraphs) in new_articles.items():
+            previous = old_articles.get(path)
+            if previous is None or previous[0] == digest:
+                continue
+            old_paragraphs = previous[1]
+            changed = [name for name, value in paragraphs.items() if old_paragraphs.get(name) != value]
+            changed += [name for name in old_paragraphs if name not in paragraphs]
+            modified[path] = changed
+        return added, removed, modified
+
+    def observe(self, tipo, numero, text, detected_at=None):
+        """Compara com a busca anterior; devolve o registro do feed ou None se nada mudou"""
+        key = canonical_key(tipo, numero)
+        previous = self.state.get(key)
+        raw_digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        if previous is not None and previous['bruto'] == raw_digest:
+            self.stats['sem_mudanca'] += 1
+            return None
+
+        current = self.fingerprint(text)
+        self.state[key] = current
+        entry = {
+            'id': key,
+            'tipo': canonical_tipo(tipo),
+            'numero': canonical_numero(numero),
+            'detectado_em': (detected_at or datetime.now()).isoformat(timespec='seconds'),
+        }
+        if previous is None:
+            entry.update(mudanca='novo', artigos=len(current['artigos']))
+        elif previous['normalizado'] == current['normalizado']:
+            entry['mudanca'] = 'formatacao'
+        else:
+            added, removed, modified = self._compare(previous, current)
+            entry['mudanca'] = 'substancial'
+            if not (added or removed or modified):
+                modified = {BODY_PATH: []}
+            # Listas vazias ficam de fora para o feed continuar compacto
+            if added:
+                entry['adicionados'] = added
+            if removed:
+                entry['removidos'] = removed
+            if modified:
+                entry['modificados'] = modified
+        self.stats[entry['mudanca']] += 1
+        self._append(entry)
+        return entry
+
+    def _append(self, entry):
+        """Acrescenta o registro ao feed do dia"""
+        path = os.path.join(self.feed_dir, entry['detectado_em'][:10] + '.jsonl')
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def save(self):
+        """Grava os hashes de forma atômica"""
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, self.state_path)
+
+    def scan(self, input_dir='normativos_txt'):
+        """Compara todos os .txt do diretório com a última varredura"""
+        for path in sorted(Path(input_dir).glob('*.txt')):
+            meta, body = parse_document(path.read_text(encoding='utf-8'))
+            if 'tipo' not in meta or 'numero' not in meta:
+                continue
+            self.observe(meta['tipo'], meta['numero'], body)
+        self.save()
+        return dict(self.stats)
+
+
+def read_feed(feed_dir='normativos_changes', day=None):
+    """Registros do feed de um dia (AAAA-MM-DD; hoje por padrão)"""
+    day = day or datetime.now().strftime('%Y-%m-%d')
+    path = os.path.join(feed_dir, f"{day}.jsonl")
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def describe(entry):
+    """Linha legível de um registro do feed"""
+    title = f"{entry['tipo']} nro. {entry['numero']}"
+    if entry['mudanca'] == 'novo':
+        return f"{title}: novo ({entry['artigos']} artigos)"
+    if entry['mudanca'] == 'formatacao':
+        return f"{title}: só formatação"
+    parts = []
+    if entry.get('adicionados'):
+        parts.append(f"+{', '.join(entry['adicionados'])}")
+    if entry.get('removidos'):
+        parts.append(f"-{', '.join(entry['removidos'])}")
+    for path, paragraphs in entry.get('modificados', {}).items():
+        parts.append(f"~{path}({', '.join(paragraphs)})" if paragraphs else f"~{path}")
+    # Registros antigos, gravados sem o marcador do corpo
+    return f"{title}: {' '.join(parts) or '~' + BODY_PATH}"
+
+
+def main():
+    """scan [entrada] | feed [AAAA-MM-DD]"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'scan':
+        stats = ChangeDetector().scan(sys.argv[2] if len(sys.argv) > 2 else 'normativos_txt')
+        print(', '.join(f"{name}: {count}" for name, count in stats.items()))
+    elif command == 'feed':
+        for entry in read_feed(day=sys.argv[2] if len(sys.argv) > 2 else None):
+            if entry['mudanca'] != 'formatacao':
+                print(describe(entry))
+    else:
+        print("Uso: python bcb_changes.py scan [entrada] | feed [AAAA-MM-DD]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+import os
+import re
+import sys
+import json
+import mmap
+import struct
+import logging
+import tempfile
+from pathlib import Path
+
+from bcb_identity import canonical_key
+from bcb_storage import parse_document
+
+
+# Cabeçalhos dos scrapers cabem com folga na primeira página do arquivo
+HEADER_LIMIT = 4096
+PACK_MAGIC = b'BCBPACK1'
+# Primeira linha do formato 'Tipo:/Número:/Data:/URL:' (compose_document)
+_FIELD_RE = re.compile('(?:Tipo|Número|Data|URL):'.encode('utf-8'))
+
+
+def _find_header_end(buffer, limit=HEADER_LIMIT):
+    """Posição onde começa o corpo (após a linha de '=') ou 0 se não houver cabeçalho.
+
+    Só reconhece os dois formatos de parse_document: '# Tipo nro. N' até a
+    linha '# =====', ou 'Tipo: ...' (campos) até uma linha que comece com '====='.
+    """
+    end = min(len(buffer), limit)
+    if buffer[:2] == b'# ':
+        separator = buffer.find(b'\n# =====', 0, end)
+    elif _FIELD_RE.match(buffer[:16]):
+        separator = buffer.find(b'\n=====', 0, end)
+    else:
+        return 0
+    if separator < 0:
+        return 0
+    newline = buffer.find(b'\n', separator + 1, end)
+    if newline < 0:
+        return 0
+    start = newline + 1
+    # Pular as linhas em branco entre o separador e o corpo
+    while start < end and buffer[start:start + 1] == b'\n':
+        start += 1
+    return start
+
+
+def _parse_header_bytes(header_bytes):
+    """Campos do cabeçalho (Tipo/Número/Data/URL ou formato '# ...')"""
+    meta, _ = parse_document(header_bytes.decode('utf-8', errors='replace'))
+    return meta
+
+
+_ARTICLE_RE = re.compile(r'^Art\.\s*(\d+)\s*[º°o]?\.?(?:-([A-Z]+))?', re.MULTILINE)
+_PARAGRAPH_RE = re.compile(r'^(?:§\s*(\d+)\s*[º°o]?\.?|(Parágrafo único)\.?)', re.MULTILINE)
+
+
+def split_articles(text):
+    """Divide o corpo em artigos; retorna lista de (caminho, texto) em ordem.
+
+    Caminhos: "preambulo", "art1", "art3-A"; quando a numeração recomeça
+    (regulamento anexo), os artigos seguintes ganham o prefixo "anexo1/".
+    """
+    matches = list(_ARTICLE_RE.finditer(text))
+    if not matches:
+        return [('preambulo', text)] if text.strip() else []
+
+    # Início de cada artigo; no texto compilado o mesmo artigo aparece várias
+    # vezes seguidas (redações anteriores), que ficam juntas no mesmo trecho
+    starts = []
+    section = 0
+    previous = 0
+    for match in matches:
+        number = int(match.group(1))
+        suffix = f"-{match.group(2)}" if match.group(2) else ''
+        if number < previous:
+            section += 1
+        previous = number
+        path = f"art{number}{suffix}"
+        if section:
+            path = f"anexo{section}/{path}"
+        if not starts or starts[-1][0] != path:
+            starts.append((path, match.start()))
+
+    articles = []
+    if text[:starts[0][1]].strip():
+        articles.append(('preambulo', text[:starts[0][1]].rstrip('\n')))
+    for position, (path, start) in enumerate(starts):
+        end = starts[position + 1][1] if position + 1 < len(starts) else len(text)
+        articles.append((path, text[start:end].rstrip('\n')))
+    return articles
+
+
+def split_paragraphs(article):
+    """Divide um artigo em caput e parágrafos: lista de (caminho, texto)"""
+    matches = list(_PARAGRAPH_RE.finditer(article))
+    if not matches:
+        return [('caput', article)]
+
+    parts = [('caput', article[:matches[0].start()].rstrip('\n'))]
+    for position, match in enumerate(matches):
+        path = f"par{match.group(1)}" if match.group(1) else 'par-unico'
+        end = matches[position + 1].start() if position + 1 < len(matches) else len(article)
+        parts.append((path, article[match.start():end].rstrip('\n')))
+    return parts
+
+
+def _close_map(mapped):
+    """Fecha o mmap; com memoryviews exportadas, deixa para o coletor"""
+    try:
+        mapped.close()
+    except BufferError:
+        # Cada view mantém uma referência ao mmap, que é desmapeado quando a última for solta
+        logging.debug("mmap com views ativas: fechamento adiado")
+
+
+class CorpusReader:
+    """Leitura via mmap dos .txt do normativos_txt, sem copiar o corpo"""
+
+    def __init__(self, directory='normativos_txt', pattern='*.txt', paths=None):
+        self.directory = directory
+        # paths explícitos dispensam a listagem do diretório
+        self.paths = sorted(Path(directory).glob(pattern)) if paths is None else [Path(p) for p in paths]
+        self._maps = {}
+
+    def _map(self, path):
+        """Abre (uma vez) o mmap somente leitura do arquivo"""
+        mapped = self._maps.get(path)
+        if mapped is None:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b''
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[path] = mapped
+        return mapped
+
+    def header(self, path):
+        """Lê apenas a primeira página do arquivo para extrair o cabeçalho"""
+        mapped = self._map(path)
+        return _parse_header_bytes(mapped[:_find_header_end(mapped)])
+
+    def body_range(self, path):
+        """Intervalo (início, fim) em bytes do corpo do documento"""
+        mapped = self._map(path)
+        return _find_header_end(mapped), len(mapped)
+
+    def body(self, path):
+        """memoryview do corpo, sem cópia"""
+        start, end = self.body_range(path)
+        return memoryview(self._map(path))[start:end]
+
+    def headers(self):
+        """Itera (path, cabeçalho) de todo o corpus"""
+        for path in self.paths:
+            yield path, self.header(path)
+
+    def close(self):
+        """Fecha os mmaps abertos.
+
+        memoryviews devolvidos por body() ainda vivos impedem o close do mmap
+        (BufferError); nesse caso o mapa só é liberado quando a última view
+        for solta. Para liberar na hora, chame release() nas views antes.
+        """
+        for mapped in self._maps.values():
+            if isinstance(mapped, mmap.mmap):
+                _close_map(mapped)
+        self._maps = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def pack_corpus(directory='normativos_txt', pack_path='normativos.pack'):
+    """Empacota o corpus em um único arquivo: índice de cabeçalhos + corpos alinhados à página"""
+    entries = []
+    bodies = []
+    with CorpusReader(directory) as reader:
+        for path in reader.paths:
+            meta = reader.header(path)
+            body = bytes(reader.body(path))
+            entries.append({'name': path.name, 'meta': meta, 'length': len(body)})
+            bodies.append(body)
+
+    # O índice fica nas primeiras páginas; os corpos começam na página seguinte,
+    # então uma varredura só de cabeçalhos nunca toca as páginas dos corpos
+    def build_index(data_start):
+        offset = data_start
+        for entry in entries:
+            entry['offset'] = offset
+            offset += entry['length']
+        return json.dumps(entries, ensure_ascii=False).encode('utf-8')
+
+    prefix = len(PACK_MAGIC) + 8
+    data_start = 0
+    while True:
+        index = build_index(data_start)
+        needed = -(-(prefix + len(index)) // mmap.PAGESIZE) * mmap.PAGESIZE
+        if needed == data_start:
+            break
+        data_start = needed
+
+    fd, temp_path = tempfile.mkstemp(prefix='.pack.', suffix='.tmp', dir=os.path.dirname(os.path.abspath(pack_path)))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(PACK_MAGIC)
+        f.write(struct.pack('<Q', len(index)))
+        f.write(index)
+        f.write(b'\0' * (data_start - prefix - len(index)))
+        for body in bodies:
+            f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.chmod(temp_path, 0o644)
+    os.replace(temp_path, pack_path)
+
+    logging.info(f"{len(entries)} documentos empacotados em {pack_path}")
+    return len(entries)
+
+
+class PackedCorpusReader:
+    """Leitura via mmap do corpus empacotado por pack_corpus"""
+
+    def __init__(self, pack_path='normativos.pack'):
+        self.pack_path = pack_path
+        with open(pack_path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._map[:len(PACK_MAGIC)] != PACK_MAGIC:
+            raise ValueError(f"Arquivo não é um pack de normativos: {pack_path}")
+
+        prefix = len(PACK_MAGIC) + 8
+        (index_length,) = struct.unpack('<Q', self._map[len(PACK_MAGIC):prefix])
+        self.entries = json.loads(self._map[prefix:prefix + index_length].decode('utf-8'))
+        self._by_key = {}
+        for position, entry in enumerate(self.entries):
+            meta = entry['meta']
+            if 'tipo' in meta and 'numero' in meta:
+                self._by_key[canonical_key(meta['tipo'], meta['numero'])] = position
+
+    def __len__(self):
+        return len(self.entries)
+
+    def headers(self):
+        """Itera os cabeçalhos (só o índice é lido)"""
+        for entry in self.entries:
+            yield entry['name'], entry['meta']
+
+    def find(self, tipo, numero):
+        """Posição do documento no pack, ou None"""
+        return self._by_key.get(canonical_key(tipo, numero))
+
+    def body_range(self, position):
+        """Intervalo (início, fim) em bytes do corpo no pack"""
+        entry = self.entries[position]
+        return entry['offset'], entry['offset'] + entry['length']
+
+    def body(self, position):
+        """memoryview do corpo, sem cópia"""
+        start, end = self.body_range(position)
+        return memoryview(self._map)[start:end]
+
+    def text(self, position):
+        """Corpo decodificado (faz cópia)"""
+        return bytes(self.body(position)).decode('utf-8')
+
+    def close(self):
+        """Fecha o mmap (com views de body() vivas, só quando forem soltas)"""
+        _close_map(self._map)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def main():
+    """Empacota o normativos_txt ou lista os cabeçalhos de um pack"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if len(sys.argv) >= 2 and sys.argv[1] == 'pack':
+        directory = sys.argv[2] if len(sys.argv) > 2 else 'normativos_txt'
+        pack_path = sys.argv[3] if len(sys.argv) > 3 else 'normativos.pack'
+        pack_corpus(directory, pack_path)
+    elif len(sys.argv) >= 2 and sys.argv[1] == 'headers':
+        pack_path = sys.argv[2] if len(sys.argv) > 2 else 'normativos.pack'
+        with PackedCorpusReader(pack_path) as reader:
+            for name, meta in reader.headers():
+                print(f"{name}: {meta}")
+    else:
+        print("Uso: python bcb_corpus_reader.py pack [dir] [arquivo] | headers [arquivo]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import os
+import re
+import sys
+import json
+import time
+import logging
+from datetime import datetime, timedelta
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from bcb_output_writer import DEFAULT_TEMP_GRACE, AtomicOutputWriter
+from bcb_identity import canonical_tipo, display_numero
+from bcb_storage import compose_document
+
+
+SOAP_ENV = 'http://schemas.xmlsoap.org/soap/envelope/'
+
+# O endereço e o namespace do web service não estão nos manuais do repositório
+# (só no Manual do Web Service do BC Correio, com o WSDL): não há valor padrão,
+# eles vêm do construtor ou do ambiente
+ENDPOINT_ENV = 'BCCORREIO_WS_URL'
+NAMESPACE_ENV = 'BCCORREIO_WS_NAMESPACE'
+
+# Manifesto próprio no normativos_txt: o ingestor roda ao lado dos scrapers e
+# dos workers da fila, cada um gravando o seu
+MANIFEST_NAME = '.manifest.correio.json'
+
+# Nomes de campos usados nos cabeçalhos de correio -> campos do normativos_txt
+FIELD_ALIASES = {
+    'id': ('NUOP', 'Nuop', 'IdCorreio', 'Id', 'Codigo'),
+    'tipo': ('TipoDocumento', 'Tipo', 'TipoCorreio'),
+    'numero': ('NumeroDocumento', 'Numero', 'NumeroNormativo'),
+    'data': ('DataDocumento', 'DataHoraEnvio', 'DataEnvio', 'Data'),
+    'assunto': ('Assunto', 'Titulo', 'Ementa'),
+    'texto': ('Texto', 'Conteudo', 'Corpo', 'Mensagem'),
+}
+
+
+class BCCorreioError(Exception):
+    """Erro retornado pelo web service (SOAP Fault) ou resposta inválida"""
+
+
+def _local_name(tag):
+    """Nome do elemento sem o namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _element_to_dict(element):
+    """Converte um elemento XML simples (filhos folha) em dicionário"""
+    item = {}
+    for child in element:
+        name = _local_name(child.tag)
+        if len(child):
+            item[name] = _element_to_dict(child)
+        else:
+            item[name] = (child.text or '').strip()
+    return item
+
+
+def _pick(item, field):
+    """Primeiro valor presente entre os aliases do campo"""
+    for name in FIELD_ALIASES[field]:
+        if item.get(name):
+            return item[name]
+    return None
+
+
+class BCCorreioClient:
+    """Cliente SOAP/HTTP para o web service do BC Correio"""
+
+    def __init__(self, usuario=None, senha=None, endpoint=None, namespace=None, timeout=30, session=None):
+        import requests
+
+        self.endpoint = endpoint or os.environ.get(ENDPOINT_ENV)
+        self.namespace = namespace or os.environ.get(NAMESPACE_ENV)
+        if not self.endpoint or not self.namespace:
+            raise BCCorreioError(f"Endereço e namespace do web service não configurados "
+                                 f"(parâmetros endpoint/namespace ou {ENDPOINT_ENV}/{NAMESPACE_ENV})")
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+        # Autenticação com usuário e senha do Sisbacen
+        usuario = usuario or os.environ.get('BCCORREIO_USUARIO')
+        senha = senha or os.environ.get('BCCORREIO_SENHA')
+        if usuario and senha:
+            self.session.auth = (usuario, senha)
+
+    def _envelope(self, operation, params):
+        """Monta o envelope SOAP 1.1 da operação"""
+        body = ''.join(f"<ws:{name}>{escape(str(value))}</ws:{name}>"
+                       for name, value in params.items() if value is not None)
+        return (
+            f'<?xml version="1.0" encoding="utf-8"?>'
+            f'<soapenv:Envelope xmlns:soapenv="{SOAP_ENV}" xmlns:ws="{self.namespace}">'
+            f'<soapenv:Header/><soapenv:Body><ws:{operation}>{body}</ws:{operation}>'
+            f'</soapenv:Body></soapenv:Envelope>'
+        )
+
+    def call(self, operation, **params):
+        """Executa uma operação e devolve o elemento de resposta"""
+        response = self.session.post(
+            self.endpoint,
+            data=self._envelope(operation, params).encode('utf-8'),
+            headers={
+                'Content-Type': 'text/xml; charset=utf-8',
+                'SOAPAction': f'"{self.namespace}/{operation}"',
+            },
+            timeout=self.timeout,
+        )
+
+        try:
+            root = ElementTree.fromstring(response.content)
+        except ElementTree.ParseError as e:
+            raise BCCorreioError(f"Resposta inválida de {operation} (HTTP {response.status_code}): {e}")
+
+        body = next((el for el in root.iter() if _local_name(el.tag) == 'Body'), None)
+        if body is None or not len(body):
+            raise BCCorreioError(f"Resposta sem corpo SOAP para {operation}")
+
+        result = body[0]
+        if _local_name(result.tag) == 'Fault':
+            fault = _element_to_dict(result)
+            raise BCCorreioError(f"{operation}: {fault.get('faultstring') or fault}")
+
+        if response.status_code != 200:
+            raise BCCorreioError(f"{operation}: HTTP {response.status_code}")
+        return result
+
+    def _items(self, result):
+        """Lista de itens (elementos repetidos) dentro da resposta"""
+        container = result
+        # Descer pelos wrappers de um único filho (Response -> Result -> Lista)
+        while len(container) == 1 and len(container[0]) and all(len(child) for child in container[0]):
+            container = container[0]
+        return [_element_to_dict(child) for child in container if len(child)]
+
+    def consultar_pastas_autorizadas(self):
+        """Pastas e setores que o usuário pode acessar"""
+        return self._items(self.call('ConsultarPastasAutorizadas'))
+
+    def consultar_correios_por_pasta(self, pasta, pagina=1):
+        """Cabeçalhos dos correios de uma pasta"""
+        return self._items(self.call('ConsultarCorreiosPorPasta', CodigoPasta=pasta, Pagina=pagina))
+
+    def ler_correio(self, nuop):
+        """Conteúdo de um correio"""
+        return _element_to_dict(self.call('LerCorreio', NUOP=nuop))
+
+    def transmitir_correio(self, **campos):
+        """Transmite um correio (campos com os nomes do WSDL: Assunto, Texto...); devolve a resposta"""
+        return _element_to_dict(self.call('TransmitirCorreio', **campos))
+
+    def consultar_comunicacoes(self, data_inicial, data_final=None):
+        """Cabeçalhos das comunicações gerais e documentos de divulgação (normativos)"""
+        data_final = data_final or datetime.now()
+        return self._items(self.call(
+            'ConsultarComunicacaoGeralDocumentoDivulgacao',
+            DataInicial=data_inicial.strftime('%d/%m/%Y'),
+            DataFinal=data_final.strftime('%d/%m/%Y'),
+        ))
+
+    def ler_comunicacao(self, nuop):
+        """Conteúdo de uma comunicação geral ou documento de divulgação"""
+        return _element_to_dict(self.call('LerComunicacaoGeralDocumentoDivulgacao', NUOP=nuop))
+
+    def obter_anexo(self, nuop, anexo):
+        """Conteúdo (base64) de um anexo"""
+        return _element_to_dict(self.call('ObterAnexo', NUOP=nuop, CodigoAnexo=anexo))
+
+
+def _html_to_text(content):
+    """Converte o conteúdo HTML do correio em texto simples"""
+    if '<' not in content:
+        return content
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(content, 'html.parser').get_text('\n')
+
+
+class BCCorreioIngestor:
+    """Busca periodicamente novas publicações e grava no pipeline do normativos_txt"""
+
+    def __init__(self, client, output_dir='normativos_txt', state_file='bccorreio_state.json',
+                 history=None, lookback_days=7, temp_grace=DEFAULT_TEMP_GRACE):
+        self.client = client
+        self.output_dir = output_dir
+        self.state_file = state_file
+        self.history = history
+        self.lookback_days = lookback_days
+        # Temporários recentes podem ser de outro processo no mesmo diretório
+        self.writer = AtomicOutputWriter(output_dir, fsync_every=1, manifest_name=MANIFEST_NAME,
+                                         temp_grace=temp_grace)
+        self.state = {'seen': [], 'last_poll': None}
+        self._load_state()
+
+    def _load_state(self):
+        """Carrega os NUOPs já ingeridos"""
+        if os.path.exists(self.state_file):
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+
+    def _save_state(self):
+        """Grava o estado de forma atômica"""
+        temp_path = self.state_file + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(temp_path, self.state_file)
+
+    def filename(self, tipo, numero, data):
+        """Mesmo padrão de nome usado pelos scrapers de URL"""
+        tipo_clean = re.sub(r'[^A-Za-z0-9]+', '_', canonical_tipo(tipo))
+        data_clean = re.sub(r'[^0-9]+', '_', data or '').strip('_')
+        return f"{tipo_clean}_{display_numero(numero)}_{data_clean}.txt"
+
+    def ingest(self, item):
+        """Lê uma comunicação e grava o texto; retorna o arquivo ou None"""
+        nuop = _pick(item, 'id')
+        content = self.client.ler_comunicacao(nuop)
+        merged = {**item, **content}
+
+        tipo = _pick(merged, 'tipo')
+        numero = _pick(merged, 'numero')
+        if not tipo or not numero:
+            logging.info(f"Correio {nuop} não é um normativo, ignorando")
+            return None
+
+        data = (_pick(merged, 'data') or '').split(' ')[0]
+        body = _html_to_text(_pick(merged, 'texto') or '').strip()
+        if not body:
+            logging.warning(f"Correio {nuop} sem conteúdo")
+            return None
+
+        filename = self.filename(tipo, numero, data)
+        self.writer.write(filename, compose_document(tipo, display_numero(numero), data,
+                                                     f"bccorreio:{nuop}", body))
+        if self.history is not None:
+            self.history.record(tipo, numero, body)
+
+        logging.info(f"BC Correio: {tipo} {numero} gravado em {filename}")
+        return filename
+
+    def poll(self):
+        """Consulta as publicações desde a última verificação e ingere as novas"""
+        last_poll = self.state.get('last_poll')
+        since = datetime.fromisoformat(last_poll) - timedelta(days=1) if last_poll \
+            else datetime.now() - timedelta(days=self.lookback_days)
+        started = datetime.now()
+
+        seen = set(self.state['seen'])
+        saved = []
+        for item in self.client.consultar_comunicacoes(since, started):
+            nuop = _pick(item, 'id')
+            if not nuop or nuop in seen:
+                continue
+            try:
+                filename = self.ingest(item)
+                if filename:
+                    saved.append(filename)
+                seen.add(nuop)
+            except BCCorreioError as e:
+                logging.error(f"Erro ao ler correio {nuop}: {e}")
+
+        self.state = {'seen': sorted(seen), 'last_poll': started.isoformat(timespec='seconds')}
+        self._save_state()
+        self.writer.flush()
+        return saved
+
+    def run_forever(self, interval=300):
+        """Loop de ingestão contínua"""
+        while True:
+            try:
+                saved = self.poll()
+                logging.info(f"BC Correio: {len(saved)} novos documentos")
+            except Exception as e:
+                logging.error(f"Erro na consulta ao BC Correio: {e}")
+            time.sleep(interval)
+
+
+def main():
+    """Ingestão contínua (ou única, com --once) via BC Correio"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('bcb_correio.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+    from bcb_history import HistoryStore
+
+    try:
+        client = BCCorreioClient()
+    except BCCorreioError as e:
+        logging.error(str(e))
+        return
+    ingestor = BCCorreioIngestor(client, history=HistoryStore())
+    if '--once' in sys.argv:
+        print(f"{len(ingestor.poll())} documentos novos")
+    else:
+        ingestor.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import os
+import sys
+import json
+import math
+import time
+import socket
+import logging
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Janela (s) da vazão em docs/min e amostras mantidas para os percentis de latência
+RATE_WINDOW = 300
+LATENCY_SAMPLES = 1000
+PERCENTILES = (50, 90, 99)
+
+
+def worker_name():
+    """Identificação do processo nos eventos e na fila (host-pid)"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class EventStream:
+    """Eventos do motor de scraping ('inicio', 'etapa', 'tentativa', 'fim', 'plano').
+
+    'inicio' leva o worker que pegou o documento (host-pid ou aba da rotação),
+    mostrado na lista de documentos em andamento.
+
+    emit só acrescenta uma tupla a um deque (operação atômica, sem lock), então
+    pode ser chamado no caminho quente; a agregação fica com quem consome
+    (Dashboard), em outra thread. Sem consumidor, os eventos mais antigos são
+    descartados ao passar de maxlen.
+    """
+
+    def __init__(self, maxlen=100000):
+        self._events = deque(maxlen=maxlen)
+
+    def emit(self, kind, **fields):
+        self._events.append((time.time(), kind, fields))
+
+    def drain(self):
+        """Retira os eventos acumulados, na ordem em que foram emitidos"""
+        events = []
+        while True:
+            try:
+                events.append(self._events.popleft())
+            except IndexError:
+                return events
+
+
+def _percentile(ordered, percent):
+    """Percentil por posição mais próxima de uma lista já ordenada"""
+    if not ordered:
+        return None
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+class ProgressState:
+    """Agregados da execução montados a partir dos eventos"""
+
+    def __init__(self, total=None):
+        self.started = time.time()
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+        self.finished = deque()
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        # Por estratégia: [tentativas, sucessos]
+        self.strategies = {}
+        self.in_flight = {}
+
+    def apply(self, at, kind, fields):
+        if kind == 'plano':
+            self.total = fields['total']
+        elif kind == 'inicio':
+            self.in_flight[fields['id']] = {'documento': fields.get('documento', fields['id']),
+                                            'worker': fields.get('worker'), 'inicio': at,
+                                            'etapa': fields.get('etapa', 'iniciando'), 'desde': at}
+        elif kind == 'etapa':
+            document = self.in_flight.get(fields['id'])
+            if document is not None:
+                document.update(etapa=fields['etapa'], desde=at)
+        elif kind == 'tentativa':
+            counts = self.strategies.setdefault(fields['estrategia'], [0, 0])
+            counts[0] += 1
+            counts[1] += bool(fields['ok'])
+        elif kind == 'fim':
+            document = self.in_flight.pop(fields['id'], None)
+            self.done += 1
+            if fields.get('pulado'):
+                # Já salvo: conta no progresso, mas não na vazão nem na latência
+                self.skipped += 1
+                return
+            if not fields['ok']:
+                self.failed += 1
+            self.finished.append(at)
+            if document is not None:
+                self.latencies.append(at - document['inicio'])
+
+    def snapshot(self, queues=None):
+        """Estado atual como dict (o mesmo servido em /status.json)"""
+        now = time.time()
+        while self.finished and self.finished[0] < now - RATE_WINDOW:
+            self.finished.popleft()
+        window = min(RATE_WINDOW, max(now - self.started, 1e-9))
+        rate = len(self.finished) / window * 60
+
+        remaining = self.total - self.done if self.total is not None else None
+        ordered = sorted(self.latencies)
+        fetched = self.done - self.skipped
+        return {
+            'decorrido': now - self.started,
+            'total': self.total,
+            'concluidos': self.done,
+            'falhas': self.failed,
+            'pulados': self.skipped,
+            'taxa_falha': self.failed / fetched if fetched else 0.0,
+            'docs_por_minuto': rate,
+            'eta': remaining / rate * 60 if remaining and rate else None,
+            'latencia': {f"p{percent}": _percentile(ordered, percent) for percent in PERCENTILES},
+            'estrategias': {name: {'tentativas': attempts, 'sucessos': successes,
+                                   'taxa_falha': 1 - successes / attempts if attempts else 0.0}
+                            for name, (attempts, successes) in sorted(self.strategies.items())},
+            'filas': queues or {},
+            'em_andamento': sorted(({'documento': document['documento'], 'worker': document['worker'],
+                                     'etapa': document['etapa'], 'decorrido': now - document['inicio'],
+                                     'na_etapa': now - document['desde']}
+                                    for document in self.in_flight.values()),
+                                   key=lambda document: -document['decorrido']),
+        }
+
+
+def _duration(seconds):
+    if seconds is None:
+        return '-'
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+def render_text(status, in_flight_limit=15):
+    """Painel em texto (terminal e página HTML)"""
+    total = status['total']
+    progress = f"{status['concluidos']}/{total}" if total is not None else str(status['concluidos'])
+    latency = status['latencia']
+    lines = [
+        f"Progresso: {progress}  ({status['pulados']} já salvos, {status['falhas']} falhas, "
+        f"{status['taxa_falha']:.1%})",
+        f"Vazão: {status['docs_por_minuto']:.1f} docs/min  ETA: {_duration(status['eta'])}  "
+        f"decorrido: {_duration(status['decorrido'])}",
+        "Latência: " + '  '.join(f"{name} {value:.1f}s" if value is not None else f"{name} -"
+                                 for name, value in latency.items()),
+    ]
+    if status['filas']:
+        lines.append("Filas: " + '  '.join(f"{name} {depth}" for name, depth in status['filas'].items()))
+    if status['estrategias']:
+        lines.append("Estratégias:")
+        for name, numbers in status['estrategias'].items():
+            lines.append(f"  {name:<16} {numbers['sucessos']:>6}/{numbers['tentativas']:<6} "
+                         f"falha {numbers['taxa_falha']:.1%}")
+    lines.append(f"Em andamento ({len(status['em_andamento'])}):")
+    for document in status['em_andamento'][:in_flight_limit]:
+        worker = f"[{document['worker']}] " if document['worker'] else ''
+        lines.append(f"  {worker}{document['documento']:<36} {_duration(document['decorrido']):>7}  "
+                     f"{document['etapa']} há {_duration(document['na_etapa'])}")
+    return '\n'.join(lines)
+
+
+class _DashboardHandler(BaseHTTPRequestHandler):
+    """GET / (página que se atualiza sozinha) e GET /status.json"""
+
+    def do_GET(self):
+        status = self.server.dashboard.snapshot()
+        if self.path.startswith('/status.json'):
+            body = json.dumps(status, ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        elif self.path in ('/', '/index.html'):
+            from html import escape
+            body = ('<!doctype html><meta charset="utf-8"><meta http-equiv="refresh" content="2">'
+                    f'<title>bcb-normas</title><pre>{escape(render_text(status, in_flight_limit=100))}</pre>'
+                    ).encode('utf-8')
+            content_type = 'text/html; charset=utf-8'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+
+class Dashboard:
+    """Consome o EventStream numa thread própria e expõe o estado.
+
+    A cada interval segundos os eventos pendentes são agregados; as filas
+    (gauge) são lidas só nessa hora, e não a cada documento. Com port, o
+    estado é servido por HTTP; com log_every, um resumo vai para o log.
+    """
+
+    def __init__(self, events, port=None, host='127.0.0.1', interval=1.0, log_every=60, total=None):
+        self.events = events
+        self.port = port
+        self.host = host
+        self.interval = interval
+        self.log_every = log_every
+        self.state = ProgressState(total)
+        self.gauges = {}
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+
+    def gauge(self, name, read):
+        """Profundidade de uma fila, lida por read() a cada atualização"""
+        self.gauges[name] = read
+
+    def _queues(self):
+        queues = {}
+        for name, read in self.gauges.items():
+            try:
+                queues[name] = read()
+            except Exception:
+                queues[name] = None
+        return queues
+
+    def update(self):
+        """Agrega os eventos pendentes"""
+        events = self.events.drain()
+        with self._lock:
+            for at, kind, fields in events:
+                self.state.apply(at, kind, fields)
+
+    def snapshot(self):
+        with self._lock:
+            return self.state.snapshot(self._queues())
+
+    def _run(self):
+        last_log = time.monotonic()
+        while not self._stop.wait(self.interval):
+            self.update()
+            if self.log_every and time.monotonic() - last_log >= self.log_every:
+                last_log = time.monotonic()
+                status = self.snapshot()
+                logging.info(f"Painel: {status['concluidos']}/{status['total']} documentos, "
+                             f"{status['docs_por_minuto']:.1f} docs/min, ETA {_duration(status['eta'])}, "
+                             f"{len(status['em_andamento'])} em andamento")
+
+    def start(self):
+        if self.port is not None:
+            self._server = ThreadingHTTPServer((self.host, self.port), _DashboardHandler)
+            self._server.daemon_threads = True
+            self._server.dashboard = self
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+            logging.info(f"Painel em http://{self.host}:{self._server.server_port}/")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.update()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def watch(url='http://127.0.0.1:8090', interval=2.0):
+    """Painel no terminal, redesenhado a partir do /status.json de uma execução"""
+    from urllib.request import urlopen
+
+    status_url = url.rstrip('/') + '/status.json'
+    while True:
+        try:
+            with urlopen(status_url, timeout=5) as response:
+                status = json.load(response)
+            screen = render_text(status)
+        except OSError as e:
+            screen = f"Sem resposta de {status_url}: {e}"
+        sys.stdout.write('\033[H\033[2J' + screen + '\n')
+        sys.stdout.flush()
+        time.sleep(interval)
+
+
+def main():
+    """Acompanha uma execução no terminal: [url do painel]"""
+    try:
+        watch(sys.argv[1] if len(sys.argv) > 1 else 'http://127.0.0.1:8090')
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+import os
+import re
+import sys
+import json
+import base64
+import hashlib
+import logging
+import unicodedata
+from array import array
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from bcb_storage import parse_document
+from bcb_text_normalizer import normalize_text
+
+try:
+    import pypdf
+except ImportError:  # pypdf é opcional; sem ele os PDFs só agrupam por bytes idênticos
+    pypdf = None
+
+
+# Palavras por shingle, tamanho da assinatura e faixas do LSH (16 x 8: limiar ~0,7)
+SHINGLE_WORDS = 5
+SIGNATURE_SIZE = 128
+BANDS = 16
+_MASK = (1 << 64) - 1
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def _hash(value):
+    """Hash estável de 64 bits (o hash() do Python é aleatorizado)"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def document_text(path):
+    """Corpo do .txt (sem cabeçalho) ou texto do PDF; None se não há texto"""
+    if path.suffix.lower() == '.txt':
+        _, body = parse_document(path.read_text(encoding='utf-8', errors='replace'))
+        return body
+    if pypdf is None:
+        return None
+    try:
+        reader = pypdf.PdfReader(str(path))
+        return '\n'.join(page.extract_text() or '' for page in reader.pages)
+    except Exception as e:
+        logging.warning(f"Texto do PDF não extraído ({path.name}): {e}")
+        return None
+
+
+def shingles(text):
+    """Hashes dos shingles de SHINGLE_WORDS palavras, sem acento, caixa ou pontuação"""
+    text = unicodedata.normalize('NFKD', normalize_text(text).lower())
+    words = _WORD_RE.findall(''.join(c for c in text if not unicodedata.combining(c)))
+    if len(words) < SHINGLE_WORDS:
+        return {_hash(' '.join(words))} if words else set()
+    return {_hash(' '.join(words[i:i + SHINGLE_WORDS])) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def signature(hashes, size=SIGNATURE_SIZE):
+    """MinHash de uma permutação: o hash escolhe o compartimento e o mínimo de cada um é guardado.
+
+    Uma passada por shingle (em vez de size funções de hash); compartimentos
+    vazios copiam o próximo preenchido, com deslocamento, para manter a
+    estimativa de Jaccard.
+    """
+    slots = [None] * size
+    for value in hashes:
+        # Mistura (splitmix64) antes de dividir, para compartimento e valor independentes
+        value = (value * 0x9E3779B97F4A7C15) & _MASK
+        value ^= value >> 31
+        bucket = value % size
+        value //= size
+        if slots[bucket] is None or value < slots[bucket]:
+            slots[bucket] = value
+    if all(slot is None for slot in slots):
+        return None
+    for position in range(size):
+        distance = 1
+        while slots[position] is None:
+            candidate = slots[(position + distance) % size]
+            if candidate is not None:
+                slots[position] = candidate + distance * (_MASK // size)
+                break
+            distance += 1
+    # 32 bits por posição bastam para comparar e deixam o cache com 512 bytes por documento
+    return tuple(slot & 0xFFFFFFFF for slot in slots)
+
+
+def fingerprint_file(path):
+    """sha256 dos bytes, tamanho do texto e assinatura de um arquivo (roda nos processos do pool)"""
+    path = Path(path)
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    text = document_text(path)
+    current = signature(shingles(text)) if text and text.strip() else None
+    return {
+        'sha256': digest,
+        'caracteres': len(text) if current else 0,
+        'assinatura': base64.b64encode(array('I', current).tobytes()).decode('ascii') if current else None,
+    }
+
+
+def _decode_signature(encoded):
+    return tuple(array('I', base64.b64decode(encoded))) if encoded else None
+
+
+def similarity(first, second):
+    """Jaccard estimado: fração de posições iguais nas assinaturas"""
+    return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        root = self.parent.setdefault(item, item)
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # Compressão de caminho sem recursão (cadeias longas em 100 mil documentos)
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, first, second):
+        self.parent[self.find(first)] = self.find(second)
+
+
+class DuplicateDetector:
+    """Agrupa cópias quase idênticas entre normativos_txt e normativos_pdf.
+
+    Cada arquivo vira uma assinatura MinHash; o LSH divide a assinatura em
+    BANDS faixas e só documentos que coincidem em alguma faixa são
+    comparados, então o custo cresce com o número de documentos e não com o
+    de pares. Arquivos com os mesmos bytes (inclusive PDFs sem texto) são
+    agrupados antes, pelo sha256.
+    """
+
+    def __init__(self, threshold=0.8, bands=BANDS):
+        if SIGNATURE_SIZE % bands:
+            raise ValueError("bands precisa dividir SIGNATURE_SIZE")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = SIGNATURE_SIZE // bands
+
+        self.files = []
+        self.signatures = {}
+        self.text_lengths = {}
+        self._by_digest = {}
+        self._buckets = [{} for _ in range(bands)]
+        self._groups = _UnionFind()
+        self.compared = 0
+
+    def add(self, path, fingerprint=None):
+        """Indexa um arquivo (fingerprint: resultado de fingerprint_file) e o liga aos candidatos"""
+        path = Path(path)
+        fingerprint = fingerprint or fingerprint_file(path)
+        position = len(self.files)
+        self.files.append(path)
+        self._groups.find(position)
+
+        digest = fingerprint['sha256']
+        if digest in self._by_digest:
+            self._groups.union(position, self._by_digest[digest])
+        else:
+            self._by_digest[digest] = position
+
+        current = _decode_signature(fingerprint['assinatura'])
+        if current is None:
+            return
+        self.signatures[position] = current
+        self.text_lengths[position] = fingerprint['caracteres']
+
+        candidates = set()
+        for band in range(self.bands):
+            key = current[band * self.rows:(band + 1) * self.rows]
+            bucket = self._buckets[band].setdefault(key, [])
+            candidates.update(bucket)
+            bucket.append(position)
+        for other in candidates:
+            if self._groups.find(other) == self._groups.find(position):
+                continue
+            self.compared += 1
+            if similarity(current, self.signatures[other]) >= self.threshold:
+                self._groups.union(position, other)
+
+    def _canonical(self, members):
+        """Cópia mantida: o texto mais completo, depois o nome mais curto"""
+        return min(members, key=lambda p: (-self.text_lengths.get(p, 0), len(self.files[p].name),
+                                           self.files[p].name))
+
+    def clusters(self):
+        """Grupos com mais de um arquivo, com a cópia canônica por formato e os bytes recuperáveis"""
+        groups = {}
+        for position in range(len(self.files)):
+            groups.setdefault(self._groups.find(position), []).append(position)
+
+        report = []
+        for members in groups.values():
+            if len(members) < 2:
+                continue
+            by_format = {}
+            for position in members:
+                by_format.setdefault(self.files[position].suffix.lower().lstrip('.'), []).append(position)
+            canonical = {fmt: self._canonical(positions) for fmt, positions in by_format.items()}
+            # Um .txt e um .pdf do mesmo normativo não são redundantes: só cópias do mesmo formato
+            copies = [p for fmt, positions in by_format.items() for p in positions if p != canonical[fmt]]
+            report.append({
+                'canonicos': {fmt: str(self.files[p]) for fmt, p in sorted(canonical.items())},
+                'copias': sorted(str(self.files[p]) for p in copies),
+                'bytes_recuperaveis': sum(self.files[p].stat().st_size for p in copies),
+            })
+        report.sort(key=lambda cluster: -cluster['bytes_recuperaveis'])
+        return report
+
+
+def _load_cache(cache_file):
+    if cache_file and os.path.exists(cache_file):
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def _save_cache(cache_file, cache):
+    """Grava o cache de forma atômica"""
+    if not cache_file:
+        return
+    temp_path = cache_file + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temp_path, cache_file)
+
+
+def find_duplicates(directories=('normativos_txt', 'normativos_pdf'), threshold=0.8,
+                    cache_file='dedup_cache.json', workers=None):
+    """Varre os diretórios (.txt e .pdf) e devolve os grupos de duplicatas.
+
+    A extração de texto dos PDFs domina o tempo: as assinaturas ficam em
+    cache por caminho/mtime/tamanho e só arquivos novos ou alterados são
+    lidos, em paralelo.
+    """
+    if pypdf is None:
+        logging.warning("pypdf não instalado; PDFs só serão agrupados por bytes idênticos")
+    paths = [path for directory in directories for path in sorted(Path(directory).rglob('*'))
+             if path.suffix.lower() in ('.txt', '.pdf') and path.is_file()]
+
+    cache = _load_cache(cache_file)
+    current = {}
+    stale = []
+    for path in paths:
+        stat = path.stat()
+        entry = cache.get(str(path))
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['bytes'] == stat.st_size:
+            current[str(path)] = entry
+        else:
+            current[str(path)] = {'mtime_ns': stat.st_mtime_ns, 'bytes': stat.st_size}
+            stale.append(str(path))
+
+    if stale:
+        workers = workers if workers is not None else max(1, (os.cpu_count() or 2) - 1)
+        logging.info(f"Calculando assinaturas de {len(stale)} arquivos ({workers} processos)")
+        if workers > 1 and len(stale) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                fingerprints = executor.map(fingerprint_file, stale, chunksize=8)
+                for name, fingerprint in zip(stale, fingerprints):
+                    current[name].update(fingerprint)
+        else:
+            for name in stale:
+                current[name].update(fingerprint_file(name))
+        _save_cache(cache_file, current)
+
+    detector = DuplicateDetector(threshold=threshold)
+    for path in paths:
+        detector.add(path, current[str(path)])
+    logging.info(f"{len(detector.files)} arquivos indexados, {detector.compared} comparações de candidatos")
+    return detector.clusters()
+
+
+def main():
+    """Lista os grupos de duplicatas: [diretórios...] [--json]"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    args = [arg for arg in sys.argv[1:] if arg != '--json']
+    clusters = find_duplicates(args or ('normativos_txt', 'normativos_pdf'))
+    if '--json' in sys.argv:
+        print(json.dumps(clusters, ensure_ascii=False, indent=2))
+        return
+
+    for cluster in clusters:
+        print(f"Manter: {', '.join(cluster['canonicos'].values())}")
+        for copy in cluster['copias']:
+            print(f"  cópia: {copy}")
+    total = sum(cluster['bytes_recuperaveis'] for cluster in clusters)
+    print(f"\n{len(clusters)} grupos, {total / 2**20:.1f} MB recuperáveis")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,8 @@
 import pandas as pd
-import requests
 from bs4 import BeautifulSoup
 import time
 import os
 import re
-from urllib.parse import quote
 import logging
 from pathlib import Path
 from selenium import webdriver
@@ -16,6 +14,12 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
 from datetime import datetime
+from bcb_identity import document_url
+from bcb_output_writer import AtomicOutputWriter
+from bcb_http import shared_client
+from bcb_postprocess import PostProcessingPipeline, default_workers, url_filename
+from bcb_extraction import find_url_content
+from bcb_snapshots import SnapshotCache
 
 # Configuração de logging
 logging.basicConfig(
@@ -38,6 +42,11 @@ class BCBDirectURLScraper:
         # Criar diretório de saída
         Path(self.output_dir).mkdir(parents=True, exist_ok=True)
         Path(f"{self.output_dir}/normativos_pdf").mkdir(parents=True, exist_ok=True)
+        self.writer = AtomicOutputWriter(self.output_dir)
+        # Cache HTTP em disco, compartilhado com os outros scripts
+        self.http = shared_client()
+        self.pipeline = PostProcessingPipeline(self.writer)
+        self.snapshots = SnapshotCache()
         
         # Configurar Selenium WebDriver
         self._setup_driver(headless=not debug)
@@ -84,11 +93,8 @@ class BCBDirectURLScraper:
             raise
 
     def get_document_url(self, document_type, document_number):
-        """Constrói a URL direta para o documento"""
-        # Remover decimais do número (ex: 501.0 -> 501)
-        clean_number = str(int(float(document_number))) if '.' in str(document_number) else str(document_number)
-        encoded_type = quote(str(document_type))
-        return f"https://www.bcb.gov.br/estabilidadefinanceira/exibenormativo?tipo={encoded_type}&numero={clean_number}"
+        """Constrói a URL direta para o documento (501.0 -> 501, 4.282 continua 4.282)"""
+        return document_url(document_type, document_number)
 
     def access_document(self, document_type, document_number):
         """Acessa o documento usando URL direta"""
@@ -115,58 +121,38 @@ class BCBDirectURLScraper:
             logging.error(f"Erro ao acessar documento {document_type} {document_number}: {e}")
             return False
 
+    def _select_one(self, selector):
+        """Primeiro elemento do seletor CSS, ou None"""
+        try:
+            return self.driver.find_element(By.CSS_SELECTOR, selector)
+        except NoSuchElementException:
+            return None
+
     def scrape_document_content(self, document_type, document_number, document_date):
         """Extrai o conteúdo do documento carregado"""
         try:
             # Aguardar o conteúdo do documento carregar
             time.sleep(2)
             
-            # Tentar diferentes seletores para o conteúdo do documento
-            content_selectors = [
-                ".documento-conteudo",
-                ".normativo-conteudo", 
-                ".conteudo-documento",
-                ".document-content",
-                "#conteudo",
-                ".main-content",
-                "main",
-                ".container .row",
-                ".row .col-md-12",
-                ".row .col-lg-12"
-            ]
-            
-            content_element = None
-            for selector in content_selectors:
-                try:
-                    content_element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    if content_element and content_element.text.strip():
-                        break
-                except NoSuchElementException:
-                    continue
-            
-            if not content_element:
-                # Se não encontrar conteúdo específico, usar o body
-                content_element = self.driver.find_element(By.TAG_NAME, "body")
+            # Mesmos seletores da reextração dos snapshots (bcb_extraction)
+            content_element = find_url_content(self._select_one, lambda element: element.text,
+                                               lambda: self.driver.find_element(By.TAG_NAME, "body"))
             
             # Extrair texto
             content_text = content_element.text
+            self.snapshots.put(self.driver.current_url, self.driver.page_source, layout='url',
+                               tipo=document_type, numero=str(document_number), data=document_date)
             
             if not content_text.strip():
                 logging.warning(f"Conteúdo vazio para {document_type} {document_number}")
                 return None
             
-            # Salvar como arquivo de texto
-            filename = f"{document_type.replace(' ', '_')}_{document_number}_{document_date.replace('/', '_')}.txt"
-            filepath = os.path.join(self.output_dir, filename)
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(f"Tipo: {document_type}\n")
-                f.write(f"Número: {document_number}\n")
-                f.write(f"Data: {document_date}\n")
-                f.write(f"URL: {self.driver.current_url}\n")
-                f.write("="*80 + "\n\n")
-                f.write(content_text)
-            
+            # Nome, cabeçalho, hash e gravação ficam no estágio de pós-processamento
+            if not self.pipeline.submit('url', document_type, document_number, content_text,
+                                        data=document_date, url=self.driver.current_url):
+                return None
+            filepath = os.path.join(self.output_dir, url_filename(document_type, document_number, document_date))
+
             logging.info(f"Conteúdo salvo: {filepath}")
             
             # Tentar baixar PDF se disponível
@@ -188,13 +174,11 @@ class BCBDirectURLScraper:
                 href = link.get_attribute('href')
                 if href and '.pdf' in href.lower():
                     # Baixar o PDF
-                    response = requests.get(href, timeout=30)
+                    response = self.http.get(href, timeout=30)
                     if response.status_code == 200:
                         pdf_filename = f"{document_type.replace(' ', '_')}_{document_number}_{document_date.replace('/', '_')}.pdf"
-                        pdf_filepath = os.path.join(self.output_dir, "normativos_pdf", pdf_filename)
-                        
-                        with open(pdf_filepath, 'wb') as f:
-                            f.write(response.content)
+                        pdf_filepath = self.writer.write(os.path.join("normativos_pdf", pdf_filename),
+                                                         response.content, binary=True)
                         
                         logging.info(f"PDF baixado: {pdf_filepath}")
                         break
@@ -216,6 +200,9 @@ class BCBDirectURLScraper:
             failed_docs = 0
             
             logging.info(f"Iniciando processamento de {total_docs} documentos")
+
+            # Pós-processamento em processos separados enquanto o navegador busca o próximo
+            self.pipeline = PostProcessingPipeline(self.writer, workers=default_workers())
             
             for index, row in df.iterrows():
                 try:
@@ -247,13 +234,23 @@ class BCBDirectURLScraper:
                     logging.error(f"Erro ao processar documento {index + 1}: {e}")
                     continue
             
+            utilization = self.pipeline.close()
+            successful_docs -= self.pipeline.results['failed']
+            failed_docs += self.pipeline.results['failed']
+
             logging.info(f"Processamento concluído. Sucessos: {successful_docs}, Falhas: {failed_docs}")
+            self.pipeline.print_report(utilization)
+            self.http.print_report()
             
         except Exception as e:
             logging.error(f"Erro no processamento geral: {e}")
 
     def close(self):
         """Fecha o driver"""
+        self.pipeline.close()
+        self.snapshots.evict()
+        self.writer.close()
+        self.http.close()
         if self.driver:
             self.driver.quit()
             logging.info("WebDriver fechado")
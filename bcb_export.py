@@ -0,0 +1,264 @@
+import os
+import re
+import sys
+import csv
+import json
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from urllib.parse import quote
+
+from bcb_identity import canonical_key, canonical_numero, canonical_tipo
+from bcb_storage import parse_document
+from bcb_text_normalizer import normalize_text
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow é opcional; sem ele só o JSONL é exportado
+    pyarrow = None
+
+
+# Colunas de metadados; o corpo fica na coluna (ou arquivo) separada 'texto'
+METADATA_COLUMNS = ['id', 'numero', 'data', 'assunto', 'url', 'data_acesso', 'formato',
+                    'arquivo', 'versao', 'sha256', 'caracteres', 'exportado_em']
+# tipo e ano são as partições do Parquet (tipo=.../ano=...)
+PARTITION_COLUMNS = ['tipo', 'ano']
+
+_YEAR_RE = re.compile(r'(\d{4})\s*$')
+
+
+def _year(data):
+    """Ano de uma data d/m/aaaa (ou None)"""
+    match = _YEAR_RE.search(data or '')
+    return match.group(1) if match else None
+
+
+def load_catalog_dates(csv_file='normativos_spb_bcb.csv'):
+    """Datas do catálogo por chave canônica (o formato '# Tipo nro.' não grava a data)"""
+    dates = {}
+    if not csv_file or not os.path.exists(csv_file):
+        return dates
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            if row.get('tipo') and row.get('numero') and row.get('data'):
+                dates[canonical_key(normalize_text(row['tipo']), row['numero'])] = row['data']
+    return dates
+
+
+def parquet_schema(partitions=True):
+    """Esquema fixo, para que partes de execuções diferentes se unam sem conflito"""
+    types = {'versao': pyarrow.int32(), 'caracteres': pyarrow.int64()}
+    columns = (PARTITION_COLUMNS if partitions else []) + METADATA_COLUMNS + ['texto']
+    return pyarrow.schema([(column, types.get(column, pyarrow.string())) for column in columns])
+
+
+def _atomic_write(path, write):
+    """Grava em temporário no mesmo diretório e renomeia"""
+    Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.export.', suffix='.tmp', dir=os.path.dirname(path))
+    os.close(fd)
+    write(temp_path)
+    os.chmod(temp_path, 0o644)
+    os.replace(temp_path, path)
+
+
+class DatasetExporter:
+    """Exporta o normativos_txt para Parquet particionado (tipo/ano) e JSONL.
+
+    Cada execução acrescenta arquivos part-<execução> apenas com documentos
+    novos ou alterados; um documento alterado ganha uma nova linha com versao
+    maior (leitores ficam com a maior versao de cada id, ver read_metadata).
+    No JSONL metadados e textos ficam em arquivos separados, para que ler só
+    os metadados não passe pelos corpos; no Parquet isso vem da leitura por
+    coluna.
+    """
+
+    STATE_NAME = 'export_state.json'
+
+    def __init__(self, dataset_dir='normativos_dataset', catalog_csv='normativos_spb_bcb.csv'):
+        self.dataset_dir = dataset_dir
+        self.catalog_csv = catalog_csv
+        self.state_path = os.path.join(dataset_dir, self.STATE_NAME)
+        Path(self.dataset_dir).mkdir(parents=True, exist_ok=True)
+
+        # sha256/versão exportados por id e mtime/tamanho por .txt (para pular sem ler)
+        self.state = {'documentos': {}, 'arquivos': {}}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+
+    def _save_state(self):
+        """Grava o estado de forma atômica (depois das partes, para não perder linhas)"""
+        def write(temp_path):
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, ensure_ascii=False, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+        _atomic_write(self.state_path, write)
+
+    def _changed_rows(self, input_dir, exported_at):
+        """Linhas dos documentos novos ou alterados desde a última exportação"""
+        catalog_dates = None
+        for path in sorted(Path(input_dir).glob('*.txt')):
+            stat = path.stat()
+            previous = self.state['arquivos'].get(path.name)
+            if previous and previous['mtime_ns'] == stat.st_mtime_ns and previous['bytes'] == stat.st_size:
+                continue
+
+            text = path.read_text(encoding='utf-8')
+            meta, body = parse_document(text)
+            if 'tipo' not in meta or 'numero' not in meta:
+                logging.warning(f"Cabeçalho não reconhecido, ignorado: {path.name}")
+                continue
+
+            key = canonical_key(meta['tipo'], meta['numero'])
+            digest = hashlib.sha256(body.encode('utf-8')).hexdigest()
+            record = self.state['documentos'].get(key)
+            file_state = {'mtime_ns': stat.st_mtime_ns, 'bytes': stat.st_size}
+            if record and record['sha256'] == digest:
+                # Só o arquivo foi regravado; o conteúdo é o mesmo
+                self.state['arquivos'][path.name] = file_state
+                continue
+
+            data = meta.get('data')
+            if data is None:
+                if catalog_dates is None:
+                    catalog_dates = load_catalog_dates(self.catalog_csv)
+                data = catalog_dates.get(key)
+
+            versao = record['versao'] + 1 if record else 1
+            yield {
+                'id': key,
+                'tipo': canonical_tipo(meta['tipo']),
+                'ano': _year(data) or 'desconhecido',
+                'numero': canonical_numero(meta['numero']),
+                'data': data,
+                'assunto': meta.get('assunto'),
+                'url': meta.get('url'),
+                'data_acesso': meta.get('data_acesso'),
+                'formato': 'catalog' if 'data_acesso' in meta else 'url',
+                'arquivo': path.name,
+                'versao': versao,
+                'sha256': digest,
+                'caracteres': len(body),
+                'exportado_em': exported_at,
+                'texto': body,
+            }
+            self.state['documentos'][key] = {'sha256': digest, 'versao': versao}
+            self.state['arquivos'][path.name] = file_state
+
+    def _write_jsonl(self, rows, part):
+        """Metadados e textos em arquivos separados, ligados por id/versao"""
+        jsonl_dir = os.path.join(self.dataset_dir, 'jsonl')
+
+        def write_metadata(temp_path):
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for row in rows:
+                    fields = {column: row[column] for column in PARTITION_COLUMNS + METADATA_COLUMNS}
+                    f.write(json.dumps(fields, ensure_ascii=False) + '\n')
+
+        def write_texts(temp_path):
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps({'id': row['id'], 'versao': row['versao'], 'texto': row['texto']},
+                                       ensure_ascii=False) + '\n')
+
+        _atomic_write(os.path.join(jsonl_dir, f"textos-{part}.jsonl"), write_texts)
+        _atomic_write(os.path.join(jsonl_dir, f"metadados-{part}.jsonl"), write_metadata)
+
+    def _write_parquet(self, rows, part):
+        """Um arquivo por partição tipo=/ano=, com o texto como última coluna"""
+        partitions = {}
+        for row in rows:
+            partitions.setdefault((row['tipo'], row['ano']), []).append(row)
+
+        schema = parquet_schema(partitions=False)
+        for (tipo, ano), partition_rows in partitions.items():
+            table = pyarrow.Table.from_pylist(partition_rows, schema=schema)
+            # Valores da partição codificados como URI (o leitor hive do pyarrow decodifica)
+            directory = os.path.join(self.dataset_dir, 'parquet', f"tipo={quote(tipo, safe='')}",
+                                     f"ano={quote(ano, safe='')}")
+            _atomic_write(os.path.join(directory, f"part-{part}.parquet"),
+                          lambda temp_path: pyarrow.parquet.write_table(table, temp_path, compression='zstd'))
+        return len(partitions)
+
+    def export(self, input_dir='normativos_txt'):
+        """Acrescenta ao dataset os documentos novos ou alterados; devolve quantos"""
+        now = datetime.now()
+        exported_at = now.isoformat(timespec='seconds')
+        part = now.strftime('%Y%m%dT%H%M%S%f')
+
+        rows = list(self._changed_rows(input_dir, exported_at))
+        if not rows:
+            self._save_state()
+            logging.info("Nenhum documento novo ou alterado para exportar")
+            return 0
+
+        self._write_jsonl(rows, part)
+        if pyarrow is not None:
+            partitions = self._write_parquet(rows, part)
+            logging.info(f"Parquet: {len(rows)} documentos em {partitions} partições")
+        else:
+            logging.warning("pyarrow não instalado; exportado apenas o JSONL")
+
+        self._save_state()
+        logging.info(f"{len(rows)} documentos novos ou alterados exportados (parte {part})")
+        return len(rows)
+
+
+def _latest(rows):
+    """Fica com a maior versão de cada id"""
+    latest = {}
+    for row in rows:
+        current = latest.get(row['id'])
+        if current is None or row['versao'] > current['versao']:
+            latest[row['id']] = row
+    return sorted(latest.values(), key=lambda row: row['id'])
+
+
+def read_metadata(dataset_dir='normativos_dataset', columns=None):
+    """Metadados da versão atual de cada documento, sem ler os textos"""
+    columns = columns or PARTITION_COLUMNS + METADATA_COLUMNS
+    needed = list(dict.fromkeys(columns + ['id', 'versao']))
+
+    parquet_dir = os.path.join(dataset_dir, 'parquet')
+    if pyarrow is not None and os.path.isdir(parquet_dir):
+        import pyarrow.dataset as pyarrow_dataset
+
+        partitioning = pyarrow_dataset.partitioning(
+            pyarrow.schema([(column, pyarrow.string()) for column in PARTITION_COLUMNS]), flavor='hive')
+        dataset = pyarrow_dataset.dataset(parquet_dir, schema=parquet_schema(), format='parquet',
+                                          partitioning=partitioning)
+        # Projeção por coluna: as páginas da coluna 'texto' não são lidas
+        rows = dataset.to_table(columns=needed).to_pylist()
+    else:
+        rows = []
+        for path in sorted(Path(dataset_dir, 'jsonl').glob('metadados-*.jsonl')):
+            with open(path, 'r', encoding='utf-8') as f:
+                rows.extend(json.loads(line) for line in f)
+
+    return [{column: row.get(column) for column in columns} for row in _latest(rows)]
+
+
+def main():
+    """export [entrada] [dataset] | metadata [dataset]"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'export':
+        input_dir = sys.argv[2] if len(sys.argv) > 2 else 'normativos_txt'
+        dataset_dir = sys.argv[3] if len(sys.argv) > 3 else 'normativos_dataset'
+        DatasetExporter(dataset_dir).export(input_dir)
+    elif command == 'metadata':
+        dataset_dir = sys.argv[2] if len(sys.argv) > 2 else 'normativos_dataset'
+        for row in read_metadata(dataset_dir, ['tipo', 'numero', 'data', 'versao']):
+            print(f"{row['tipo']} nro. {row['numero']} ({row['data']}) v{row['versao']}")
+    else:
+        print("Uso: python bcb_export.py export [entrada] [dataset] | metadata [dataset]")
+
+
+if __name__ == "__main__":
+    main()
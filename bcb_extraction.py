@@ -0,0 +1,134 @@
+import json
+
+
+# Seletores, indicadores e pontuação do conteúdo do normativo, compartilhados
+# entre os scrapers (DOM ao vivo) e a reextração dos snapshots (bcb_snapshots):
+# ajustar aqui vale para os dois.
+
+# Página do catálogo (exibenormativo): blocos candidatos, na ordem de preferência
+CATALOG_SELECTORS = [
+    'div[class*="conteudo"]',
+    'div[class*="documento"]',
+    'div[class*="normativo"]',
+    'div[class*="texto"]',
+    'div[class*="body"]',
+    'div[class*="main"]',
+    'div[class*="content"]',
+    'article',
+    'main',
+    'div[class*="normativo-conteudo"]',
+    'div[class*="documento-conteudo"]'
+]
+# Páginas por URL direta: o primeiro seletor com texto vence; sem nenhum, o body
+URL_SELECTORS = [
+    ".documento-conteudo",
+    ".normativo-conteudo",
+    ".conteudo-documento",
+    ".document-content",
+    "#conteudo",
+    ".main-content",
+    "main",
+    ".container .row",
+    ".row .col-md-12",
+    ".row .col-lg-12",
+    ".row .col-sm-12"
+]
+
+DOCUMENT_INDICATORS = ['RESOLUÇÃO', 'BANCO CENTRAL', 'Art.', 'Parágrafo', 'Considerando', 'Visto', 'Brasília',
+                       'INSTRUÇÃO', 'CIRCULAR']
+# Indicadores que pontuam um elemento na busca ampla (sem INSTRUÇÃO/CIRCULAR, comuns no menu)
+SCORE_INDICATORS = DOCUMENT_INDICATORS[:7]
+# Basta um deles para aceitar um elemento achado por seletor
+SELECTOR_INDICATORS = DOCUMENT_INDICATORS[:5]
+# Trechos que aparecem no corpo do documento, e não só no título ou no menu
+BODY_INDICATORS = ['Art.', 'Parágrafo', 'Considerando']
+NAV_INDICATORS = ['ACESSIBILIDADE', 'ALTO CONTRASTE', 'ENGLISH', 'Home', 'Estabilidade', 'financeira']
+
+# Tamanho mínimo do texto aceito por seletor e na busca ampla
+SELECTOR_MIN_LENGTH = 1000
+SCORE_MIN_LENGTH = 2000
+# Texto longo é aceito mesmo com poucos indicadores
+LONG_TEXT = 1000
+# Desconto por indicador de navegação na pontuação
+NAV_PENALTY = 0.5
+
+# Verificação do DOM durante a espera da página do catálogo (WebDriverWait)
+LOAD_CHECK_SCRIPT = f"""
+    var text = document.body.innerText || document.body.textContent || '';
+    var upper = text.toUpperCase();
+    var found = {json.dumps(DOCUMENT_INDICATORS, ensure_ascii=False)}.filter(ind => upper.includes(ind));
+    return {{
+        found: found,
+        hasContent: text.length > {SCORE_MIN_LENGTH},
+        textLength: text.length,
+        hasNavigation: text.includes('ACESSIBILIDADE') && text.includes('ALTO CONTRASTE'),
+        hasDocumentContent: {json.dumps(BODY_INDICATORS)}.some(ind => text.includes(ind))
+    }};
+"""
+
+
+def content_ready(state):
+    """Se o resultado do LOAD_CHECK_SCRIPT indica o documento já renderizado"""
+    return (len(state['found']) >= 2 and state['hasContent'] and not state['hasNavigation']
+            and state['hasDocumentContent'])
+
+
+def indicators(text):
+    """(indicadores de documento, indicadores de navegação) presentes no texto"""
+    text_upper = text.upper()
+    return ([ind for ind in DOCUMENT_INDICATORS if ind in text_upper],
+            [ind for ind in NAV_INDICATORS if ind in text_upper])
+
+
+def accept_catalog_text(text):
+    """Validação final do texto do catálogo: indicadores sem cara de menu, ou texto longo"""
+    found, nav_found = indicators(text)
+    return (len(found) >= 2 and len(nav_found) < 3) or len(text) > LONG_TEXT
+
+
+def selector_match(text):
+    """Elemento achado por seletor serve: longo e com algum indicador de documento"""
+    if not text or len(text) <= SELECTOR_MIN_LENGTH:
+        return False
+    text_upper = text.upper()
+    return any(word in text_upper for word in SELECTOR_INDICATORS)
+
+
+def content_score(text):
+    """Pontuação de um elemento na busca ampla; None se curto demais para concorrer"""
+    if not text or len(text) <= SCORE_MIN_LENGTH:
+        return None
+    text_upper = text.upper()
+    score = sum(1 for indicator in SCORE_INDICATORS if indicator in text_upper)
+    return score - NAV_PENALTY * sum(1 for indicator in NAV_INDICATORS if indicator in text_upper)
+
+
+def find_catalog_content(select, candidates, text_of):
+    """Elemento com o normativo na página do catálogo, ou None.
+
+    select(seletor) lista os elementos de um seletor CSS, candidates() todos
+    os elementos da busca ampla e text_of(elemento) o texto visível: o mesmo
+    algoritmo roda sobre o WebDriver e sobre o BeautifulSoup.
+    """
+    for selector in CATALOG_SELECTORS:
+        for element in select(selector):
+            if selector_match(text_of(element)):
+                return element
+
+    best_element = None
+    best_score = 0
+    for element in candidates():
+        score = content_score(text_of(element))
+        if score is not None and score > best_score:
+            best_score = score
+            best_element = element
+    return best_element
+
+
+def find_url_content(select_one, text_of, body):
+    """Elemento do primeiro seletor de URL_SELECTORS com texto; sem nenhum, body()"""
+    for selector in URL_SELECTORS:
+        element = select_one(selector)
+        if element is not None and text_of(element).strip():
+            return element
+    return body()
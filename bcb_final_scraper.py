@@ -1,6 +1,6 @@
 import pandas as pd
-import requests
 from bs4 import BeautifulSoup
+import sys
 import time
 import os
 import re
@@ -16,6 +16,19 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
 from datetime import datetime
+from bcb_output_writer import AtomicOutputWriter
+from bcb_http import shared_client
+from bcb_history import HistoryStore
+from bcb_boilerplate import BoilerplateModel
+from bcb_postprocess import PostProcessingPipeline, default_workers, url_filename
+from bcb_extraction import find_url_content
+from bcb_snapshots import SnapshotCache
+from bcb_network_capture import PayloadCapture, enable_performance_log
+from bcb_tabs import TabRotation
+from bcb_recycling import BrowserRecycler, BrowserRestartError
+from bcb_changes import ChangeDetector
+from bcb_identity import canonical_key, display_numero
+from bcb_dashboard import Dashboard, EventStream, worker_name
 
 # Configuração de logging
 logging.basicConfig(
@@ -28,16 +41,37 @@ logging.basicConfig(
 )
 
 class BCBFinalScraper:
-    def __init__(self, csv_file='normativos_spb_bcb.csv', output_dir='normativos_txt', debug=False):
+    def __init__(self, csv_file='normativos_spb_bcb.csv', output_dir='normativos_txt', debug=False, backend=None):
         self.csv_file = csv_file
+        # 'selenium' (chromedriver) ou 'cdp' (websocket direto com o Chrome)
+        self.backend = backend or os.environ.get('BCB_DRIVER_BACKEND', 'selenium')
         self.output_dir = output_dir
         self.debug = debug
         self.driver = None
+        # Captura da resposta da API (recriada com o driver) e normativo da página atual
+        self.capture = None
+        self.last_payload = None
         self.wait = None
         
         # Criar diretório de saída
         Path(self.output_dir).mkdir(parents=True, exist_ok=True)
         Path(f"{self.output_dir}/normativos_pdf").mkdir(parents=True, exist_ok=True)
+        self.writer = AtomicOutputWriter(self.output_dir)
+        # Cache HTTP em disco, compartilhado com os outros scripts
+        self.http = shared_client()
+        self.history = HistoryStore()
+        self.boilerplate = BoilerplateModel()
+        if not self.boilerplate.n_docs:
+            # Sem modelo salvo: treinar com a saída existente antes de buscar
+            self.boilerplate.learn_directory(self.output_dir)
+        # Mudanças por artigo entre uma busca e a seguinte
+        self.changes = ChangeDetector()
+        self.pipeline = PostProcessingPipeline(self.writer, self.history, self.boilerplate, changes=self.changes)
+        self.snapshots = SnapshotCache()
+        # Eventos para o painel de progresso; o worker é o processo (ou a aba, na rotação)
+        self.events = EventStream()
+        self.worker = worker_name()
+        self.dashboard = None
         
         # Configurar Selenium WebDriver
         self._setup_driver(headless=not debug)
@@ -66,16 +100,24 @@ class BCBFinalScraper:
                 "profile.default_content_setting_values.notifications": 2
             }
             chrome_options.add_experimental_option("prefs", prefs)
+            # Eventos de rede no log do chromedriver, para capturar a resposta da API
+            enable_performance_log(chrome_options)
             
             # Inicializar o driver
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            if self.backend == 'cdp':
+                from bcb_cdp import CDPDriver
+                self.driver = CDPDriver.from_options(chrome_options)
+                self.driver.add_script_on_new_document("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            else:
+                service = Service(ChromeDriverManager().install())
+                self.driver = webdriver.Chrome(service=service, options=chrome_options)
             
             # Executar script para remover propriedades de automação
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             
             # Configurar timeout
             self.wait = WebDriverWait(self.driver, 20)
+            self.capture = PayloadCapture(self.driver)
             
             logging.info("WebDriver configurado com sucesso")
             
@@ -88,9 +130,15 @@ class BCBFinalScraper:
         try:
             logging.info(f"Acessando documento: {document_url}")
             
-            # Navegar para a URL do documento
+            # Navegar para a URL do documento, capturando as respostas da API de conteúdo
+            self.capture.start()
             self.driver.get(document_url)
-            time.sleep(3)
+            if self.capture.available:
+                # Segue assim que o normativo chega pela rede (no máximo a pausa fixa de antes)
+                self.last_payload = self.capture.wait(3)
+            else:
+                self.last_payload = None
+                time.sleep(3)
             
             if self.debug:
                 logging.info(f"Página carregada: {self.driver.title}")
@@ -107,59 +155,42 @@ class BCBFinalScraper:
             logging.error(f"Erro ao acessar documento {document_type} {document_number}: {e}")
             return False
 
-    def scrape_document_content(self, document_type, document_number, document_date):
-        """Extrai o conteúdo do documento carregado"""
+    def _select_one(self, selector):
+        """Primeiro elemento do seletor CSS, ou None"""
+        try:
+            return self.driver.find_element(By.CSS_SELECTOR, selector)
+        except NoSuchElementException:
+            return None
+
+    def scrape_document_content(self, document_type, document_number, document_date, settle=2):
+        """Extrai o conteúdo do documento carregado (settle: segundos para o conteúdo dinâmico)"""
         try:
+            if self.last_payload:
+                return self._save_payload(document_type, document_number, document_date, self.last_payload)
+
             # Aguardar o conteúdo do documento carregar
-            time.sleep(2)
-            
-            # Tentar diferentes seletores para o conteúdo do documento
-            content_selectors = [
-                ".documento-conteudo",
-                ".normativo-conteudo", 
-                ".conteudo-documento",
-                ".document-content",
-                "#conteudo",
-                ".main-content",
-                "main",
-                ".container .row",
-                ".row .col-md-12",
-                ".row .col-lg-12",
-                ".row .col-sm-12"
-            ]
+            time.sleep(settle)
             
-            content_element = None
-            for selector in content_selectors:
-                try:
-                    content_element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    if content_element and content_element.text.strip():
-                        break
-                except NoSuchElementException:
-                    continue
-            
-            if not content_element:
-                # Se não encontrar conteúdo específico, usar o body
-                content_element = self.driver.find_element(By.TAG_NAME, "body")
+            # Mesmos seletores da reextração dos snapshots (bcb_extraction)
+            content_element = find_url_content(self._select_one, lambda element: element.text,
+                                               lambda: self.driver.find_element(By.TAG_NAME, "body"))
             
             # Extrair texto
             content_text = content_element.text
+            self.snapshots.put(self.driver.current_url, self.driver.page_source, layout='url',
+                               tipo=document_type, numero=str(document_number), data=document_date)
             
             if not content_text.strip():
                 logging.warning(f"Conteúdo vazio para {document_type} {document_number}")
                 return None
             
-            # Salvar como arquivo de texto
-            filename = f"{document_type.replace(' ', '_')}_{document_number}_{document_date.replace('/', '_')}.txt"
-            filepath = os.path.join(self.output_dir, filename)
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(f"Tipo: {document_type}\n")
-                f.write(f"Número: {document_number}\n")
-                f.write(f"Data: {document_date}\n")
-                f.write(f"URL: {self.driver.current_url}\n")
-                f.write("="*80 + "\n\n")
-                f.write(content_text)
-            
+            # Boilerplate, nome, cabeçalho, hash e gravação ficam no estágio de pós-processamento
+            if not self.pipeline.submit('url', document_type, document_number, content_text,
+                                        data=document_date, url=self.driver.current_url,
+                                        boilerplate=True):
+                return None
+            filepath = os.path.join(self.output_dir, url_filename(document_type, document_number, document_date))
+
             logging.info(f"Conteúdo salvo: {filepath}")
             
             # Tentar baixar PDF se disponível
@@ -171,6 +202,24 @@ class BCBFinalScraper:
             logging.error(f"Erro ao extrair conteúdo do documento {document_type} {document_number}: {e}")
             return None
 
+    def _save_payload(self, document_type, document_number, document_date, payload):
+        """Grava o normativo capturado da API, sem esperar a renderização da página"""
+        # Data do catálogo; a da API só quando o catálogo não tem
+        document_date = document_date or payload.get('data')
+        fields = {key: value for key, value in payload.items() if key not in ('html', 'texto', 'url')}
+        self.snapshots.put(self.driver.current_url, payload['html'], layout='url', tipo=document_type,
+                           numero=str(document_number), data=document_date, campos=fields)
+        logging.info(f"Normativo capturado da rede: {payload['url']}")
+
+        if not self.pipeline.submit('url', document_type, document_number, payload['texto'],
+                                    data=document_date, url=self.driver.current_url, boilerplate=True):
+            return None
+        filepath = os.path.join(self.output_dir, url_filename(document_type, document_number, document_date))
+        logging.info(f"Conteúdo salvo: {filepath}")
+
+        self._download_pdf(document_type, document_number, document_date)
+        return filepath
+
     def _download_pdf(self, document_type, document_number, document_date):
         """Tenta baixar o PDF do documento"""
         try:
@@ -181,13 +230,11 @@ class BCBFinalScraper:
                 href = link.get_attribute('href')
                 if href and '.pdf' in href.lower():
                     # Baixar o PDF
-                    response = requests.get(href, timeout=30)
+                    response = self.http.get(href, timeout=30)
                     if response.status_code == 200:
                         pdf_filename = f"{document_type.replace(' ', '_')}_{document_number}_{document_date.replace('/', '_')}.pdf"
-                        pdf_filepath = os.path.join(self.output_dir, "normativos_pdf", pdf_filename)
-                        
-                        with open(pdf_filepath, 'wb') as f:
-                            f.write(response.content)
+                        pdf_filepath = self.writer.write(os.path.join("normativos_pdf", pdf_filename),
+                                                         response.content, binary=True)
                         
                         logging.info(f"PDF baixado: {pdf_filepath}")
                         break
@@ -195,11 +242,19 @@ class BCBFinalScraper:
         except Exception as e:
             logging.warning(f"Erro ao baixar PDF para {document_type} {document_number}: {e}")
 
-    def process_documents(self, max_documents=None):
-        """Processa todos os documentos do CSV"""
+    def process_documents(self, max_documents=None, tabs=1, recycle_every=500, max_rss_mb=2048,
+                          dashboard_port=None):
+        """Processa todos os documentos do CSV (tabs > 1: várias abas do mesmo Chrome, backend cdp)
+
+        Com uma aba, o navegador é reiniciado a cada recycle_every documentos
+        ou acima de max_rss_mb de RSS (0 desliga cada limite). Com
+        dashboard_port, o progresso fica em http://127.0.0.1:<porta>/.
+        """
         try:
-            # Ler o CSV
-            df = pd.read_csv(self.csv_file)
+            # Ler o CSV como texto: lido como float, 429 viraria '429.0' no nome do arquivo;
+            # o número segue a forma do BCB ('4.282'), como nos outros scrapers
+            df = pd.read_csv(self.csv_file, dtype=str, keep_default_na=False)
+            df['numero'] = df['numero'].map(display_numero)
             
             if max_documents:
                 df = df.head(max_documents)
@@ -209,45 +264,143 @@ class BCBFinalScraper:
             failed_docs = 0
             
             logging.info(f"Iniciando processamento de {total_docs} documentos")
+            if tabs > 1 and self.backend != 'cdp':
+                logging.warning("Várias abas exigem o backend cdp; seguindo com uma aba")
+                tabs = 1
+
+            # Pós-processamento em processos separados enquanto o navegador busca o próximo
+            self.pipeline = PostProcessingPipeline(self.writer, self.history, self.boilerplate,
+                                                   workers=default_workers(), changes=self.changes)
             
-            for index, row in df.iterrows():
-                try:
-                    document_type = row['tipo']
-                    document_number = row['numero']
-                    document_date = row['data']
-                    document_url = row['url_bcb']
+            recycler = BrowserRecycler(max_documents=recycle_every, max_rss_mb=max_rss_mb)
+            self.dashboard = Dashboard(self.events, port=dashboard_port, total=total_docs)
+            self.dashboard.gauge('pós-processamento', self.pipeline.pending)
+            self.dashboard.start()
+            if tabs > 1:
+                successful_docs, failed_docs = self._process_with_tabs(df, tabs)
+            else:
+                for index, row in df.iterrows():
+                    try:
+                        document_type = row['tipo']
+                        document_number = row['numero']
+                        document_date = row['data']
+                        document_url = row['url_bcb']
                     
-                    logging.info(f"Processando {index + 1}/{total_docs}: {document_type} {document_number}")
+                        logging.info(f"Processando {index + 1}/{total_docs}: {document_type} {document_number}")
+                        key = canonical_key(document_type, document_number)
+                        self.events.emit('inicio', id=key, documento=f"{document_type} {document_number}",
+                                         worker=self.worker, etapa='carregando')
+                        ok = False
                     
-                    # Acessar o documento usando URL do CSV
-                    if self.access_document(document_url, document_type, document_number):
-                        # Extrair conteúdo
-                        result = self.scrape_document_content(document_type, document_number, document_date)
-                        if result:
-                            successful_docs += 1
-                            logging.info(f"✓ Documento processado com sucesso: {document_type} {document_number}")
-                        else:
-                            failed_docs += 1
-                            logging.error(f"✗ Falha ao extrair conteúdo: {document_type} {document_number}")
-                    else:
-                        failed_docs += 1
-                        logging.error(f"✗ Falha ao acessar documento: {document_type} {document_number}")
+                        # Acessar o documento usando URL do CSV
+                        try:
+                            if self.access_document(document_url, document_type, document_number):
+                                self.events.emit('etapa', id=key, etapa='extraindo')
+                                # Extrair conteúdo
+                                result = self.scrape_document_content(document_type, document_number, document_date)
+                                ok = bool(result)
+                                if result:
+                                    successful_docs += 1
+                                    logging.info(f"✓ Documento processado com sucesso: {document_type} {document_number}")
+                                else:
+                                    failed_docs += 1
+                                    logging.error(f"✗ Falha ao extrair conteúdo: {document_type} {document_number}")
+                            else:
+                                failed_docs += 1
+                                logging.error(f"✗ Falha ao acessar documento: {document_type} {document_number}")
+                        finally:
+                            self.events.emit('fim', id=key, ok=ok)
                     
-                    # Pausa entre requisições para evitar bloqueio
-                    time.sleep(2)
+                        # Reinício entre documentos: a próxima linha continua no navegador novo
+                        recycler.maybe_recycle(self.driver, self._restart_driver)
+
+                        # Pausa entre requisições para evitar bloqueio
+                        time.sleep(2)
                     
-                except Exception as e:
-                    failed_docs += 1
-                    logging.error(f"Erro ao processar documento {index + 1}: {e}")
-                    continue
+                    except BrowserRestartError:
+                        # Sem navegador não há como seguir: o documento já foi contado
+                        raise
+                    except Exception as e:
+                        failed_docs += 1
+                        logging.error(f"Erro ao processar documento {index + 1}: {e}")
+                        continue
             
+            utilization = self.pipeline.close()
+            successful_docs -= self.pipeline.results['failed']
+            failed_docs += self.pipeline.results['failed']
+
             logging.info(f"Processamento concluído. Sucessos: {successful_docs}, Falhas: {failed_docs}")
+            memory = recycler.summary()
+            logging.info(f"Reinícios do navegador: {memory['reinicios']} (pico: navegador "
+                         f"{memory['pico_navegador_mb']:.0f} MB, driver {memory['pico_driver_mb']:.0f} MB)")
+            self.pipeline.print_report(utilization)
+            self.http.print_report()
             
         except Exception as e:
             logging.error(f"Erro no processamento geral: {e}")
 
+    def _restart_driver(self):
+        """Fecha e abre o navegador, para o BrowserRecycler"""
+        if self.driver:
+            self.driver.quit()
+            self.driver = None
+        self._setup_driver(headless=not self.debug)
+        return self.driver
+
+    def _setup_tab(self, tab):
+        """Scripts anti-detecção em uma aba nova da rotação"""
+        tab.add_script_on_new_document("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+    def _process_with_tabs(self, df, tabs):
+        """Reveza os documentos entre abas do mesmo Chrome; devolve (sucessos, falhas)"""
+        total_docs = len(df)
+        successful_docs = 0
+        failed_docs = 0
+        main_driver, main_capture = self.driver, self.capture
+        rotation = TabRotation(self.driver, tabs, setup=self._setup_tab, events=self.events,
+                               describe=lambda row: f"{row['tipo']} {row['numero']}")
+        logging.info(f"Rotação com {tabs} abas")
+
+        def extract(slot):
+            row = slot.item
+            # A extração usa self.driver/self.capture: apontar para a aba da vez
+            self.driver, self.capture = slot.driver, slot.capture
+            if "exibenormativo" not in self.driver.current_url:
+                logging.warning(f"URL não funcionou: {self.driver.current_url}")
+                return None
+            # Mesmas esperas da aba única (3s pela API, depois 2s pelo DOM) contadas a partir
+            # da carga: o tempo que a aba esperou enquanto as outras eram lidas já conta
+            self.last_payload = slot.capture.wait(max(slot.loaded_at + 3 - time.monotonic(), 0))
+            settle = max(slot.loaded_at + 5 - time.monotonic(), 0)
+            return self.scrape_document_content(row['tipo'], row['numero'], row['data'], settle=settle)
+
+        try:
+            rows = (row for _, row in df.iterrows())
+            for position, (row, result) in enumerate(rotation.run(rows, lambda row: row['url_bcb'], extract), 1):
+                if result:
+                    successful_docs += 1
+                    logging.info(f"✓ {position}/{total_docs}: {row['tipo']} {row['numero']}")
+                else:
+                    failed_docs += 1
+                    logging.error(f"✗ {position}/{total_docs}: {row['tipo']} {row['numero']}")
+        finally:
+            self.driver, self.capture = main_driver, main_capture
+            rotation.close()
+
+        stats = rotation.stats()
+        logging.info(f"Rotação: {stats['abas']} abas, {stats['docs_por_minuto']:.1f} docs/min, "
+                     f"RSS médio {stats['rss_medio_mb'] or 0:.0f} MB, pico {stats['rss_pico_mb'] or 0:.0f} MB")
+        return successful_docs, failed_docs
+
     def close(self):
         """Fecha o driver"""
+        self.pipeline.close()
+        self.snapshots.evict()
+        self.writer.close()
+        self.http.close()
+        self.boilerplate.save()
+        if self.dashboard is not None:
+            self.dashboard.stop()
         if self.driver:
             self.driver.quit()
             logging.info("WebDriver fechado")
@@ -259,8 +412,10 @@ def main():
         # Criar instância do scraper
         scraper = BCBFinalScraper(debug=False)
         
-        # Processar todos os documentos
-        scraper.process_documents()
+        # Processar todos os documentos (argumentos opcionais: número de abas, backend cdp; porta do painel)
+        tabs = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+        dashboard_port = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        scraper.process_documents(tabs=tabs, dashboard_port=dashboard_port)
         
     except KeyboardInterrupt:
         logging.info("Processamento interrompido pelo usuário")
@@ -0,0 +1,270 @@
+import os
+import re
+import sys
+import json
+import math
+import bisect
+import difflib
+import hashlib
+import logging
+from pathlib import Path
+from datetime import datetime
+
+from bcb_identity import canonical_key
+from bcb_storage import parse_document
+
+
+class HistoryStore:
+    """Histórico de versões de cada normativo, gravado como deltas de linhas"""
+
+    def __init__(self, history_dir='normativos_history', max_chain=50):
+        self.history_dir = history_dir
+        self.max_chain = max_chain
+
+        # Cache em memória: chave -> registros já lidos do log
+        self._records = {}
+        self._latest_text = {}
+
+        Path(self.history_dir).mkdir(parents=True, exist_ok=True)
+
+    def _log_path(self, key):
+        """Arquivo de log (JSON lines) de um documento"""
+        return os.path.join(self.history_dir, re.sub(r'[^A-Za-z0-9]+', '_', key).strip('_') + '.jsonl')
+
+    def _load(self, key):
+        """Lê o log do documento uma única vez e monta o índice de versões"""
+        if key in self._records:
+            return self._records[key]
+
+        records = {'versions': [], 'fetches': []}
+        path = self._log_path(key)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Última linha truncada por uma interrupção
+                        logging.warning(f"Registro inválido ignorado em {path}")
+                        continue
+                    if record['type'] == 'version':
+                        records['versions'].append(record)
+                    records['fetches'].append((record['fetched_at'], record['version']))
+
+        # O log segue a ordem de gravação; reextrações e importações podem
+        # registrar buscas antigas depois das novas
+        records['fetches'].sort(key=lambda fetch: fetch[0])
+        self._records[key] = records
+        return records
+
+    def _append(self, key, record):
+        """Acrescenta um registro ao log do documento"""
+        with open(self._log_path(key), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _make_delta(old_lines, new_lines):
+        """Delta de linhas: ['=', i1, i2] copia do anterior, ['+', linhas] insere"""
+        ops = []
+        matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                ops.append(['=', i1, i2])
+            elif tag in ('replace', 'insert'):
+                ops.append(['+', new_lines[j1:j2]])
+        return ops
+
+    @staticmethod
+    def _apply_delta(old_lines, ops):
+        """Reconstrói as linhas da nova versão a partir do delta"""
+        new_lines = []
+        for op in ops:
+            if op[0] == '=':
+                new_lines.extend(old_lines[op[1]:op[2]])
+            else:
+                new_lines.extend(op[1])
+        return new_lines
+
+    @staticmethod
+    def _fetch_position(fetches, when):
+        """Posição de when nas buscas ordenadas (depois das buscas no mesmo instante)"""
+        return bisect.bisect_right(fetches, (when, math.inf))
+
+    def record(self, tipo, numero, text, fetched_at=None):
+        """Registra uma busca; só grava delta se o texto mudou
+
+        fetched_at pode ser anterior às buscas já registradas (snapshot
+        reextraído, importação): a busca entra na posição da data, e o texto
+        é comparado com as versões vigentes antes e depois dela.
+        """
+        key = canonical_key(tipo, numero)
+        records = self._load(key)
+        versions = records['versions']
+        fetches = records['fetches']
+        fetched_at = fetched_at or datetime.now().isoformat(timespec='seconds')
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+        position = self._fetch_position(fetches, fetched_at)
+        for neighbour in fetches[max(position - 1, 0):position + 1]:
+            if versions[neighbour[1] - 1]['sha256'] == digest:
+                record = {'type': 'fetch', 'version': neighbour[1], 'fetched_at': fetched_at}
+                self._append(key, record)
+                fetches.insert(position, (fetched_at, record['version']))
+                return record['version']
+
+        number = len(versions) + 1
+        new_lines = text.split('\n')
+        record = {'type': 'version', 'version': number, 'fetched_at': fetched_at, 'sha256': digest}
+
+        # Como no revlog do Mercurial: grava o texto completo só quando a cadeia
+        # de deltas desde a última versão-chave ficaria maior que o próprio texto
+        # (ou longa demais), mantendo o armazenamento proporcional às mudanças
+        if versions:
+            previous = versions[-1]
+            delta = self._make_delta(self._text_lines(key, len(versions)), new_lines)
+            delta_bytes = len(json.dumps(delta, ensure_ascii=False).encode('utf-8'))
+            chain_bytes = previous.get('chain_bytes', 0) + delta_bytes
+            chain_length = previous.get('chain_length', 0) + 1
+            if chain_bytes < len(text.encode('utf-8')) and chain_length <= self.max_chain:
+                record.update(delta=delta, chain_bytes=chain_bytes, chain_length=chain_length)
+        if 'delta' not in record:
+            record['full'] = new_lines
+
+        self._append(key, record)
+        versions.append(record)
+        fetches.insert(position, (fetched_at, number))
+        self._latest_text[key] = (number, new_lines)
+
+        logging.info(f"Histórico de {key}: versão {number} registrada")
+        return number
+
+    def _text_lines(self, key, version):
+        """Linhas de uma versão, partindo da versão-chave mais próxima"""
+        cached = self._latest_text.get(key)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        versions = self._load(key)['versions']
+        start = version
+        while 'full' not in versions[start - 1]:
+            start -= 1
+
+        lines = versions[start - 1]['full']
+        for number in range(start + 1, version + 1):
+            lines = self._apply_delta(lines, versions[number - 1]['delta'])
+
+        if version == len(versions):
+            self._latest_text[key] = (version, lines)
+        return lines
+
+    def _current(self, key):
+        """Versão da busca mais recente (a última gravada pode ser de uma busca antiga)"""
+        fetches = self._load(key)['fetches']
+        return fetches[-1][1] if fetches else None
+
+    def versions(self, tipo, numero):
+        """Lista (versão, primeira busca, sha256) de cada versão"""
+        versions = self._load(canonical_key(tipo, numero))['versions']
+        return [(v['version'], v['fetched_at'], v['sha256']) for v in versions]
+
+    def last_fetch(self, tipo, numero):
+        """Data ISO da última busca (ou None), sem carregar os textos no cache"""
+        key = canonical_key(tipo, numero)
+        if key in self._records:
+            fetches = self._records[key]['fetches']
+            return fetches[-1][0] if fetches else None
+        path = self._log_path(key)
+        if not os.path.exists(path):
+            return None
+        # A última linha nem sempre é a busca mais recente (ver record)
+        last = None
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    fetched_at = json.loads(line)['fetched_at']
+                except ValueError:
+                    continue
+                if last is None or fetched_at > last:
+                    last = fetched_at
+        return last
+
+    def get(self, tipo, numero, version=None):
+        """Texto de uma versão (a da busca mais recente por padrão)"""
+        key = canonical_key(tipo, numero)
+        version = version or self._current(key)
+        if not version:
+            return None
+        return '\n'.join(self._text_lines(key, version))
+
+    def as_of(self, tipo, numero, when):
+        """Texto como estava na data/hora informada (ISO ou datetime; só a data vale o dia todo)"""
+        if isinstance(when, datetime):
+            when = when.isoformat(timespec='seconds')
+        elif re.fullmatch(r'\d{4}-\d{2}-\d{2}', when):
+            # '2024-01-15' precede qualquer '2024-01-15T...' na ordem das strings
+            when += 'T23:59:59.999999'
+
+        key = canonical_key(tipo, numero)
+        fetches = self._load(key)['fetches']
+        position = self._fetch_position(fetches, when)
+        if position == 0:
+            return None
+        return '\n'.join(self._text_lines(key, fetches[position - 1][1]))
+
+    def diff(self, tipo, numero, old_version, new_version=None):
+        """Diff unificado entre duas versões"""
+        key = canonical_key(tipo, numero)
+        new_version = new_version or self._current(key)
+        old_lines = self._text_lines(key, old_version)
+        new_lines = self._text_lines(key, new_version)
+        return '\n'.join(difflib.unified_diff(old_lines, new_lines,
+                                              fromfile=f"{key} v{old_version}",
+                                              tofile=f"{key} v{new_version}",
+                                              lineterm=''))
+
+    def import_directory(self, input_dir='normativos_txt'):
+        """Registra os .txt atuais como uma busca (usa o mtime como data)"""
+        recorded = 0
+        # Em ordem de mtime: as versões de um documento ficam numeradas por data
+        files = sorted((filepath.stat().st_mtime, filepath) for filepath in Path(input_dir).glob('*.txt'))
+        for mtime, filepath in files:
+            meta, body = parse_document(filepath.read_text(encoding='utf-8'))
+            if 'tipo' not in meta or 'numero' not in meta:
+                continue
+            fetched_at = datetime.fromtimestamp(mtime).isoformat(timespec='seconds')
+            self.record(meta['tipo'], meta['numero'], body, fetched_at=fetched_at)
+            recorded += 1
+        return recorded
+
+
+def main():
+    """Consulta o histórico: versions|show|asof|diff TIPO NUMERO [args]"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    history = HistoryStore()
+    args = sys.argv[1:]
+
+    if args[:1] == ['import']:
+        print(f"{history.import_directory(*args[1:2])} documentos registrados")
+    elif len(args) >= 3 and args[0] == 'versions':
+        for version, fetched_at, digest in history.versions(args[1], args[2]):
+            print(f"v{version}  {fetched_at}  {digest[:12]}")
+    elif len(args) >= 3 and args[0] == 'show':
+        print(history.get(args[1], args[2], int(args[3]) if len(args) > 3 else None))
+    elif len(args) == 4 and args[0] == 'asof':
+        print(history.as_of(args[1], args[2], args[3]))
+    elif len(args) >= 4 and args[0] == 'diff':
+        print(history.diff(args[1], args[2], int(args[3]), int(args[4]) if len(args) > 4 else None))
+    else:
+        print("Uso: python bcb_history.py import [dir] | versions|show|asof|diff TIPO NUMERO [...]")
+
+
+if __name__ == "__main__":
+    main()
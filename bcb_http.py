@@ -0,0 +1,365 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from email.utils import parsedate_to_datetime
+
+
+DEFAULT_CACHE_DIR = 'http_cache'
+DEFAULT_MAX_BYTES = 512 * 2**20
+# Status que podem ser guardados (404/410: as sondagens de URL de PDF que não existem)
+CACHEABLE_STATUS = (200, 203, 300, 301, 404, 410)
+# Validade de 404/410 sem Cache-Control nem Expires: as mesmas sondagens se repetem a cada execução
+NEGATIVE_TTL = 24 * 3600
+# Teto da validade heurística (10% da idade do Last-Modified)
+HEURISTIC_MAX = 7 * 24 * 3600
+# Cabeçalhos guardados com o corpo (sem content-length: o requests já descomprime o corpo)
+STORED_HEADERS = ('content-type', 'etag', 'last-modified', 'cache-control', 'expires', 'date')
+
+
+def parse_cache_control(value):
+    """Diretivas do Cache-Control: 'max-age=60, no-cache' -> {'max-age': '60', 'no-cache': None}"""
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+
+def _timestamp(value):
+    """Data HTTP em segundos desde a época (None se ausente ou inválida)"""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def freshness_lifetime(headers, status=200):
+    """Segundos em que a resposta pode ser reusada sem consultar o servidor (RFC 9111, seção 4.2)"""
+    directives = parse_cache_control(headers.get('cache-control'))
+    if 'no-cache' in directives:
+        return 0
+    for name in ('s-maxage', 'max-age'):
+        if directives.get(name, '').isdigit():
+            return int(directives[name])
+
+    date = _timestamp(headers.get('date')) or time.time()
+    expires = headers.get('expires')
+    if expires is not None:
+        # Expires inválido (ex.: '0') significa já expirado
+        expires_at = _timestamp(expires)
+        return max(expires_at - date, 0) if expires_at is not None else 0
+
+    if status in (404, 410):
+        return NEGATIVE_TTL
+    last_modified = _timestamp(headers.get('last-modified'))
+    if last_modified is not None and date > last_modified:
+        return min((date - last_modified) / 10, HEURISTIC_MAX)
+    return 0
+
+
+class HTTPResponse:
+    """Resposta (da rede ou do cache) com a interface usada pelos scrapers"""
+
+    def __init__(self, url, status_code, headers, content, from_cache=False):
+        from requests.structures import CaseInsensitiveDict
+
+        self.url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.from_cache = from_cache
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+
+class HTTPClient:
+    """GET com cache de respostas em disco, compartilhado entre execuções e scripts.
+
+    Respeita Cache-Control/Expires: respostas ainda válidas saem do disco
+    sem rede; as vencidas com ETag ou Last-Modified são revalidadas com uma
+    requisição condicional (304 reaproveita o corpo guardado); no-store não é
+    gravado. O cache tem teto de max_bytes e descarta as entradas usadas há
+    mais tempo (LRU). Duas threads pedindo a mesma URL ao mesmo tempo geram
+    uma só requisição.
+    """
+
+    INDEX_NAME = 'index.json'
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, timeout=30, session=None):
+        import requests
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.index_path = os.path.join(cache_dir, self.INDEX_NAME)
+
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        # Entradas por chave, da usada há mais tempo para a mais recente
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self._removed = set()
+        self._dirty = 0
+        self.stats = {'hits': 0, 'revalidados': 0, 'misses': 0, 'deduplicados': 0, 'removidos': 0,
+                      'bytes_economizados': 0, 'bytes_baixados': 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        for key, entry in self._read_index():
+            self.entries[key] = entry
+            self.total_bytes += entry['size']
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _body_path(self, key):
+        return os.path.join(self.cache_dir, key + '.body')
+
+    def _read_index(self):
+        if not os.path.exists(self.index_path):
+            return []
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)['entries']
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Índice do cache HTTP ilegível, começando vazio: {e}")
+            return []
+
+    def get(self, url, timeout=None):
+        """GET pelo cache; requisições iguais em andamento esperam a primeira"""
+        key = self._key(url)
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self.stats['deduplicados'] += 1
+        if not leader:
+            # O corpo veio da requisição de outra thread: também é economia
+            response = future.result()
+            with self._lock:
+                self.stats['bytes_economizados'] += len(response.content)
+            return response
+
+        try:
+            response = self._fetch(url, key, timeout)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def _cached_body(self, key):
+        try:
+            with open(self._body_path(key), 'rb') as f:
+                return f.read()
+        except OSError:
+            # Corpo apagado por fora: a entrada deixa de valer
+            with self._lock:
+                self._drop(key)
+            return None
+
+    def _fetch(self, url, key, timeout):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+
+        request_headers = {}
+        if entry is not None:
+            if time.time() < entry['expires']:
+                body = self._cached_body(key)
+                if body is not None:
+                    self._count('hits', len(body))
+                    return HTTPResponse(entry['url'], entry['status'], entry['headers'], body, from_cache=True)
+                entry = None
+            elif entry['headers'].get('etag') or entry['headers'].get('last-modified'):
+                if entry['headers'].get('etag'):
+                    request_headers['If-None-Match'] = entry['headers']['etag']
+                if entry['headers'].get('last-modified'):
+                    request_headers['If-Modified-Since'] = entry['headers']['last-modified']
+
+        response = self.session.get(url, timeout=timeout or self.timeout, headers=request_headers)
+        if response.status_code == 304 and entry is not None:
+            body = self._cached_body(key)
+            if body is not None:
+                self._count('revalidados', len(body))
+                headers = dict(entry['headers'])
+                headers.update((name.lower(), value) for name, value in response.headers.items()
+                               if name.lower() in STORED_HEADERS)
+                self._store(key, entry['url'], entry['status'], headers, body)
+                return HTTPResponse(entry['url'], entry['status'], headers, body, from_cache=True)
+            # Corpo perdido entre a consulta e o 304: busca de novo sem condição
+            response = self.session.get(url, timeout=timeout or self.timeout)
+
+        with self._lock:
+            self.stats['misses'] += 1
+            self.stats['bytes_baixados'] += len(response.content)
+        headers = {name.lower(): value for name, value in response.headers.items()
+                   if name.lower() in STORED_HEADERS}
+        self._store(key, response.url or url, response.status_code, headers, response.content)
+        return HTTPResponse(response.url or url, response.status_code, response.headers, response.content)
+
+    def _count(self, name, size):
+        with self._lock:
+            self.stats[name] += 1
+            self.stats['bytes_economizados'] += size
+
+    def _store(self, key, url, status, headers, body):
+        """Grava (ou descarta) a resposta conforme o Cache-Control e aplica o teto do cache"""
+        headers = {name.lower(): value for name, value in headers.items()}
+        directives = parse_cache_control(headers.get('cache-control'))
+        lifetime = freshness_lifetime(headers, status)
+        reusable = lifetime > 0 or headers.get('etag') or headers.get('last-modified')
+        if 'no-store' in directives or status not in CACHEABLE_STATUS or not reusable or len(body) > self.max_bytes:
+            with self._lock:
+                self._drop(key)
+            return
+
+        path = self._body_path(key)
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(body)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous['size']
+            self.entries[key] = {'url': url, 'status': status, 'headers': headers, 'size': len(body),
+                                 'expires': time.time() + lifetime}
+            self.total_bytes += len(body)
+            self._removed.discard(key)
+            self._evict()
+            self._dirty += 1
+            save = self._dirty >= 50
+        if save:
+            self.save()
+
+    def _drop(self, key):
+        """Remove a entrada e o corpo (chamar com o lock)"""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.total_bytes -= entry['size']
+        self._removed.add(key)
+        self._dirty += 1
+        try:
+            os.remove(self._body_path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Descarta as entradas usadas há mais tempo até caber no teto (chamar com o lock)"""
+        while self.total_bytes > self.max_bytes and self.entries:
+            self._drop(next(iter(self.entries)))
+            self.stats['removidos'] += 1
+
+    def save(self):
+        """Grava o índice de forma atômica, somando entradas gravadas por outros processos"""
+        with self._lock:
+            known = set(self.entries)
+            merged = [(key, entry) for key, entry in self._read_index()
+                      if key not in known and key not in self._removed and os.path.exists(self._body_path(key))]
+            for key, entry in reversed(merged):
+                # Entradas de outro processo entram como as menos recentes
+                self.entries[key] = entry
+                self.entries.move_to_end(key, last=False)
+                self.total_bytes += entry['size']
+            self._evict()
+
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'entries': list(self.entries.items())}, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, self.index_path)
+            self._dirty = 0
+
+    def close(self):
+        """Grava o índice se houve mudança"""
+        if self._dirty:
+            self.save()
+
+    def summary(self):
+        """Contadores da execução e tamanho atual do cache"""
+        with self._lock:
+            summary = dict(self.stats)
+            summary.update(entradas=len(self.entries), tamanho_mb=self.total_bytes / 2**20)
+        return summary
+
+    def print_report(self):
+        """Relatório do cache HTTP"""
+        summary = self.summary()
+        requests_total = summary['hits'] + summary['revalidados'] + summary['misses']
+        if not requests_total and not summary['deduplicados']:
+            return
+        print(f"\n=== CACHE HTTP ({summary['entradas']} entradas, {summary['tamanho_mb']:.1f} MB) ===")
+        print(f"Hits: {summary['hits']}, revalidados (304): {summary['revalidados']}, misses: {summary['misses']}, "
+              f"deduplicados: {summary['deduplicados']}")
+        print(f"Economizados: {summary['bytes_economizados'] / 2**20:.1f} MB, "
+              f"baixados: {summary['bytes_baixados'] / 2**20:.1f} MB, removidos pelo teto: {summary['removidos']}")
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_client():
+    """Cliente único do processo: todos os scrapers dividem o cache, os contadores e as requisições em andamento"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = HTTPClient(cache_dir=os.environ.get('BCB_HTTP_CACHE', DEFAULT_CACHE_DIR))
+        return _shared
+
+
+def main():
+    """get URL... | status | limpar"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    client = shared_client()
+    if command == 'get' and len(sys.argv) > 2:
+        for url in sys.argv[2:]:
+            response = client.get(url)
+            origin = 'cache' if response.from_cache else 'rede'
+            print(f"{response.status_code} {len(response.content)} bytes ({origin}) {url}")
+        client.close()
+        client.print_report()
+    elif command == 'status':
+        summary = client.summary()
+        print(f"{summary['entradas']} entradas, {summary['tamanho_mb']:.1f} MB "
+              f"(teto {client.max_bytes / 2**20:.0f} MB) em {client.cache_dir}")
+    elif command == 'limpar':
+        with client._lock:
+            for key in list(client.entries):
+                client._drop(key)
+        client.save()
+        print(f"Cache HTTP em {client.cache_dir} esvaziado")
+    else:
+        print("Uso: python bcb_http.py get URL... | status | limpar")
+
+
+if __name__ == "__main__":
+    main()
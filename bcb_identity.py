@@ -0,0 +1,134 @@
+import re
+import sys
+import math
+import unicodedata
+from functools import lru_cache
+from urllib.parse import quote
+
+
+EXIBE_NORMATIVO_URL = 'https://www.bcb.gov.br/estabilidadefinanceira/exibenormativo'
+
+# Tipos conhecidos: forma canônica (chaves e nomes de arquivo) -> nome oficial do BCB (URLs)
+KNOWN_TIPOS = {
+    'Resolucao BCB': 'Resolução BCB',
+    'Resolucao CMN': 'Resolução CMN',
+    'Resolucao Conjunta': 'Resolução Conjunta',
+    'Instrucao Normativa BCB': 'Instrução Normativa BCB',
+    'Circular': 'Circular',
+    'Carta Circular': 'Carta Circular',
+    'Comunicado': 'Comunicado',
+    'Ato Normativo Conjunto': 'Ato Normativo Conjunto',
+}
+
+# Sobra de float no número ('429.0'); qualquer outro ponto é separador de milhar ('4.282')
+_FLOAT_RE = re.compile(r'\d+\.0')
+# Referência por extenso: "Resolução CMN nº 4.282", "Circular n. 3.681", "Resolucao BCB 501"
+_REFERENCE_RE = re.compile(r'^\s*(.+?)\s*(?:\bn(?:[º°o]|\.|ro\.?)\s*)?(\d[\d.]*)\s*$', re.IGNORECASE)
+
+
+def _fold(text):
+    """Sem acentos, sem caixa e com espaços simples: a forma usada na tabela de tipos"""
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.split())
+
+
+# Tabela pré-calculada: variante dobrada (sem acento, minúsculas) -> tipo canônico
+_TIPO_LOOKUP = {}
+for _canonical, _official in KNOWN_TIPOS.items():
+    for _variant in (_canonical, _official):
+        _TIPO_LOOKUP[_fold(_variant).casefold()] = _canonical
+
+# Citações no corpo de um normativo (sobre o texto sem acentos); tipos mais longos primeiro
+_CITATION_RE = re.compile(
+    r'\b(' + '|'.join(re.escape(tipo) for tipo in sorted(KNOWN_TIPOS, key=len, reverse=True)) + r')'
+    r'\s*(?:n(?:[º°o]|\.|ro\.?)\s*)?(\d{1,3}(?:\.\d{3})+|\d+)\b', re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def canonical_tipo(tipo):
+    """Normaliza o tipo do normativo: 'RESOLUÇÃO  bcb' -> 'Resolucao BCB' (desconhecidos só perdem acentos)"""
+    folded = _fold(tipo)
+    return _TIPO_LOOKUP.get(folded.casefold(), folded)
+
+
+def canonical_numero(numero):
+    """Normaliza o número: '429.0' -> '429', '4.282' -> '4282', 4.28 (float do pandas) -> '4280'"""
+    if isinstance(numero, float):
+        if math.isnan(numero):
+            return ''
+        if numero.is_integer():
+            return str(int(numero))
+        # O pandas lê '4.280' como 4.28: o ponto é separador de milhar, então são sempre 3 casas
+        return f"{numero:.3f}".replace('.', '')
+    numero_str = str(numero).strip()
+    if _FLOAT_RE.fullmatch(numero_str):
+        return numero_str[:-2]
+    return numero_str.replace('.', '')
+
+
+@lru_cache(maxsize=65536)
+def _key(tipo, numero):
+    return f"{canonical_tipo(tipo)}|{canonical_numero(numero)}"
+
+
+def canonical_key(tipo, numero):
+    """Chave canônica (tipo, numero) usada em índices, caches e estados"""
+    try:
+        return _key(tipo, numero)
+    except TypeError:
+        # Valor não hashable (ex.: numpy) segue sem o cache
+        return f"{canonical_tipo(str(tipo))}|{canonical_numero(numero)}"
+
+
+def display_numero(numero):
+    """Formata o número como o BCB exibe (separador de milhar com ponto)"""
+    numero_str = canonical_numero(numero)
+    if numero_str.isdigit():
+        return f"{int(numero_str):,}".replace(',', '.')
+    return numero_str
+
+
+def official_tipo(tipo):
+    """Nome do tipo como o BCB usa nas URLs ('Resolucao CMN' -> 'Resolução CMN')"""
+    canonical = canonical_tipo(tipo)
+    return KNOWN_TIPOS.get(canonical, str(tipo).strip())
+
+
+def document_url(tipo, numero):
+    """URL da página exibenormativo, no mesmo formato da coluna url_bcb do catálogo"""
+    return f"{EXIBE_NORMATIVO_URL}?tipo={quote(official_tipo(tipo))}&numero={display_numero(numero)}"
+
+
+def parse_reference(text):
+    """(tipo, numero) canônicos de uma referência por extenso ou None"""
+    match = _REFERENCE_RE.match(str(text).rstrip(' ,;'))
+    if not match:
+        return None
+    numero = canonical_numero(match.group(2).rstrip('.'))
+    return (canonical_tipo(match.group(1).rstrip(' ,')), numero) if numero.isdigit() else None
+
+
+def find_references(text):
+    """Chaves canônicas dos normativos citados no texto (cada uma uma vez, na ordem de aparição)"""
+    keys = {}
+    for match in _CITATION_RE.finditer(_fold(text)):
+        keys.setdefault(canonical_key(match.group(1), match.group(2)), None)
+    return list(keys)
+
+
+def main():
+    """Mostra a chave canônica e a URL de cada referência: "Resolução CMN nº 4.282" ..."""
+    if len(sys.argv) < 2:
+        print('Uso: python bcb_identity.py "Resolução CMN nº 4.282" ...')
+        return
+    for text in sys.argv[1:]:
+        reference = parse_reference(text)
+        if reference is None:
+            print(f"{text}: referência não reconhecida")
+            continue
+        print(f"{text}: {canonical_key(*reference)} {document_url(*reference)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import os
+import sys
+import json
+import bisect
+import logging
+
+from bcb_identity import canonical_key, canonical_tipo
+
+
+# Limites superiores (s) das faixas do histograma, em escala aproximadamente geométrica
+BUCKETS = [0.5, 1, 1.5, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64, 96, 128, 192, 256]
+# Faixas de tamanho do texto carregado (caracteres)
+SIZE_CLASSES = [('pequeno', 20000), ('medio', 100000), ('grande', None)]
+
+
+def size_class(length):
+    """Faixa de tamanho de um texto com length caracteres"""
+    for name, limit in SIZE_CLASSES:
+        if limit is None or length < limit:
+            return name
+
+
+class LoadTimeModel:
+    """Histogramas de tempo de carga por tipo e tamanho; define a espera de cada documento.
+
+    O orçamento é o percentil alto do histograma mais específico com amostras
+    suficientes (tipo+tamanho, depois tipo, depois todos) vezes uma margem.
+    Cargas que estouram o orçamento são contadas à parte: o tempo real é
+    desconhecido, e registrá-las como amostra do próprio orçamento faria cada
+    estouro subir o orçamento seguinte até o teto. Se os estouros passam da
+    fração fora do percentil, o orçamento ganha mais uma margem. Acima de
+    max_samples as contagens são divididas por dois, para o modelo seguir
+    mudanças no site em vez de acumular execuções antigas.
+    """
+
+    def __init__(self, model_file='load_times.json', percentile=0.95, margin=1.5,
+                 floor=5.0, ceiling=180.0, default=60.0, min_samples=5, max_samples=1000):
+        self.model_file = model_file
+        self.percentile = percentile
+        self.margin = margin
+        self.floor = floor
+        self.ceiling = ceiling
+        self.default = default
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+
+        # Contagens por faixa de BUCKETS (a última faixa é "acima de 256 s")
+        self.histograms = {}
+        # Cargas que estouraram o orçamento, por histograma
+        self.timeouts = {}
+        # Último tamanho visto de cada documento, para escolher a faixa antes da carga
+        self.sizes = {}
+        self._load()
+
+    def _load(self):
+        """Carrega o modelo salvo"""
+        if not self.model_file or not os.path.exists(self.model_file):
+            return
+        with open(self.model_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.histograms = data.get('histograms', {})
+        self.timeouts = data.get('timeouts', {})
+        self.sizes = data.get('sizes', {})
+
+    def save(self):
+        """Grava o modelo de forma atômica"""
+        if not self.model_file:
+            return
+        temp_path = self.model_file + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'histograms': self.histograms, 'timeouts': self.timeouts, 'sizes': self.sizes}, f,
+                      ensure_ascii=False)
+        os.replace(temp_path, self.model_file)
+
+    @staticmethod
+    def _keys(tipo, size=None):
+        """Histogramas do mais específico ao mais geral"""
+        tipo = canonical_tipo(tipo)
+        keys = [f"{tipo}|{size_class(size)}"] if size is not None else []
+        return keys + [tipo, '*']
+
+    def _age(self, key):
+        """Divide as contagens de um histograma por dois quando passam de max_samples"""
+        histogram = self.histograms[key]
+        if not self.max_samples or sum(histogram) + self.timeouts.get(key, 0) <= self.max_samples:
+            return
+        self.histograms[key] = [count / 2 for count in histogram]
+        if key in self.timeouts:
+            self.timeouts[key] /= 2
+
+    def record(self, tipo, numero, seconds, size=None):
+        """Registra o tempo até o conteúdo aparecer (size: caracteres carregados)"""
+        if size is not None:
+            self.sizes[canonical_key(tipo, numero)] = size
+        else:
+            size = self.sizes.get(canonical_key(tipo, numero))
+        position = bisect.bisect_left(BUCKETS, seconds)
+        for key in self._keys(tipo, size):
+            histogram = self.histograms.setdefault(key, [0] * (len(BUCKETS) + 1))
+            histogram[position] += 1
+            self._age(key)
+
+    def record_timeout(self, tipo, numero):
+        """Registra uma carga que não terminou dentro do orçamento"""
+        for key in self._keys(tipo, self.sizes.get(canonical_key(tipo, numero))):
+            self.timeouts[key] = self.timeouts.get(key, 0) + 1
+            self.histograms.setdefault(key, [0] * (len(BUCKETS) + 1))
+            self._age(key)
+
+    def _quantile(self, histogram):
+        """Limite superior da faixa onde cai o percentil"""
+        target = self.percentile * sum(histogram)
+        running = 0
+        for position, count in enumerate(histogram):
+            running += count
+            if running >= target:
+                return BUCKETS[position] if position < len(BUCKETS) else self.ceiling
+        return self.ceiling
+
+    def _budget(self, key):
+        """Orçamento de um histograma, ou None sem amostras suficientes"""
+        histogram = self.histograms.get(key)
+        completed = sum(histogram) if histogram else 0
+        timeouts = self.timeouts.get(key, 0)
+        if not completed or completed + timeouts < self.min_samples:
+            return None
+        seconds = self._quantile(histogram) * self.margin
+        if timeouts / (completed + timeouts) > 1 - self.percentile:
+            # O percentil real passa do que foi visto completar
+            seconds *= self.margin
+        return min(max(seconds, self.floor), self.ceiling)
+
+    def budget(self, tipo, numero):
+        """Segundos de espera para o documento carregar"""
+        size = self.sizes.get(canonical_key(tipo, numero))
+        for key in self._keys(tipo, size):
+            seconds = self._budget(key)
+            if seconds is not None:
+                return seconds
+        return self.default
+
+    def summary(self):
+        """Amostras, estouros e orçamento de cada histograma"""
+        report = {}
+        for key, histogram in sorted(self.histograms.items()):
+            seconds = self._budget(key)
+            report[key] = {'amostras': sum(histogram), 'estouros': self.timeouts.get(key, 0),
+                           'orcamento': seconds if seconds is not None else self.default}
+        return report
+
+
+def main():
+    """Mostra os histogramas e orçamentos aprendidos"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    model = LoadTimeModel(sys.argv[1] if len(sys.argv) > 1 else 'load_times.json')
+    for key, numbers in model.summary().items():
+        print(f"{key:40} {numbers['amostras']:8.0f} amostras, {numbers['estouros']:6.0f} estouros, "
+              f"espera {numbers['orcamento']:6.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import re
+import sys
+import json
+import time
+import queue
+import base64
+import logging
+import unicodedata
+from concurrent.futures import Future
+
+from selenium.common.exceptions import WebDriverException
+
+
+# Respostas da API de conteúdo com o normativo (a página exibenormativo só monta o HTML a partir delas)
+PAYLOAD_URL_RE = re.compile(r'/api/.*normativo', re.IGNORECASE)
+# Campos estruturados mantidos do JSON (chaves comparadas sem acento e sem caixa)
+PAYLOAD_FIELDS = ['tipo', 'numero', 'data', 'assunto', 'titulo', 'responsavel', 'revogado', 'cancelado']
+
+_ISO_DATE_RE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})')
+
+
+def _field_name(key):
+    """Chave do JSON sem acento e em minúsculas ('Número' -> 'numero')"""
+    decomposed = unicodedata.normalize('NFKD', str(key))
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def _format_date(value):
+    """Data ISO da API no formato d/m/aaaa do catálogo"""
+    match = _ISO_DATE_RE.match(str(value))
+    if match:
+        year, month, day = match.groups()
+        return f"{day}/{month}/{year}"
+    return value
+
+
+def html_text(html):
+    """Texto de um fragmento HTML com quebras de linha entre blocos (como o .text do Selenium)"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    for element in soup(['script', 'style', 'noscript']):
+        element.decompose()
+    return '\n'.join(line.strip() for line in soup.get_text('\n').split('\n') if line.strip())
+
+
+def _find_record(value):
+    """Primeiro objeto do JSON que traz o texto do normativo"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if _field_name(key) == 'texto' and isinstance(item, str) and item.strip():
+                return value
+        value = list(value.values())
+    if isinstance(value, list):
+        for item in value:
+            record = _find_record(item)
+            if record is not None:
+                return record
+    return None
+
+
+def parse_payload(body, mime_type=''):
+    """Normativo de uma resposta da API (JSON ou HTML); devolve campos + html + texto ou None"""
+    stripped = body.lstrip()
+    if 'json' in mime_type or stripped.startswith(('{', '[')):
+        try:
+            record = _find_record(json.loads(body))
+        except ValueError:
+            return None
+        if record is None:
+            return None
+        fields = {}
+        for key, item in record.items():
+            name = _field_name(key)
+            if name in PAYLOAD_FIELDS and item is not None:
+                fields[name] = _format_date(item) if name == 'data' else item
+            elif name == 'texto':
+                fields['html'] = item
+    elif stripped.startswith('<'):
+        fields = {'html': body}
+    else:
+        return None
+
+    fields['texto'] = html_text(fields['html'])
+    return fields if fields['texto'] else None
+
+
+class PayloadCapture:
+    """Captura no tráfego da aba a resposta da API com o normativo.
+
+    Com o CDPDriver assina Network.responseReceived/loadingFinished e pede o
+    corpo com Network.getResponseBody assim que a resposta termina; com o
+    webdriver.Chrome lê os mesmos eventos do log 'performance' (ver
+    enable_performance_log) e busca o corpo com execute_cdp_cmd. Sem nenhum
+    dos dois, poll devolve sempre None e o scraper segue pelo DOM.
+    """
+
+    def __init__(self, driver, url_pattern=PAYLOAD_URL_RE):
+        self.driver = driver
+        self.url_pattern = url_pattern
+        self.events = hasattr(driver, 'on')
+        self.available = self.events or hasattr(driver, 'get_log')
+        # Corpos recebidos: ((url, mime), Future do Network.getResponseBody)
+        self.bodies = queue.Queue()
+        # Respostas da API ainda carregando, por requestId
+        self._pending = {}
+        self._handles = []
+
+    def start(self):
+        """Começa a capturar (chamar antes do driver.get); descarta o que veio antes"""
+        self._pending.clear()
+        while not self.bodies.empty():
+            self.bodies.get_nowait()
+        if not self.available:
+            return
+        if self.events:
+            if not self._handles:
+                self._handles = [self.driver.on('Network.responseReceived', self._on_response),
+                                 self.driver.on('Network.loadingFinished', self._on_finished)]
+            return
+        try:
+            self.driver.get_log('performance')
+        except WebDriverException:
+            logging.info("Log 'performance' indisponível; o conteúdo será lido do DOM")
+            self.available = False
+
+    def stop(self):
+        """Cancela a assinatura dos eventos"""
+        for handle in self._handles:
+            self.driver.off(handle)
+        self._handles = []
+
+    def _on_response(self, params):
+        response = params.get('response', {})
+        if response.get('status') == 200 and self.url_pattern.search(response.get('url', '')):
+            self._pending[params['requestId']] = (response['url'], response.get('mimeType', ''))
+
+    def _on_finished(self, params):
+        # Roda na thread do websocket: só send (assíncrono), nunca call
+        entry = self._pending.pop(params['requestId'], None)
+        if entry is not None:
+            future = self.driver.send('Network.getResponseBody', {'requestId': params['requestId']})
+            future.add_done_callback(lambda done: self.bodies.put((entry, done)))
+
+    def _poll_log(self):
+        """Eventos de rede acumulados no log 'performance' do chromedriver"""
+        for log_entry in self.driver.get_log('performance'):
+            message = json.loads(log_entry['message'])['message']
+            if message['method'] == 'Network.responseReceived':
+                self._on_response(message['params'])
+            elif message['method'] == 'Network.loadingFinished':
+                entry = self._pending.pop(message['params']['requestId'], None)
+                if entry is None:
+                    continue
+                future = Future()
+                try:
+                    future.set_result(self.driver.execute_cdp_cmd(
+                        'Network.getResponseBody', {'requestId': message['params']['requestId']}))
+                except WebDriverException as e:
+                    future.set_exception(e)
+                self.bodies.put((entry, future))
+
+    def poll(self):
+        """Normativo já recebido (dict de parse_payload) ou None, sem bloquear"""
+        if not self.available:
+            return None
+        if not self.events:
+            try:
+                self._poll_log()
+            except WebDriverException as e:
+                logging.debug(f"Falha ao ler o log de rede: {e}")
+                return None
+
+        while True:
+            try:
+                (url, mime_type), future = self.bodies.get_nowait()
+            except queue.Empty:
+                return None
+            try:
+                result = future.result()
+            except Exception as e:
+                # Corpo descartado pelo navegador (ex.: navegação seguinte); espera a próxima resposta
+                logging.debug(f"Corpo da resposta indisponível ({url}): {e}")
+                continue
+            body = result.get('body', '')
+            if result.get('base64Encoded'):
+                body = base64.b64decode(body).decode('utf-8', errors='replace')
+            payload = parse_payload(body, mime_type)
+            if payload:
+                payload['url'] = url
+                return payload
+
+    def wait(self, timeout):
+        """Espera até timeout segundos pelo normativo"""
+        deadline = time.monotonic() + timeout
+        while True:
+            payload = self.poll()
+            if payload or time.monotonic() >= deadline:
+                return payload
+            time.sleep(0.1)
+
+
+def enable_performance_log(chrome_options):
+    """Liga o log 'performance' do chromedriver (eventos Network.* para o PayloadCapture)"""
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def main():
+    """Mostra os campos e o início do texto de uma resposta da API salva em arquivo"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if len(sys.argv) < 2:
+        print("Uso: python bcb_network_capture.py resposta.json")
+        return
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        payload = parse_payload(f.read())
+    if payload is None:
+        print("Nenhum normativo encontrado na resposta")
+        return
+    for field in PAYLOAD_FIELDS:
+        if field in payload:
+            print(f"{field}: {payload[field]}")
+    print(payload['texto'][:500])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import subprocess
+
+# bcb-normas: ponto de entrada único (scrape, retry, index, export, status e relatórios).
+# Só stdlib no topo: pandas, selenium, bs4, requests e pyarrow são importados
+# dentro do subcomando que precisa deles, para que --help e status respondam
+# rápido e o comando rode em cron sem prompts.
+
+# Tempo máximo de partida a frio do "--help" (mediana, em ms)
+STARTUP_BUDGET_MS = 150
+# Módulos que não podem ser carregados só para montar a CLI
+HEAVY_MODULES = ['pandas', 'numpy', 'selenium', 'webdriver_manager', 'bs4', 'requests', 'pyarrow', 'redis', 'pypdf']
+
+
+def _setup_logging():
+    """Logging dos subcomandos leves (os scrapers configuram o próprio log em arquivo)"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def cmd_scrape(args):
+    """Baixa os normativos do catálogo com o BCBNormativesScraperFinal"""
+    from bcb_normas_scraper import BCBNormativesScraperFinal
+    from bcb_scheduler import parse_pin
+
+    if not os.path.exists(args.csv):
+        print(f"ERRO: Arquivo {args.csv} não encontrado!")
+        return 1
+    try:
+        pins = [parse_pin(pin) for pin in args.fixar]
+    except ValueError as e:
+        print(f"ERRO: {e}")
+        return 1
+    scraper = BCBNormativesScraperFinal(csv_file=args.csv, output_dir=args.saida, backend=args.backend)
+    if args.adotar_existentes:
+        # .txt de antes do manifesto só contam como baixados depois de adotados
+        scraper.writer.adopt_existing()
+    try:
+        scraper.run_scraper(delay=args.delay, refresh=args.refresh, workers=args.processos,
+                            recycle_every=args.reciclar, max_rss_mb=args.memoria_max, pins=pins,
+                            follow_citations=args.seguir_citacoes, max_minutes=args.tempo_max,
+                            dashboard_port=args.painel)
+    except Exception as e:
+        # O finally de run_scraper já fechou o driver
+        logging.error(f"Erro durante a execução: {e}")
+        return 1
+    return 0
+
+
+def cmd_retry(args):
+    """Reprocessa documentos que falharam (os informados ou a lista padrão)"""
+    from retry_failed_documents import RetryFailedDocuments
+
+    if len(args.documentos) % 2:
+        print("ERRO: informe pares TIPO NUMERO")
+        return 2
+    documents = list(zip(args.documentos[::2], args.documentos[1::2])) or None
+
+    scraper = None
+    try:
+        scraper = RetryFailedDocuments(output_dir=args.saida, debug=args.debug, csv_file=args.csv)
+        scraper.process_failed_documents(documents)
+    except KeyboardInterrupt:
+        logging.info("Reprocessamento interrompido pelo usuário")
+    finally:
+        if scraper:
+            scraper.close()
+    return 0
+
+
+def cmd_index(args):
+    """Remonta o catálogo binário e o pack do corpus"""
+    _setup_logging()
+    from bcb_catalog import DocumentCatalog
+    from bcb_corpus_reader import pack_corpus
+
+    catalog = DocumentCatalog.from_csv(args.csv)
+    scraped = catalog.mark_scraped(args.saida)
+    catalog.save(args.catalogo)
+    print(f"Catálogo: {len(catalog)} documentos, {scraped} já baixados ({args.catalogo})")
+    print(f"Pack: {pack_corpus(args.saida, args.pack)} documentos ({args.pack})")
+    return 0
+
+
+def cmd_export(args):
+    """Acrescenta os documentos novos ou alterados ao dataset Parquet/JSONL"""
+    _setup_logging()
+    from bcb_export import DatasetExporter
+
+    exported = DatasetExporter(args.dataset, catalog_csv=args.csv).export(args.saida)
+    print(f"{exported} documentos exportados para {args.dataset}")
+    return 0
+
+
+def cmd_changes(args):
+    """Compara o diretório de saída com a varredura anterior e mostra o feed do dia"""
+    _setup_logging()
+    from bcb_changes import ChangeDetector, describe, read_feed
+
+    detector = ChangeDetector(args.feed)
+    stats = detector.scan(args.saida)
+    print(', '.join(f"{name}: {count}" for name, count in stats.items()))
+    for entry in read_feed(args.feed):
+        if entry['mudanca'] == 'substancial' or args.todas:
+            print(describe(entry))
+    return 0
+
+
+def cmd_duplicates(args):
+    """Agrupa cópias quase idênticas entre os .txt e os PDFs"""
+    _setup_logging()
+    from bcb_dedup import find_duplicates
+
+    clusters = find_duplicates([args.saida, args.pdf], threshold=args.limiar)
+    if args.json:
+        print(json.dumps(clusters, ensure_ascii=False, indent=2))
+        return 0
+    for cluster in clusters:
+        print(f"Manter: {', '.join(cluster['canonicos'].values())}")
+        for copy in cluster['copias']:
+            print(f"  cópia: {copy}")
+    total = sum(cluster['bytes_recuperaveis'] for cluster in clusters)
+    print(f"{len(clusters)} grupos, {total / 2**20:.1f} MB recuperáveis")
+    return 0
+
+
+def cmd_dashboard(args):
+    """Acompanha no terminal o painel de uma execução com --painel"""
+    from bcb_dashboard import watch
+
+    try:
+        watch(args.url, interval=args.intervalo)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_status(args):
+    """Resumo do catálogo, do diretório de saída e (opcionalmente) da fila"""
+    _setup_logging()
+    from collections import Counter
+    from pathlib import Path
+    from bcb_catalog import load_catalog
+
+    # Só leitura: catálogo desatualizado é remontado em memória, sem regravar o .bin
+    catalog = load_catalog(args.csv, args.catalogo, output_dir=args.saida, save=False)
+
+    totals = Counter()
+    scraped = Counter()
+    for position, tipo_id in enumerate(catalog.tipo_col):
+        tipo = catalog.tipos[tipo_id]
+        totals[tipo] += 1
+        scraped[tipo] += catalog.scraped[position]
+
+    status = {
+        'catalogo': {tipo: {'total': totals[tipo], 'baixados': scraped[tipo]} for tipo in sorted(totals)},
+        'baixados': sum(scraped.values()),
+        'pendentes': len(catalog) - sum(scraped.values()),
+    }
+
+    # Manifesto e temporários lidos direto do disco (o AtomicOutputWriter limparia os temporários)
+    manifest_path = Path(args.saida, '.manifest.json')
+    if manifest_path.exists():
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            status['manifesto'] = len(json.load(f))
+    status['temporarios'] = sum(1 for _ in Path(args.saida).glob('.*.tmp')) if Path(args.saida).is_dir() else 0
+
+    if args.fila:
+        from bcb_work_queue import open_queue
+        status['fila'] = open_queue(args.fila).stats()
+
+    if args.json:
+        print(json.dumps(status, ensure_ascii=False, indent=2))
+        return 0
+    for tipo, numbers in status['catalogo'].items():
+        print(f"{tipo:30} {numbers['baixados']:5d}/{numbers['total']:<5d}")
+    print(f"Baixados: {status['baixados']}, pendentes: {status['pendentes']}, "
+          f"no manifesto: {status.get('manifesto', 0)}, temporários: {status['temporarios']}")
+    if 'fila' in status:
+        print(f"Fila: {status['fila']}")
+    return 0
+
+
+def measure_startup(runs=5):
+    """Mediana (ms) do '--help' em processos novos e módulos pesados carregados pela CLI"""
+    script = os.path.abspath(__file__)
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, script, '--help'], check=True, stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    probe = ("import sys, bcb_normas; bcb_normas.build_parser(); "
+             f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    loaded = subprocess.run([sys.executable, '-c', probe], check=True, capture_output=True, text=True,
+                            cwd=os.path.dirname(script)).stdout.strip()
+    return sorted(timings)[len(timings) // 2], [name for name in loaded.split(',') if name]
+
+
+def cmd_startup(args):
+    """Mede a partida a frio e falha (código 1) se passar do orçamento"""
+    median, loaded = measure_startup(args.execucoes)
+    print(f"Partida a frio: {median:.0f} ms (orçamento {args.orcamento} ms)")
+    if loaded:
+        print(f"Módulos pesados carregados na partida: {', '.join(loaded)}")
+    return 0 if median <= args.orcamento and not loaded else 1
+
+
+def build_parser():
+    """Parser com um subparser por comando"""
+    parser = argparse.ArgumentParser(prog='bcb-normas', description="Normativos do BCB: coleta, índices e exportação")
+    parser.add_argument('--csv', default='normativos_spb_bcb.csv', help="catálogo de normativos")
+    parser.add_argument('--saida', default='normativos_txt', help="diretório dos .txt")
+    commands = parser.add_subparsers(dest='comando', required=True)
+
+    scrape = commands.add_parser('scrape', help="baixa os normativos do catálogo")
+    scrape.add_argument('--delay', type=float, default=3.0, help="segundos entre documentos")
+    scrape.add_argument('--refresh', action='store_true', help="baixa de novo os já salvos")
+    scrape.add_argument('--adotar-existentes', action='store_true',
+                        help="registra no manifesto os .txt anteriores a ele (uma vez, se forem confiáveis)")
+    scrape.add_argument('--processos', type=int, default=None, help="processos de pós-processamento")
+    scrape.add_argument('--backend', choices=['selenium', 'cdp'], default=None,
+                        help="driver do navegador (padrão: BCB_DRIVER_BACKEND ou selenium)")
+    scrape.add_argument('--reciclar', type=int, default=500, help="reinicia o navegador a cada N documentos (0: nunca)")
+    scrape.add_argument('--memoria-max', type=int, default=2048,
+                        help="reinicia o navegador acima de tantos MB de RSS (0: sem teto)")
+    scrape.add_argument('--fixar', action='append', default=[], metavar='NORMATIVO',
+                        help="busca primeiro (ex.: 'Resolução BCB nº 501'; pode repetir)")
+    scrape.add_argument('--seguir-citacoes', action='store_true', help="enfileira normativos citados fora do catálogo")
+    scrape.add_argument('--tempo-max', type=float, default=None, help="para depois de tantos minutos")
+    scrape.add_argument('--painel', type=int, default=None, metavar='PORTA',
+                        help="painel de progresso em http://127.0.0.1:PORTA/")
+    scrape.set_defaults(handler=cmd_scrape)
+
+    retry = commands.add_parser('retry', help="reprocessa documentos que falharam")
+    retry.add_argument('documentos', nargs='*', metavar='TIPO NUMERO', help="pares tipo/número")
+    retry.add_argument('--debug', action='store_true', help="navegador visível e screenshots")
+    retry.set_defaults(handler=cmd_retry)
+
+    index = commands.add_parser('index', help="remonta o catálogo binário e o pack do corpus")
+    index.add_argument('--catalogo', default='normativos_catalog.bin')
+    index.add_argument('--pack', default='normativos.pack')
+    index.set_defaults(handler=cmd_index)
+
+    export = commands.add_parser('export', help="exporta para Parquet/JSONL (incremental)")
+    export.add_argument('--dataset', default='normativos_dataset')
+    export.set_defaults(handler=cmd_export)
+
+    changes = commands.add_parser('mudancas', help="mudanças por artigo desde a última varredura")
+    changes.add_argument('--feed', default='normativos_changes', help="diretório do feed e dos hashes")
+    changes.add_argument('--todas', action='store_true', help="inclui novos e só formatação")
+    changes.set_defaults(handler=cmd_changes)
+
+    duplicates = commands.add_parser('duplicatas', help="cópias quase idênticas (MinHash/LSH) entre .txt e PDFs")
+    duplicates.add_argument('--pdf', default='normativos_pdf', help="diretório dos PDFs")
+    duplicates.add_argument('--limiar', type=float, default=0.8, help="Jaccard mínimo estimado")
+    duplicates.add_argument('--json', action='store_true')
+    duplicates.set_defaults(handler=cmd_duplicates)
+
+    dashboard = commands.add_parser('painel', help="acompanha o painel de uma execução (scrape --painel)")
+    dashboard.add_argument('--url', default='http://127.0.0.1:8090')
+    dashboard.add_argument('--intervalo', type=float, default=2.0, help="segundos entre atualizações")
+    dashboard.set_defaults(handler=cmd_dashboard)
+
+    status = commands.add_parser('status', help="progresso do catálogo, saída e fila")
+    status.add_argument('--catalogo', default='normativos_catalog.bin')
+    status.add_argument('--fila', default=None, help="diretório ou URL redis:// da fila")
+    status.add_argument('--json', action='store_true')
+    status.set_defaults(handler=cmd_status)
+
+    startup = commands.add_parser('startup', help="mede a partida a frio contra o orçamento")
+    startup.add_argument('--execucoes', type=int, default=5)
+    startup.add_argument('--orcamento', type=float, default=STARTUP_BUDGET_MS, help="ms")
+    startup.set_defaults(handler=cmd_startup)
+    return parser
+
+
+def main(argv=None):
+    """Executa o subcomando e devolve o código de saída"""
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
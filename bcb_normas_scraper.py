@@ -1,6 +1,5 @@
-import pandas as pd
-import requests
 from bs4 import BeautifulSoup
+import sys
 import time
 import os
 import re
@@ -15,6 +14,22 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
+from bcb_output_writer import AtomicOutputWriter
+from bcb_http import shared_client
+from bcb_history import HistoryStore
+from bcb_text_normalizer import TextNormalizer
+from bcb_boilerplate import BoilerplateModel
+from bcb_extraction import LOAD_CHECK_SCRIPT, LONG_TEXT, content_ready, find_catalog_content, indicators
+from bcb_catalog import load_catalog
+from bcb_postprocess import PostProcessingPipeline, catalog_filename, default_workers
+from bcb_snapshots import SnapshotCache
+from bcb_load_times import LoadTimeModel
+from bcb_network_capture import PayloadCapture, enable_performance_log
+from bcb_recycling import BrowserRecycler, BrowserRestartError
+from bcb_changes import ChangeDetector
+from bcb_identity import canonical_key, display_numero, document_url
+from bcb_scheduler import ScrapeScheduler
+from bcb_dashboard import Dashboard, EventStream, worker_name
 
 # Configuracao de logging
 logging.basicConfig(
@@ -27,14 +42,45 @@ logging.basicConfig(
 )
 
 class BCBNormativesScraperFinal:
-    def __init__(self, csv_file='normativos_spb_bcb.csv', output_dir='normativos_txt'):
+    def __init__(self, csv_file='normativos_spb_bcb.csv', output_dir='normativos_txt', writer=None, history=None,
+                 backend=None, worker=None):
         self.csv_file = csv_file
+        # 'selenium' (chromedriver) ou 'cdp' (websocket direto com o Chrome)
+        self.backend = backend or os.environ.get('BCB_DRIVER_BACKEND', 'selenium')
         self.output_dir = output_dir
         self.driver = None
         self.wait = None
+        # Captura da resposta da API (recriada com o driver) e último normativo capturado
+        self.capture = None
+        self.last_payload = None
 
         # Criar diretorio de saída
         Path(self.output_dir).mkdir(parents=True, exist_ok=True)
+        self.writer = writer or AtomicOutputWriter(self.output_dir)
+        # Catálogo binário (load_documents), com scraped acompanhando o writer
+        self.catalog = None
+        # Cache HTTP em disco, compartilhado com os outros scripts
+        self.http = shared_client()
+        self.history = history or HistoryStore()
+        self.normalizer = TextNormalizer(paragraphs=True)
+        self.boilerplate = BoilerplateModel()
+        if not self.boilerplate.n_docs:
+            # Sem modelo salvo: treinar com a saída existente antes de buscar
+            self.boilerplate.learn_directory(self.output_dir)
+        # Mudanças por artigo entre uma busca e a seguinte
+        self.changes = ChangeDetector()
+        # Síncrono por padrão; run_scraper troca por um pool de processos
+        self.pipeline = PostProcessingPipeline(self.writer, self.history, self.boilerplate, changes=self.changes)
+        # HTML renderizado de cada busca, para reextração offline
+        self.snapshots = SnapshotCache()
+        # Tempos de carga observados por tipo e tamanho
+        self.load_times = LoadTimeModel()
+        # Fila de prioridade do run_scraper (None fora dele)
+        self.scheduler = None
+        # Eventos para o painel de progresso (baratos mesmo sem painel)
+        self.events = EventStream()
+        # Quem processa os documentos, no painel (host-pid, ou o nome do worker da fila)
+        self.worker = worker or worker_name()
         
         # Configurar Selenium WebDriver
         self._setup_driver()
@@ -109,10 +155,17 @@ class BCBNormativesScraperFinal:
                 "profile.managed_default_content_settings.media_stream": 2,
             }
             chrome_options.add_experimental_option("prefs", prefs)
+            # Eventos de rede no log do chromedriver, para capturar a resposta da API
+            enable_performance_log(chrome_options)
             
-            # Instalar e configurar o ChromeDriver
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            if self.backend == 'cdp':
+                # Mesmo Chrome e argumentos, sem o salto HTTP pelo chromedriver
+                from bcb_cdp import CDPDriver
+                self.driver = CDPDriver.from_options(chrome_options)
+            else:
+                # Instalar e configurar o ChromeDriver
+                service = Service(ChromeDriverManager().install())
+                self.driver = webdriver.Chrome(service=service, options=chrome_options)
             
             # Executar scripts para ocultar propriedades de automação
             stealth_scripts = [
@@ -128,6 +181,9 @@ class BCBNormativesScraperFinal:
             
             for script in stealth_scripts:
                 try:
+                    if self.backend == 'cdp':
+                        # No CDP o script vale para todas as páginas seguintes
+                        self.driver.add_script_on_new_document(script)
                     self.driver.execute_script(script)
                 except:
                     pass
@@ -136,6 +192,7 @@ class BCBNormativesScraperFinal:
             self.driver.set_page_load_timeout(60)
             self.driver.implicitly_wait(10)
             self.wait = WebDriverWait(self.driver, 30)
+            self.capture = PayloadCapture(self.driver)
             
             logging.info(f"WebDriver configurado com sucesso (headless={headless})")
             
@@ -147,27 +204,36 @@ class BCBNormativesScraperFinal:
         """Fecha o WebDriver"""
         if self.driver:
             self.driver.quit()
+            self.driver = None
             logging.info("WebDriver fechado")
 
+    def _restart_driver(self):
+        """Fecha e abre o navegador (headless), para o BrowserRecycler"""
+        self.close_driver()
+        self._setup_driver()
+        return self.driver
+
     def load_documents(self):
-        """Carrega a lista de documentos do CSV"""
+        """Carrega a lista de documentos do catálogo binário (remontado do CSV se mudou)"""
         try:
-            df = pd.read_csv(self.csv_file, encoding='utf-8')
-            logging.info(f"Carregados {len(df)} documentos do CSV")
-            return df
+            # Encoding já reparado e numero canônico no catálogo; scraped vem dos
+            # manifestos do diretório de saída e segue o writer durante a execução
+            self.catalog = load_catalog(self.csv_file, output_dir=self.output_dir, writer=self.writer)
+            rows = list(self.catalog.records())
+            logging.info(f"Carregados {len(rows)} documentos do catálogo "
+                         f"({sum(self.catalog.scraped)} já baixados)")
+            return rows
         except Exception as e:
             logging.error(f"Erro ao carregar CSV: {e}")
             return None
 
     def get_url_from_csv(self, row):
         """Obtém a URL correta do CSV"""
-        if 'url_bcb' in row and pd.notna(row['url_bcb']):
+        if row.get('url_bcb'):
             return row['url_bcb']
         else:
             # Fallback: construir URL se não estiver no CSV
-            tipo_encoded = quote(row['tipo'])
-            numero_encoded = quote(str(row['numero']))
-            return f"https://www.bcb.gov.br/estabilidadefinanceira/exibenormativo?tipo={tipo_encoded}&numero={numero_encoded}"
+            return document_url(row['tipo'], row['numero'])
 
     def try_direct_pdf_access(self, tipo, numero):
         """Tenta acessar o PDF diretamente"""
@@ -186,7 +252,7 @@ class BCBNormativesScraperFinal:
             
             for pdf_url in pdf_patterns:
                 try:
-                    response = requests.get(pdf_url, timeout=10)
+                    response = self.http.get(pdf_url, timeout=10)
                     if response.status_code == 200 and 'application/pdf' in response.headers.get('content-type', ''):
                         logging.info(f"PDF encontrado: {pdf_url}")
                         return pdf_url
@@ -202,116 +268,98 @@ class BCBNormativesScraperFinal:
         """Tenta múltiplas estratégias para extrair o conteúdo"""
         tipo = row['tipo']
         numero = row['numero']
+        key = canonical_key(tipo, numero)
         
         # Estratégia 1: Tentar acessar PDF diretamente
+        self.events.emit('etapa', id=key, etapa='pdf direto')
         pdf_url = self.try_direct_pdf_access(tipo, numero)
+        self.events.emit('tentativa', estrategia='pdf direto', ok=bool(pdf_url))
         if pdf_url:
             return f"[PDF encontrado: {pdf_url}]"
         
         # Estratégia 2: Tentar com headless primeiro
+        self.events.emit('etapa', id=key, etapa='headless')
         content = self._try_extract_with_driver(row, headless=True)
+        self.events.emit('tentativa', estrategia='headless', ok=bool(content))
         if content:
             return content
         
-        # Estratégia 3: Tentar sem headless se headless falhou
+        # Estratégia 3: Tentar sem headless se headless falhou, com o dobro da espera
         logging.info("Tentando sem headless mode...")
+        self.events.emit('etapa', id=key, etapa='com janela')
+        content = None
         try:
             self.close_driver()
             self._setup_driver(headless=False)
-            content = self._try_extract_with_driver(row, headless=False)
+            content = self._try_extract_with_driver(row, headless=False, budget_scale=2.0)
             if content:
                 return content
         except Exception as e:
             logging.error(f"Erro ao tentar sem headless: {e}")
+        finally:
+            self.events.emit('tentativa', estrategia='com janela', ok=bool(content))
         
         logging.error("Todas as estratégias falharam")
         return None
 
-    def _try_extract_with_driver(self, row, headless=True):
+    def _try_extract_with_driver(self, row, headless=True, budget_scale=1.0):
         """Tenta extrair conteúdo com configuração específica do driver"""
         url = self.get_url_from_csv(row)
         
         try:
-            logging.info(f"Usando URL do CSV: {url} (headless={headless})")
+            # Espera aprendida para o tipo/tamanho do documento, no lugar dos 8s + 30s + 25x2s fixos
+            budget = self.load_times.budget(row['tipo'], row['numero']) * budget_scale
+            logging.info(f"Usando URL do CSV: {url} (headless={headless}, espera até {budget:.0f}s)")
             
-            # Navegar para a página
+            # Navegar para a página, capturando as respostas da API de conteúdo
+            self.capture.start()
+            started = time.monotonic()
             self.driver.get(url)
             
-            # Aguardar carregamento inicial
-            time.sleep(8)
+            # Aguardar o normativo na rede ou o conteúdo dinâmico no DOM (JavaScript a cada meio segundo)
+            state = {}
             
-            # Verificar se há mensagem de JavaScript
-            page_text = self.driver.page_source
-            if "Essa pagina depende do javascript" in page_text or "habilitar o javascript" in page_text:
-                logging.warning("URL ainda mostra mensagem de JavaScript")
-                return None
+            def content_loaded(driver):
+                # A resposta da API chega antes da renderização: com ela não é preciso esperar o DOM
+                payload = self.capture.poll()
+                if payload:
+                    state['payload'] = payload
+                    return True
+                content_indicators = driver.execute_script(LOAD_CHECK_SCRIPT)
+                state.update(content_indicators)
+                # Se encontrou indicadores de documento e não é só navegação
+                return content_ready(content_indicators)
             
-            # Tentar aguardar por elementos específicos que indicam que o conteúdo foi carregado
+            remaining = max(budget - (time.monotonic() - started), 1.0)
+            self.events.emit('etapa', id=canonical_key(row['tipo'], row['numero']),
+                             etapa=f"aguardando conteúdo (até {budget:.0f}s, {'headless' if headless else 'com janela'})")
             try:
-                # Aguardar por elementos que indicam carregamento do conteúdo
-                from selenium.webdriver.support import expected_conditions as EC
-                from selenium.webdriver.common.by import By
-                
-                # Aguardar até 30 segundos por elementos que indicam conteúdo carregado
-                wait = WebDriverWait(self.driver, 30)
-                
-                # Tentar aguardar por elementos que indicam que o documento foi carregado
-                try:
-                    # Aguardar por elementos que contêm texto de documento
-                    wait.until(lambda driver: any([
-                        'Art.' in driver.page_source,
-                        'Parágrafo' in driver.page_source,
-                        'Considerando' in driver.page_source,
-                        'RESOLUÇÃO' in driver.page_source.upper(),
-                        'INSTRUÇÃO' in driver.page_source.upper()
-                    ]))
-                    logging.info("Elementos de documento detectados na página")
-                except:
-                    logging.warning("Timeout aguardando elementos de documento")
-                
-            except Exception as e:
-                logging.warning(f"Erro ao aguardar elementos: {e}")
-            
-            # Aguardar carregamento dinâmico com estratégias mais robustas
-            max_wait_attempts = 25
-            content_found = False
-            
-            for wait_attempt in range(max_wait_attempts):
-                time.sleep(2)
+                # Erros de script durante a carga (body ainda nulo) só repetem a verificação
+                WebDriverWait(self.driver, remaining, poll_frequency=0.5,
+                              ignored_exceptions=[WebDriverException]).until(content_loaded)
+                elapsed = time.monotonic() - started
+                payload = state.get('payload')
+                if payload:
+                    self.load_times.record(row['tipo'], row['numero'], elapsed, size=len(payload['texto']))
+                    logging.info(f"Normativo capturado da rede em {elapsed:.1f}s ({payload['url']})")
+                    # Snapshot do HTML original da API, com os campos estruturados (data, assunto, ...)
+                    fields = {key: value for key, value in payload.items() if key not in ('html', 'texto', 'url')}
+                    self.snapshots.put(url, payload['html'], layout='catalog', tipo=row['tipo'],
+                                       numero=str(row['numero']), assunto=row['assunto'], campos=fields)
+                    self.last_payload = payload
+                    return payload['texto']
+                self.load_times.record(row['tipo'], row['numero'], elapsed, size=state['textLength'])
+                logging.info(f"Conteúdo do documento encontrado em {elapsed:.1f}s")
+            except TimeoutException:
+                # Amostra censurada: a carga levou pelo menos o orçamento inteiro
+                self.load_times.record_timeout(row['tipo'], row['numero'])
+                logging.warning(f"Conteúdo não foi carregado em {budget:.0f}s. Indicadores: {state.get('found')}, "
+                                f"Tamanho: {state.get('textLength')}, Navegação: {state.get('hasNavigation')}")
                 
-                try:
-                    # Verificar se o conteúdo foi carregado usando JavaScript
-                    content_indicators = self.driver.execute_script("""
-                        var text = document.body.innerText || document.body.textContent || '';
-                        var indicators = ['RESOLUÇÃO', 'BANCO CENTRAL', 'Art.', 'Parágrafo', 'Considerando', 'Visto', 'Brasília', 'INSTRUÇÃO', 'CIRCULAR'];
-                        var found = indicators.filter(ind => text.toUpperCase().includes(ind));
-                        return {
-                            found: found,
-                            hasContent: text.length > 2000,
-                            textLength: text.length,
-                            hasNavigation: text.includes('ACESSIBILIDADE') && text.includes('ALTO CONTRASTE'),
-                            hasDocumentContent: text.includes('Art.') || text.includes('Parágrafo') || text.includes('Considerando'),
-                            hasNoscript: document.querySelector('noscript') !== null
-                        };
-                    """)
-                    
-                    logging.info(f"  Aguardando {wait_attempt + 1}: Indicadores: {content_indicators['found']}, Tamanho: {content_indicators['textLength']}, Navegação: {content_indicators['hasNavigation']}, Documento: {content_indicators['hasDocumentContent']}, NoScript: {content_indicators['hasNoscript']}")
-                    
-                    # Se encontrou indicadores de documento e não é só navegação
-                    if (len(content_indicators['found']) >= 2 and 
-                        content_indicators['hasContent'] and 
-                        not content_indicators['hasNavigation'] and
-                        content_indicators['hasDocumentContent']):
-                        logging.info("Conteúdo do documento encontrado!")
-                        content_found = True
-                        break
-                        
-                except Exception as e:
-                    logging.warning(f"Erro ao verificar conteúdo na tentativa {wait_attempt + 1}: {e}")
-                    continue
-            
-            if not content_found:
-                logging.warning("Conteúdo não foi carregado após todas as tentativas")
+                # Verificar se há mensagem de JavaScript
+                page_text = self.driver.page_source
+                if "Essa pagina depende do javascript" in page_text or "habilitar o javascript" in page_text:
+                    logging.warning("URL ainda mostra mensagem de JavaScript")
                 return None
             
             # Procurar por elementos que contêm o conteúdo do documento
@@ -319,25 +367,22 @@ class BCBNormativesScraperFinal:
             
             if content_element:
                 text = content_element.text
+                self.snapshots.put(url, self.driver.page_source, layout='catalog', tipo=row['tipo'],
+                                   numero=str(row['numero']), assunto=row['assunto'])
                 
-                # Verificar se contém indicadores de documento
-                text_upper = text.upper()
-                indicators = ['RESOLUÇÃO', 'BANCO CENTRAL', 'Art.', 'Parágrafo', 'Considerando', 'Visto', 'Brasília', 'INSTRUÇÃO', 'CIRCULAR']
-                found_indicators = [ind for ind in indicators if ind in text_upper]
-                
-                # Verificar se não é apenas navegação
-                nav_indicators = ['ACESSIBILIDADE', 'ALTO CONTRASTE', 'ENGLISH', 'Home', 'Estabilidade', 'financeira']
-                nav_found = [ind for ind in nav_indicators if ind in text_upper]
+                # Verificar se contém indicadores de documento e não é apenas navegação
+                found_indicators, nav_found = indicators(text)
                 
+                # A limpeza do texto fica para o estágio de pós-processamento
                 if len(found_indicators) >= 2 and len(nav_found) < 3:
                     logging.info(f"Conteúdo válido encontrado com {len(found_indicators)} indicadores")
-                    return self.clean_text(text)
+                    return text
                 else:
                     logging.warning(f"Conteúdo inválido: {len(found_indicators)} indicadores de documento, {len(nav_found)} indicadores de navegação")
                     # Mesmo assim, tentar retornar o conteúdo se for longo o suficiente
-                    if len(text) > 1000:
+                    if len(text) > LONG_TEXT:
                         logging.info("Retornando conteúdo mesmo com poucos indicadores (texto longo)")
-                        return self.clean_text(text)
+                        return text
             
         except Exception as e:
             logging.error(f"Erro ao extrair conteúdo: {e}")
@@ -345,186 +390,172 @@ class BCBNormativesScraperFinal:
         return None
 
     def find_document_content(self):
-        """Encontra o elemento que contém o conteúdo do documento"""
+        """Encontra o elemento que contém o conteúdo do documento (mesma busca da reextração)"""
+        def select(selector):
+            try:
+                return self.driver.find_elements(By.CSS_SELECTOR, selector)
+            except WebDriverException:
+                return []
+
         try:
-            # Procurar por elementos que contêm o conteúdo do documento
-            content_selectors = [
-                'div[class*="conteudo"]',
-                'div[class*="documento"]',
-                'div[class*="normativo"]',
-                'div[class*="texto"]',
-                'div[class*="body"]',
-                'div[class*="main"]',
-                'div[class*="content"]',
-                'article',
-                'main',
-                'div[class*="normativo-conteudo"]',
-                'div[class*="documento-conteudo"]'
-            ]
-            
-            for selector in content_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for element in elements:
-                        if element.text and len(element.text) > 1000:
-                            text_upper = element.text.upper()
-                            if any(word in text_upper for word in ['RESOLUÇÃO', 'BANCO CENTRAL', 'Art.', 'Parágrafo', 'Considerando']):
-                                logging.info(f"Conteúdo encontrado com seletor: {selector}")
-                                return element
-                except:
-                    continue
-            
-            # Estratégia alternativa: procurar por todos os elementos
-            all_elements = self.driver.find_elements(By.XPATH, "//*")
-            best_element = None
-            best_score = 0
-            
-            for element in all_elements:
-                if element.text and len(element.text) > 2000:
-                    text_upper = element.text.upper()
-                    score = 0
-                    
-                    # Pontuar baseado em indicadores de documento
-                    indicators = ['RESOLUÇÃO', 'BANCO CENTRAL', 'Art.', 'Parágrafo', 'Considerando', 'Visto', 'Brasília']
-                    for indicator in indicators:
-                        if indicator in text_upper:
-                            score += 1
-                    
-                    # Penalizar se contém muito texto de navegação
-                    nav_indicators = ['ACESSIBILIDADE', 'ALTO CONTRASTE', 'ENGLISH', 'Home', 'Estabilidade', 'financeira']
-                    for nav_indicator in nav_indicators:
-                        if nav_indicator in text_upper:
-                            score -= 0.5
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_element = element
-            
-            if best_element and best_score > 0:
-                logging.info(f"Melhor elemento encontrado com score: {best_score}")
-                return best_element
-                
+            element = find_catalog_content(select, lambda: self.driver.find_elements(By.XPATH, "//*"),
+                                           lambda element: element.text)
+            if element is not None:
+                logging.info("Conteúdo do documento encontrado")
+            return element
         except Exception as e:
             logging.error(f"Erro ao encontrar conteúdo: {e}")
-        
         return None
 
     def clean_text(self, text):
         """Limpa o texto extraído"""
-        # Limpeza do texto
-        text = re.sub(r'\n+', '\n\n', text)
-        text = re.sub(r' +', ' ', text)
-        text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x9F]', '', text)
-        return text.strip()
+        # Reparo de encoding, ordinais, aspas, controles e espaços em uma passada
+        return self.normalizer.normalize(text)
 
-    def scrape_document(self, row):
+    def scrape_document(self, row, refresh=False):
         """Faz scraping de um documento específico"""
         tipo = row['tipo']
         numero = row['numero']
         assunto = row['assunto']
         
         filename = self.generate_filename(tipo, numero, assunto)
-        filepath = os.path.join(self.output_dir, filename)
+        key = canonical_key(tipo, numero)
+        self.events.emit('inicio', id=key, documento=f"{tipo} nro. {display_numero(numero)}", worker=self.worker)
 
-        # Verificar se arquivo já existe
-        if os.path.exists(filepath):
+        # Verificar se arquivo já existe e foi gravado por completo
+        if self.catalog is not None:
+            done = self.catalog.is_scraped(tipo, numero)
+        else:
+            done = self.writer.is_complete(filename)
+        if done and not refresh:
             logging.info(f"Arquivo já existe, pulando: {filename}")
+            self.events.emit('fim', id=key, ok=True, pulado=True)
             return True
 
+        ok = False
         try:
             logging.info(f"Fazendo scraping: {tipo} nro. {numero}")
 
             # Usar múltiplas estratégias para extrair conteúdo
+            self.last_payload = None
             content = self.extract_content_with_multiple_strategies(row)
 
             if not content:
                 logging.error(f"Conteúdo vazio para {tipo} nro. {numero}")
                 return False
 
-            # Verificar se o conteúdo é válido
-            if len(content) < 500:
-                logging.error(f"Conteúdo muito curto para {tipo} nro. {numero} ({len(content)} caracteres)")
-                return False
-
-            # Criar cabeçalho do arquivo
-            header = f"""# {tipo} nro. {numero}
-# Data de acesso: {time.strftime('%d/%m/%Y %H:%M:%S')}
-# Assunto: {assunto}
-# ========================================
-
-"""
+            # Citações do texto repriorizam (ou enfileiram) os citados
+            if self.scheduler is not None:
+                self.scheduler.observe(row, content)
 
-            # Salvar arquivo
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(header + content)
+            # Capturado da API: a data vai para o cabeçalho e o assunto cobre
+            # as linhas do catálogo que vieram sem ele
+            payload = self.last_payload or {}
+            assunto = assunto or payload.get('assunto') or ''
 
-            logging.info(f"Salvo com sucesso: {filename}")
-            return True
+            # Limpeza, boilerplate, nome, cabeçalho, hash e gravação ficam no
+            # estágio de pós-processamento; o navegador segue para o próximo
+            ok = self.pipeline.submit('catalog', tipo, numero, content, assunto=assunto, data=payload.get('data'),
+                                      normalize='paragraphs', boilerplate=True, min_length=500)
+            return ok
 
         except Exception as e:
             logging.error(f"Erro inesperado para {tipo} nro. {numero}: {e}")
             return False
+        finally:
+            self.events.emit('fim', id=key, ok=ok)
 
     def generate_filename(self, tipo, numero, assunto):
         """Gera nome de arquivo seguro"""
-        # Limpar tipo e numero
-        tipo_clean = re.sub(r'[^A-Za-z0-9]', '_', tipo)
-        # Converter numero para string e remover .0 se existir
-        numero_str = str(numero)
-        if numero_str.endswith('.0'):
-            numero_str = numero_str[:-2]
-        numero_clean = re.sub(r'[^A-Za-z0-9._-]', '_', numero_str)
-
-        # Criar nome base
-        base_name = f"{tipo_clean}_n{numero_clean}"
-
-        # Adicionar parte do assunto (primeiras palavras, limitado)
-        assunto_clean = re.sub(r'[^A-Za-z0-9 ]', '', assunto)
-        assunto_words = assunto_clean.split()[:5]  # Primeiras 5 palavras
-        assunto_part = '_'.join(assunto_words).lower()
-
-        if assunto_part:
-            filename = f"{base_name}_{assunto_part}.txt"
-        else:
-            filename = f"{base_name}.txt"
-
-        # Limitar tamanho do nome do arquivo
-        if len(filename) > 200:
-            filename = filename[:197] + "...txt"
-
-        return filename
-
-    def run_scraper(self, delay=3):
-        """Executa o scraping de todos os documentos"""
-        df = self.load_documents()
-        if df is None:
+        return catalog_filename(tipo, numero, assunto)
+
+    def run_scraper(self, delay=3, refresh=False, workers=None, recycle_every=500, max_rss_mb=2048,
+                    pins=(), follow_citations=False, max_minutes=None, dashboard_port=None):
+        """Executa o scraping de todos os documentos (refresh=True busca de novo os já salvos)
+
+        Os documentos saem de um ScrapeScheduler, por prioridade (recência,
+        tempo desde a última busca, citações e pins), e não na ordem do CSV;
+        com max_minutes a execução para no tempo e os menos prioritários ficam
+        para a próxima. O navegador é reiniciado a cada recycle_every
+        documentos ou quando navegador + driver passam de max_rss_mb (0 desliga
+        cada limite). Com dashboard_port, o progresso fica em
+        http://127.0.0.1:<porta>/ (ou no terminal, com bcb-normas painel).
+        """
+        rows = self.load_documents()
+        if rows is None:
             return
 
+        self.scheduler = ScrapeScheduler(self.history, pins=pins, follow_citations=follow_citations)
+        self.scheduler.load_citations(self.output_dir)
+        for row in rows:
+            self.scheduler.add(row)
+        deadline = time.monotonic() + max_minutes * 60 if max_minutes else None
+
         successful = 0
         failed = 0
+        workers = default_workers() if workers is None else workers
+        self.pipeline = PostProcessingPipeline(self.writer, self.history, self.boilerplate, workers=workers,
+                                               changes=self.changes)
+        recycler = BrowserRecycler(max_documents=recycle_every, max_rss_mb=max_rss_mb)
+
+        planned = len(self.scheduler)
+        dashboard = None
+        if dashboard_port is not None:
+            dashboard = Dashboard(self.events, port=dashboard_port, total=planned)
+            dashboard.gauge('agendador', lambda: len(self.scheduler))
+            dashboard.gauge('pós-processamento', self.pipeline.pending)
+            dashboard.gauge('gravação', lambda: len(self.writer.pending))
+            dashboard.start()
 
         try:
-            for index, row in df.iterrows():
+            while len(self.scheduler):
+                if deadline is not None and time.monotonic() >= deadline:
+                    logging.info(f"Tempo esgotado; {len(self.scheduler)} documentos ficam para a próxima execução")
+                    break
+                row = self.scheduler.pop()
                 try:
-                    if self.scrape_document(row):
+                    if self.scrape_document(row, refresh=refresh):
                         successful += 1
                     else:
                         failed += 1
+                    if self.scheduler.discovered and planned != len(self.scheduler.rows):
+                        # Citações descobertas aumentam o total do painel
+                        planned = len(self.scheduler.rows)
+                        self.events.emit('plano', total=planned)
+
+                    # Reinício entre documentos: a próxima linha continua no navegador novo
+                    recycler.maybe_recycle(self.driver, self._restart_driver)
 
                     # Delay entre requisições para não sobrecarregar o servidor
-                    if delay > 0 and index < len(df) - 1:  # Não esperar no último
+                    if delay > 0 and len(self.scheduler):  # Não esperar no último
                         time.sleep(delay)
 
                 except KeyboardInterrupt:
                     logging.info("Scraping interrompido pelo usuário")
                     break
+                except BrowserRestartError:
+                    # Sem navegador não há como seguir: o documento já foi contado, a fila fica
+                    raise
                 except Exception as e:
-                    logging.error(f"Erro inesperado na linha {index}: {e}")
+                    logging.error(f"Erro inesperado em {row['tipo']} nro. {row['numero']}: {e}")
                     failed += 1
 
         finally:
-            # Sempre fechar o driver
+            # Esperar o pós-processamento, persistir o lote pendente e fechar o driver
+            utilization = self.pipeline.close()
+            self.writer.close()
+            self.http.close()
+            self.boilerplate.save()
+            self.snapshots.evict()
+            self.load_times.save()
             self.close_driver()
+            if dashboard is not None:
+                dashboard.stop()
+
+        # Com o pool, falhas de pós-processamento só aparecem depois da entrega
+        if workers:
+            successful -= self.pipeline.results['failed']
+            failed += self.pipeline.results['failed']
 
         logging.info(f"Scraping concluído. Sucessos: {successful}, Falhas: {failed}")
 
@@ -533,6 +564,12 @@ class BCBNormativesScraperFinal:
         print(f"Documentos processados com sucesso: {successful}")
         print(f"Documentos com falha: {failed}")
         print(f"Arquivos salvos em: {self.output_dir}")
+        print(f"Pendentes na fila: {len(self.scheduler)} (descobertos por citação: {self.scheduler.discovered})")
+        memory = recycler.summary()
+        print(f"Reinícios do navegador: {memory['reinicios']} (pico: navegador {memory['pico_navegador_mb']:.0f} MB, "
+              f"driver {memory['pico_driver_mb']:.0f} MB)")
+        self.pipeline.print_report(utilization)
+        self.http.print_report()
 
         # Listar arquivos criados
         txt_files = list(Path(self.output_dir).glob("*.txt"))
@@ -558,10 +595,9 @@ def main():
         print("Execute primeiro o script de busca dos documentos.")
         return
 
-    # Configurar delay entre requisições
-    delay = input("\nDelay entre requisições (segundos) [default: 3]: ").strip()
+    # Delay entre requisições pela linha de comando (sem prompt, para rodar em cron)
     try:
-        delay = float(delay) if delay else 3.0
+        delay = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
     except ValueError:
         delay = 3.0
 
@@ -0,0 +1,306 @@
+import os
+import time
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # fcntl só existe em Unix; sem ele a mescla do manifesto fica sem trava
+    fcntl = None
+
+
+# Temporários mais novos que isso podem ser de outro writer vivo no mesmo diretório
+DEFAULT_TEMP_GRACE = 3600
+# Intervalo mínimo (s) entre releituras dos manifestos dos outros writers em is_complete
+MANIFEST_REFRESH = 30
+
+
+def current_file_mode():
+    """Permissão de arquivo novo segundo o umask (mkstemp cria 0600)"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def write_temp(output_dir, filename, data, file_mode=0o644, sync=False):
+    """Grava os bytes em um temporário ao lado do destino; devolve a entrada pendente"""
+    filepath = os.path.join(output_dir, filename)
+    Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(prefix=f".{Path(filename).name}.", suffix='.tmp',
+                                     dir=os.path.dirname(filepath))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.chmod(temp_path, file_mode)
+
+    return {
+        'temp_path': temp_path,
+        'filename': filename,
+        'size': len(data),
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'synced': sync,
+    }
+
+
+def _is_manifest(name):
+    return name.startswith('.manifest') and name.endswith('.json')
+
+
+def _read_manifest_sizes(path, sizes):
+    """Acrescenta a sizes (nome -> tamanhos) as entradas de um manifesto"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for filename, item in json.load(f).items():
+                sizes.setdefault(filename, set()).add(item['size'])
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError, TypeError):
+        logging.warning(f"Manifesto ilegível, ignorando: {os.path.basename(path)}")
+
+
+def manifest_sizes(output_dir):
+    """Tamanhos registrados por arquivo em todos os manifestos do diretório (writer e workers)"""
+    sizes = {}
+    try:
+        names = [entry.name for entry in os.scandir(output_dir) if _is_manifest(entry.name)]
+    except FileNotFoundError:
+        return sizes
+    for name in names:
+        _read_manifest_sizes(os.path.join(output_dir, name), sizes)
+    return sizes
+
+
+def completed_files(output_dir):
+    """Arquivos gravados por completo segundo os manifestos do diretório, sem ler o conteúdo.
+
+    Mesma regra do is_complete: o tamanho confere com algum manifesto (o do
+    writer ou o de um worker). Arquivos fora de todos eles (legados, talvez
+    truncados) não contam até adopt_existing.
+    """
+    sizes = {}
+    manifest = {}
+    try:
+        entries = list(os.scandir(output_dir))
+    except FileNotFoundError:
+        return set()
+    for entry in entries:
+        if _is_manifest(entry.name):
+            _read_manifest_sizes(entry.path, manifest)
+        elif not entry.name.startswith('.') and entry.is_file():
+            sizes[entry.name] = entry.stat().st_size
+    return {filename for filename, size in sizes.items() if size in manifest.get(filename, ())}
+
+
+class AtomicOutputWriter:
+    """Grava arquivos de saída de forma atômica, com fsync em lotes e manifesto.
+
+    Vários writers podem dividir o diretório (scraper, ingestor do BC Correio,
+    reextração, workers): temporários com menos de temp_grace segundos não
+    são removidos, e o manifesto é mesclado com o do disco, sob trava, a cada
+    gravação, então um writer não apaga as entradas do outro.
+    """
+
+    MANIFEST_NAME = '.manifest.json'
+
+    def __init__(self, output_dir='normativos_txt', fsync_every=10, manifest_name=None,
+                 temp_grace=DEFAULT_TEMP_GRACE):
+        self.output_dir = output_dir
+        self.fsync_every = max(1, int(fsync_every))
+        # Em diretório compartilhado, temporários recentes podem ser de outro writer
+        self.temp_grace = temp_grace
+        self.manifest_path = os.path.join(output_dir, manifest_name or self.MANIFEST_NAME)
+
+        # Arquivos temporários já escritos, aguardando fsync e rename
+        self.pending = []
+        self.manifest = {}
+        # Tamanhos nos manifestos de outros writers, relidos no máximo a cada MANIFEST_REFRESH s
+        self._others = {}
+        self._others_loaded = None
+
+        # mkstemp cria arquivos 0600; aplicar as permissões usuais (umask)
+        self.file_mode = current_file_mode()
+        # write/stage/flush podem vir de threads diferentes (pipeline de pós-processamento)
+        self._lock = threading.RLock()
+
+        Path(self.output_dir).mkdir(parents=True, exist_ok=True)
+        self._cleanup_temp_files()
+        self._load_manifest()
+
+    def _cleanup_temp_files(self):
+        """Remove temporários órfãos deixados por execuções interrompidas"""
+        cutoff = time.time() - self.temp_grace
+        for temp_file in Path(self.output_dir).rglob('.*.tmp'):
+            try:
+                if self.temp_grace and temp_file.stat().st_mtime > cutoff:
+                    continue
+                temp_file.unlink()
+                logging.info(f"Temporário órfão removido: {temp_file.name}")
+            except OSError:
+                pass
+
+    def _read_manifest(self):
+        """Manifesto (path, tamanho, hash) como está no disco"""
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Manifesto ilegível, ignorando: {e}")
+            return {}
+
+    def _load_manifest(self):
+        """Carrega o manifesto do diretório de saída"""
+        self.manifest = self._read_manifest()
+
+    def _save_manifest(self, updates):
+        """Mescla as entradas novas no manifesto do disco e o grava de forma atômica.
+
+        Outro writer com o mesmo manifesto pode ter gravado depois da nossa
+        leitura: só as entradas deste lote sobrescrevem as do disco.
+        """
+        lock_fd = os.open(self.manifest_path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            manifest = self._read_manifest()
+            manifest.update(updates)
+            data = json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True)
+            fd, temp_path = tempfile.mkstemp(prefix='.manifest.', suffix='.tmp', dir=self.output_dir)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.manifest_path)
+            self.manifest = manifest
+        finally:
+            os.close(lock_fd)
+
+    def _fsync_dir(self):
+        """Garante que os renames do diretório foram persistidos"""
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        fd = os.open(self.output_dir, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def write(self, filename, content, binary=False):
+        """Escreve o conteúdo em um temporário; o rename acontece no próximo flush"""
+        data = content if binary else content.encode('utf-8')
+        entry = write_temp(self.output_dir, filename, data, self.file_mode)
+        self.stage(entry)
+        return os.path.join(self.output_dir, filename)
+
+    def stage(self, entry):
+        """Enfileira um temporário já gravado (por write_temp, em outro processo)"""
+        with self._lock:
+            self.pending.append(entry)
+            if len(self.pending) >= self.fsync_every:
+                self.flush()
+
+    def flush(self):
+        """Faz fsync do lote pendente, renomeia os arquivos e atualiza o manifesto"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+
+        batch, self.pending = self.pending, []
+        updates = {}
+        for entry in batch:
+            if not entry.get('synced'):
+                fd = os.open(entry['temp_path'], os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            os.replace(entry['temp_path'], os.path.join(self.output_dir, entry['filename']))
+            updates[entry['filename']] = {'size': entry['size'], 'sha256': entry['sha256']}
+
+        self._fsync_dir()
+        self._save_manifest(updates)
+        logging.info(f"Lote de {len(batch)} arquivos persistido em {self.output_dir}")
+
+    def _other_sizes(self, filename):
+        """Tamanhos do arquivo nos manifestos do diretório (inclusive de outros writers)"""
+        now = time.monotonic()
+        if self._others_loaded is None or now - self._others_loaded >= MANIFEST_REFRESH:
+            self._others = manifest_sizes(self.output_dir)
+            self._others_loaded = now
+        return self._others.get(filename, ())
+
+    def is_complete(self, filename):
+        """Verifica, sem ler o conteúdo, se o arquivo foi gravado por completo.
+
+        Arquivo fora de todos os manifestos não conta: pode ser uma gravação
+        truncada do caminho antigo (open(..., 'w')). adopt_existing registra
+        de uma vez os legados em que se confia.
+        """
+        with self._lock:
+            if any(entry['filename'] == filename for entry in self.pending):
+                return True
+
+        filepath = os.path.join(self.output_dir, filename)
+        try:
+            size = os.path.getsize(filepath)
+        except OSError:
+            return False
+
+        entry = self.manifest.get(filename)
+        if entry and entry['size'] == size:
+            return True
+        return size in self._other_sizes(filename)
+
+    def verify(self, filename):
+        """Confere o hash do arquivo contra o manifesto (lê o conteúdo)"""
+        entry = self.manifest.get(filename)
+        if not entry:
+            return False
+        try:
+            with open(os.path.join(self.output_dir, filename), 'rb') as f:
+                return hashlib.sha256(f.read()).hexdigest() == entry['sha256']
+        except OSError:
+            return False
+
+    def adopt_existing(self, pattern='*.txt'):
+        """Registra no manifesto (tamanho e hash) os legados fora de todos os manifestos.
+
+        Chamada uma vez, quando se confia no diretório: depois disso eles contam
+        como completos, e só truncamentos posteriores (tamanho diferente) não.
+        """
+        known = manifest_sizes(self.output_dir)
+        updates = {}
+        for filepath in Path(self.output_dir).glob(pattern):
+            filename = filepath.relative_to(self.output_dir).as_posix()
+            if filename in self.manifest or filename in known:
+                continue
+            data = filepath.read_bytes()
+            updates[filename] = {'size': len(data), 'sha256': hashlib.sha256(data).hexdigest()}
+
+        if updates:
+            self._save_manifest(updates)
+            self._others_loaded = None
+            logging.info(f"{len(updates)} arquivos existentes adicionados ao manifesto")
+        return len(updates)
+
+    def close(self):
+        """Persiste o que estiver pendente"""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
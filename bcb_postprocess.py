@@ -0,0 +1,316 @@
+import os
+import re
+import time
+import queue
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from bcb_output_writer import write_temp
+from bcb_identity import canonical_key, display_numero, find_references
+from bcb_storage import compose_document
+
+
+def catalog_filename(tipo, numero, assunto):
+    """Nome de arquivo do BCBNormativesScraperFinal: tipo, número e início do assunto"""
+    # Limpar tipo e numero
+    tipo_clean = re.sub(r'[^A-Za-z0-9]', '_', tipo)
+    # Número como o BCB exibe: '429.0', 429 e '4282' viram sempre o mesmo nome ('429', '4.282')
+    numero_clean = re.sub(r'[^A-Za-z0-9._-]', '_', display_numero(numero))
+
+    # Criar nome base
+    base_name = f"{tipo_clean}_n{numero_clean}"
+
+    # Adicionar parte do assunto (primeiras palavras, limitado)
+    assunto_clean = re.sub(r'[^A-Za-z0-9 ]', '', assunto)
+    assunto_words = assunto_clean.split()[:5]  # Primeiras 5 palavras
+    assunto_part = '_'.join(assunto_words).lower()
+
+    if assunto_part:
+        filename = f"{base_name}_{assunto_part}.txt"
+    else:
+        filename = f"{base_name}.txt"
+
+    # Limitar tamanho do nome do arquivo
+    if len(filename) > 200:
+        filename = filename[:197] + "...txt"
+
+    return filename
+
+
+def catalog_header(tipo, numero, assunto, accessed, data=None):
+    """Cabeçalho '# Tipo nro. N' do BCBNormativesScraperFinal (data só quando veio da API)"""
+    date_line = f"# Data: {data}\n" if data else ''
+    return f"""# {tipo} nro. {numero}
+{date_line}# Data de acesso: {accessed}
+# Assunto: {assunto}
+# ========================================
+
+"""
+
+
+def url_filename(tipo, numero, data):
+    """Nome de arquivo dos scrapers por URL: Tipo_Numero_Data.txt"""
+    return f"{tipo.replace(' ', '_')}_{numero}_{data.replace('/', '_')}.txt"
+
+
+def postprocess(job, normalizers, boilerplate=None):
+    """Limpa o texto bruto, monta nome e cabeçalho e grava o temporário com hash.
+
+    Roda tanto na thread do scraper quanto em um processo do pool. O modelo
+    de boilerplate só é lido aqui (fixo durante a execução); os shingles do
+    documento voltam no resultado e o processo principal os conta no modelo.
+    """
+    started = time.perf_counter()
+    if job.get('snapshot'):
+        # Reextração: o texto sai do HTML salvo, sem navegador
+        from bcb_snapshots import snapshot_job
+        job = snapshot_job(job)
+    result = {'tipo': job['tipo'], 'numero': job['numero'], 'ok': False, 'shingles': None,
+              'fetched_at': job.get('fetched_at')}
+
+    text = job['text']
+    normalizer = _normalizer_for(job.get('normalize'), normalizers)
+    if normalizer is not None and text:
+        text = normalizer.normalize(text)
+
+    min_length = job.get('min_length', 0)
+    if not text or not text.strip():
+        result['error'] = 'conteúdo vazio'
+    elif len(text) < min_length:
+        result['error'] = f"conteúdo muito curto ({len(text)} caracteres)"
+    else:
+        if boilerplate is not None and job.get('boilerplate'):
+            # Remover a navegação da página, sem tocar no título do próprio normativo
+            result['shingles'] = boilerplate.document_shingles(text)
+            own = canonical_key(job['tipo'], job['numero'])
+            text = boilerplate.strip(text, keep=lambda line: own in find_references(line))
+
+        if job['layout'] == 'catalog':
+            filename = catalog_filename(job['tipo'], job['numero'], job['assunto'])
+            document = catalog_header(job['tipo'], job['numero'], job['assunto'], job['accessed'],
+                                      job.get('data')) + text
+        else:
+            filename = url_filename(job['tipo'], job['numero'], job['data'])
+            document = compose_document(job['tipo'], job['numero'], job['data'], job['url'], text)
+
+        result['entry'] = write_temp(job['output_dir'], filename, document.encode('utf-8'),
+                                     job['file_mode'], sync=job.get('sync', False))
+        result['content'] = text
+        result['ok'] = True
+
+    result['elapsed'] = time.perf_counter() - started
+    return result
+
+
+# Estado de cada processo do pool (criado pelo initializer)
+_worker_state = {}
+
+
+def _init_worker(model_file):
+    """Carrega no processo do pool o modelo de boilerplate salvo no início da execução"""
+    from bcb_boilerplate import BoilerplateModel
+
+    model = BoilerplateModel(model_file) if model_file else None
+    if model is not None:
+        model.freeze()
+    _worker_state['boilerplate'] = model
+    _worker_state['normalizers'] = {}
+
+
+def _normalizer_for(mode, normalizers):
+    """Normalizador por modo ('paragraphs' ou 'lines'), criado sob demanda"""
+    if not mode:
+        return None
+    if mode not in normalizers:
+        from bcb_text_normalizer import TextNormalizer
+        normalizers[mode] = TextNormalizer(paragraphs=mode == 'paragraphs')
+    return normalizers[mode]
+
+
+def _run_guarded(job, normalizers, boilerplate):
+    """Nunca propaga exceção, para quem aplica o resultado saber qual job falhou"""
+    try:
+        return postprocess(job, normalizers, boilerplate)
+    except Exception as e:
+        return {'tipo': job.get('tipo', job.get('snapshot')), 'numero': job.get('numero'), 'ok': False,
+                'shingles': None, 'error': repr(e), 'elapsed': 0.0}
+
+
+def _run_in_worker(job):
+    """Entrada do pool"""
+    return _run_guarded(job, _worker_state['normalizers'], _worker_state['boilerplate'])
+
+
+class PostProcessingPipeline:
+    """Estágio de pós-processamento desacoplado do navegador.
+
+    Com workers=0 tudo roda na própria thread (comportamento anterior); com
+    workers>0 a thread do navegador só entrega o texto bruto, o trabalho de CPU
+    vai para um ProcessPoolExecutor e uma thread coletora aplica os resultados
+    (rename em lote, histórico, modelo de boilerplate). A fila é limitada a
+    max_pending documentos para o navegador não acumular texto na memória.
+    """
+
+    def __init__(self, writer, history=None, boilerplate=None, workers=0, max_pending=None, changes=None):
+        self.writer = writer
+        self.history = history
+        # ChangeDetector (bcb_changes): feed de mudanças por artigo
+        self.changes = changes
+        self.boilerplate = boilerplate
+        self.workers = workers
+        self.normalizers = {}
+        self.results = Counter()
+        self.failures = []
+        self.submitted = 0
+
+        # Tempo ocupado por estágio; o ocioso é o restante do tempo de parede
+        self.busy = Counter()
+        self.started = time.perf_counter()
+        self._last_handoff = self.started
+
+        if boilerplate is not None:
+            # O que é removido fica fixo durante a execução; o aprendizado vale na próxima
+            boilerplate.freeze()
+
+        self.executor = None
+        if workers:
+            # Os processos do pool carregam o modelo salvo em disco
+            model_file = None
+            if boilerplate is not None:
+                boilerplate.save()
+                model_file = boilerplate.model_file
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                initargs=(model_file,))
+            self.slots = threading.BoundedSemaphore(max_pending or 2 * workers)
+            self.completed = queue.Queue()
+            self.collector = threading.Thread(target=self._collect, daemon=True)
+            self.collector.start()
+
+    def submit(self, layout, tipo, numero, text, data=None, url=None, assunto=None,
+               normalize=None, boilerplate=False, min_length=0):
+        """Entrega o texto bruto; devolve o resultado (modo síncrono) ou True se enfileirado"""
+        return self._dispatch({
+            'layout': layout, 'tipo': tipo, 'numero': numero, 'text': text,
+            'data': data, 'url': url, 'assunto': assunto,
+            'accessed': time.strftime('%d/%m/%Y %H:%M:%S'),
+            'normalize': normalize, 'boilerplate': boilerplate, 'min_length': min_length,
+        })
+
+    def submit_snapshot(self, path):
+        """Entrega um snapshot salvo (bcb_snapshots) para reextração"""
+        return self._dispatch({'snapshot': path})
+
+    def _dispatch(self, job):
+        handoff = time.perf_counter()
+        self.busy['navegador'] += handoff - self._last_handoff
+        job.update(output_dir=self.writer.output_dir, file_mode=self.writer.file_mode)
+        self.submitted += 1
+
+        if self.executor is None:
+            result = _run_guarded(job, self.normalizers, self.boilerplate)
+            self._apply(result)
+            self.busy['pos_processamento'] += result['elapsed']
+            # Síncrono: o pós-processamento ocupa a própria thread do navegador
+            self._last_handoff = handoff
+            return result['ok']
+
+        # Fila cheia: o navegador espera (conta como tempo ocioso do estágio)
+        job['sync'] = True
+        self.slots.acquire()
+        self._last_handoff = time.perf_counter()
+
+        future = self.executor.submit(_run_in_worker, job)
+        future.add_done_callback(self.completed.put)
+        return True
+
+    def _collect(self):
+        """Thread coletora: aplica os resultados na ordem em que ficam prontos"""
+        while True:
+            future = self.completed.get()
+            started = time.perf_counter()
+            if future is None:
+                return
+
+            try:
+                result = future.result()
+            except Exception as e:
+                # Processo do pool morreu (BrokenProcessPool)
+                result = {'tipo': '?', 'numero': '?', 'ok': False, 'shingles': None,
+                          'error': repr(e), 'elapsed': 0.0}
+            try:
+                self._apply(result)
+            except Exception as e:
+                logging.error(f"Erro ao gravar {result['tipo']} nro. {result['numero']}: {e}")
+            finally:
+                self.busy['pos_processamento'] += result['elapsed']
+                self.busy['coletor'] += time.perf_counter() - started
+                self.slots.release()
+
+    def _apply(self, result):
+        """Enfileira a gravação, registra o histórico e conta o documento no modelo"""
+        if result.get('shingles') is not None:
+            self.boilerplate.add_shingles(result['shingles'])
+
+        if not result['ok']:
+            self.results['failed'] += 1
+            self.failures.append((result['tipo'], result['numero'], result.get('error')))
+            logging.error(f"Pós-processamento falhou para {result['tipo']} nro. {result['numero']}: "
+                          f"{result.get('error')}")
+            return
+
+        self.writer.stage(result['entry'])
+        if self.history is not None:
+            # Registrar a versão no histórico (só grava delta se mudou)
+            self.history.record(result['tipo'], result['numero'], result['content'], fetched_at=result['fetched_at'])
+        if self.changes is not None:
+            self.changes.observe(result['tipo'], result['numero'], result['content'])
+        self.results['ok'] += 1
+        # A gravação só se completa no flush do lote (o writer registra "Lote ... persistido")
+        logging.info(f"Enfileirado para gravação: {result['entry']['filename']}")
+
+    def pending(self):
+        """Documentos entregues e ainda não gravados (profundidade da fila do estágio)"""
+        return self.submitted - self.results['ok'] - self.results['failed']
+
+    def utilization(self):
+        """Tempo ocupado/ocioso (s) e fração ocupada de cada estágio"""
+        wall = time.perf_counter() - self.started
+        capacity = {'navegador': wall, 'pos_processamento': wall * max(self.workers, 1), 'coletor': wall}
+        report = {}
+        for stage, total in capacity.items():
+            if stage == 'coletor' and not self.executor:
+                continue
+            busy = self.busy[stage]
+            report[stage] = {'busy': busy, 'idle': max(total - busy, 0.0),
+                             'fraction': busy / total if total else 0.0}
+        return report
+
+    def close(self):
+        """Espera o pool esvaziar, persiste o lote e devolve a utilização"""
+        if self.executor is not None:
+            self.busy['navegador'] += time.perf_counter() - self._last_handoff
+            self._last_handoff = time.perf_counter()
+            self.executor.shutdown(wait=True)
+            self.completed.put(None)
+            self.collector.join()
+            self.executor = None
+        self.writer.flush()
+        if self.changes is not None:
+            self.changes.save()
+        return self.utilization()
+
+    def print_report(self, utilization=None):
+        """Relatório de utilização por estágio"""
+        utilization = utilization or self.utilization()
+        print(f"\n=== UTILIZAÇÃO DO PIPELINE ({self.workers or 'sem'} processos) ===")
+        for stage, numbers in utilization.items():
+            print(f"{stage:>18}: ocupado {numbers['busy']:8.1f}s ({numbers['fraction']:5.1%}), "
+                  f"ocioso {numbers['idle']:8.1f}s")
+        print(f"Pós-processados: {self.results['ok']}, falhas: {self.results['failed']}")
+
+
+def default_workers():
+    """Processos de pós-processamento: um núcleo fica para o navegador"""
+    return max(1, (os.cpu_count() or 2) - 1)
@@ -0,0 +1,429 @@
+import re
+import sys
+import gzip
+import json
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from bcb_corpus_reader import CorpusReader, PackedCorpusReader, split_articles, split_paragraphs
+from bcb_identity import canonical_key, canonical_numero
+
+
+# Respostas menores que isso não compensam o gzip
+GZIP_MIN_BYTES = 512
+
+# Remoção de acentos que preserva as posições (um caractere vira um caractere),
+# para que os trechos da busca possam ser recortados do texto original
+_FOLD_TABLE = {}
+for _code in range(0xC0, 0x250):
+    _base = ''.join(c for c in unicodedata.normalize('NFKD', chr(_code)) if not unicodedata.combining(c))
+    if len(_base) == 1 and _base != chr(_code):
+        _FOLD_TABLE[_code] = _base
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def fold(text):
+    """Minúsculas sem acentos, com o mesmo comprimento do texto original"""
+    return text.translate(_FOLD_TABLE).lower()
+
+
+class CachedResponse:
+    """Resposta já serializada: corpo, versão gzip e ETag de cada uma"""
+
+    __slots__ = ('status', 'body', 'gzipped', 'etag', 'gzip_etag', 'content_type')
+
+    def __init__(self, status, payload, content_type='application/json; charset=utf-8'):
+        if isinstance(payload, bytes):
+            body = payload
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.status = status
+        self.body = body
+        self.gzipped = gzip.compress(body, 6) if len(body) >= GZIP_MIN_BYTES else None
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        # A versão gzip é outra representação: ETag próprio (RFC 9110, 8.8.3)
+        self.gzip_etag = self.etag[:-1] + '-gz"'
+        self.content_type = content_type
+
+    @property
+    def size(self):
+        return len(self.body) + len(self.gzipped or b'')
+
+
+class ResponseCache:
+    """LRU em memória com limite em bytes (corpo + gzip)"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            response = self._entries.get(key)
+            if response is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key, response):
+        size = response.size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous.size
+            self._entries[key] = response
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.size
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CorpusIndex:
+    """Índice em memória do corpus: chave (tipo, numero) e busca textual"""
+
+    def __init__(self, source='normativos_txt'):
+        self.documents = []
+        self._by_key = {}
+        self._postings = defaultdict(list)
+
+        if source.endswith('.pack'):
+            self.reader = PackedCorpusReader(source)
+            for position, (_, meta) in enumerate(self.reader.headers()):
+                self._add(meta, position)
+        else:
+            self.reader = CorpusReader(source)
+            for path, meta in self.reader.headers():
+                self._add(meta, path)
+
+        logging.info(f"Índice carregado: {len(self.documents)} documentos, {len(self._postings)} termos")
+
+    def _add(self, meta, handle):
+        """Registra um documento e indexa os termos do corpo"""
+        if 'tipo' not in meta or 'numero' not in meta:
+            return
+        doc_id = len(self.documents)
+        self.documents.append((meta, handle))
+        self._by_key[canonical_key(meta['tipo'], meta['numero'])] = doc_id
+        for token in set(_TOKEN_RE.findall(fold(self.text(doc_id)))):
+            self._postings[token].append(doc_id)
+
+    def text(self, doc_id):
+        """Corpo do documento, lido do mmap (sem cópia do arquivo inteiro)"""
+        handle = self.documents[doc_id][1]
+        if isinstance(self.reader, PackedCorpusReader):
+            return self.reader.text(handle)
+        return bytes(self.reader.body(handle)).decode('utf-8', errors='replace')
+
+    def find(self, tipo, numero):
+        """Documento pelo (tipo, numero) em qualquer grafia; None se não existir"""
+        return self._by_key.get(canonical_key(tipo, numero))
+
+    def search(self, query, limit=20):
+        """Documentos que contêm todos os termos (sem acento/caixa), com trecho"""
+        terms = _TOKEN_RE.findall(fold(query))
+        if not terms:
+            return 0, []
+        postings = sorted((self._postings.get(term, []) for term in set(terms)), key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches.intersection_update(posting)
+            if not matches:
+                break
+
+        results = []
+        for doc_id in sorted(matches)[:limit]:
+            results.append({**self.summary(doc_id), 'trecho': self._snippet(doc_id, terms[0])})
+        return len(matches), results
+
+    def _snippet(self, doc_id, term, width=160):
+        """Trecho do texto original em volta da primeira ocorrência do termo"""
+        text = self.text(doc_id)
+        match = re.search(r'\b' + re.escape(term) + r'\b', fold(text))
+        if not match:
+            return ''
+        start = max(match.start() - width // 2, 0)
+        return ' '.join(text[start:start + width].split())
+
+    def summary(self, doc_id):
+        """Campos do cabeçalho devolvidos pela API"""
+        meta = self.documents[doc_id][0]
+        return {
+            'tipo': meta['tipo'],
+            'numero': canonical_numero(meta['numero']),
+            'data': meta.get('data') or meta.get('data_acesso'),
+            'url': meta.get('url'),
+            'assunto': meta.get('assunto'),
+        }
+
+    def close(self):
+        self.reader.close()
+
+
+class ServiceMetrics:
+    """Contadores expostos em /metrics (formato texto do Prometheus)"""
+
+    def __init__(self):
+        self.requests = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self.response_bytes = 0
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, status, elapsed, sent):
+        with self._lock:
+            self.requests[(endpoint, status)] += 1
+            self.seconds[endpoint] += elapsed
+            self.response_bytes += sent
+
+    def render(self, cache, index):
+        with self._lock:
+            lines = ['# TYPE bcb_requests_total counter']
+            for (endpoint, status), count in sorted(self.requests.items()):
+                lines.append(f'bcb_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+            lines.append('# TYPE bcb_request_seconds_sum counter')
+            for endpoint, seconds in sorted(self.seconds.items()):
+                lines.append(f'bcb_request_seconds_sum{{endpoint="{endpoint}"}} {seconds:.6f}')
+            lines.append(f'bcb_response_bytes_total {self.response_bytes}')
+        lines += [
+            f'bcb_cache_hits_total {cache.hits}',
+            f'bcb_cache_misses_total {cache.misses}',
+            f'bcb_cache_evictions_total {cache.evictions}',
+            f'bcb_cache_bytes {cache.current_bytes}',
+            f'bcb_cache_max_bytes {cache.max_bytes}',
+            f'bcb_cache_entries {len(cache)}',
+            f'bcb_documents {len(index.documents)}',
+            f'bcb_uptime_seconds {time.time() - self.started:.0f}',
+        ]
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def _article_path(segments):
+    """'5' -> 'art5'; 'anexo1/5' -> 'anexo1/art5'; aceita também 'art5'"""
+    parts = []
+    for segment in segments:
+        segment = segment.lower()
+        if segment[:1].isdigit():
+            segment = 'art' + segment.upper().replace('ART', '')
+        elif segment.startswith('art'):
+            segment = 'art' + segment[3:].upper()
+        parts.append(segment)
+    return '/'.join(parts)
+
+
+def _paragraph_path(segment):
+    """'2' -> 'par2'; 'unico' -> 'par-unico'"""
+    segment = segment.lower()
+    if segment.isdigit():
+        return 'par' + segment
+    if segment in ('unico', 'único', 'par-unico'):
+        return 'par-unico'
+    return segment
+
+
+class QueryService:
+    """Resolve as rotas da API sobre o índice, com cache das respostas"""
+
+    def __init__(self, index, cache_bytes=64 * 1024 * 1024):
+        self.index = index
+        self.cache = ResponseCache(cache_bytes)
+        self.metrics = ServiceMetrics()
+
+    def respond(self, target):
+        """(endpoint, resposta) para um GET; respostas 200 ficam no cache"""
+        url = urlsplit(target)
+        segments = [unquote(s) for s in url.path.split('/') if s]
+
+        if segments == ['metrics']:
+            body = self.metrics.render(self.cache, self.index)
+            return 'metrics', CachedResponse(200, body, 'text/plain; version=0.0.4')
+
+        endpoint = self._endpoint(segments)
+        cache_key = url.path + ('?' + url.query if url.query else '')
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return endpoint, cached
+
+        status, payload = self._route(endpoint, segments, parse_qs(url.query))
+        response = CachedResponse(status, payload)
+        if status == 200:
+            self.cache.put(cache_key, response)
+        return endpoint, response
+
+    @staticmethod
+    def _endpoint(segments):
+        """Nome da rota usado nas métricas"""
+        if segments[:1] == ['busca']:
+            return 'busca'
+        if segments[:1] == ['normativos']:
+            if len(segments) == 1:
+                return 'lista'
+            if len(segments) == 2:
+                return 'outro'
+            if len(segments) == 3:
+                return 'normativo'
+            if 'paragrafos' in segments:
+                return 'paragrafo'
+            return 'artigo'
+        return 'outro'
+
+    def _route(self, endpoint, segments, query):
+        index = self.index
+        if endpoint == 'lista':
+            return 200, [index.summary(doc_id) for doc_id in range(len(index.documents))]
+
+        if endpoint == 'busca':
+            consulta = query.get('q', [''])[0]
+            try:
+                limit = min(int(query.get('limite', ['20'])[0]), 100)
+            except ValueError:
+                return 400, {'erro': 'limite inválido'}
+            total, results = index.search(consulta, limit)
+            return 200, {'consulta': consulta, 'total': total, 'resultados': results}
+
+        if endpoint == 'outro' or len(segments) < 3:
+            return 404, {'erro': 'rota não encontrada'}
+
+        # Na URL o tipo pode vir com "_" no lugar dos espaços (Resolucao_BCB)
+        tipo, numero = segments[1].replace('_', ' '), segments[2]
+        doc_id = index.find(tipo, numero)
+        if doc_id is None:
+            return 404, {'erro': f"normativo não encontrado: {tipo} {canonical_numero(numero)}"}
+        document = index.summary(doc_id)
+
+        if endpoint == 'normativo':
+            return 200, {**document, 'texto': index.text(doc_id)}
+
+        if segments[3] != 'artigos':
+            return 404, {'erro': 'rota não encontrada'}
+        articles = split_articles(index.text(doc_id))
+        if len(segments) == 4:
+            return 200, {**document, 'artigos': [path for path, _ in articles]}
+
+        rest = segments[4:]
+        paragraph = None
+        if 'paragrafos' in rest:
+            position = rest.index('paragrafos')
+            paragraph = rest[position + 1] if position + 1 < len(rest) else ''
+            rest = rest[:position]
+
+        path = _article_path(rest)
+        article = dict(articles).get(path)
+        if article is None:
+            return 404, {'erro': f"artigo não encontrado: {path}"}
+        if paragraph is None:
+            return 200, {**document, 'artigo': path, 'texto': article}
+
+        paragraph_path = _paragraph_path(paragraph)
+        text = dict(split_paragraphs(article)).get(paragraph_path)
+        if text is None:
+            return 404, {'erro': f"parágrafo não encontrado: {path}/{paragraph_path}"}
+        return 200, {**document, 'artigo': path, 'paragrafo': paragraph_path, 'texto': text}
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """Handler HTTP/1.1 (keep-alive) somente leitura"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'BCBNormativos/1.0'
+
+    def do_GET(self):
+        started = time.perf_counter()
+        service = self.server.service
+        target = self.path
+        if not target.isascii():
+            # Clientes que mandam a URL em UTF-8 sem percent-encoding
+            try:
+                target = target.encode('latin-1').decode('utf-8')
+            except UnicodeError:
+                pass
+        try:
+            endpoint, response = service.respond(target)
+        except Exception:
+            logging.exception(f"Erro ao atender {target}")
+            endpoint, response = 'erro', CachedResponse(500, {'erro': 'erro interno'})
+
+        use_gzip = response.gzipped is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+        etag = response.gzip_etag if use_gzip else response.etag
+        if response.status == 200 and etag in self.headers.get('If-None-Match', ''):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            service.metrics.observe(endpoint, 304, time.perf_counter() - started, 0)
+            return
+
+        body = response.gzipped if use_gzip else response.body
+
+        self.send_response(response.status)
+        self.send_header('Content-Type', response.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if response.status == 200 and endpoint != 'metrics':
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'public, max-age=300')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(body)
+        service.metrics.observe(endpoint, response.status, time.perf_counter() - started, len(body))
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+
+class QueryServer(ThreadingHTTPServer):
+    """Servidor com uma thread por conexão e fila de conexões longa"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, service):
+        self.service = service
+        super().__init__(address, QueryRequestHandler)
+
+
+def serve(source='normativos_txt', host='127.0.0.1', port=8080, cache_bytes=64 * 1024 * 1024):
+    """Carrega o corpus e atende até ser interrompido"""
+    index = CorpusIndex(source)
+    server = QueryServer((host, port), QueryService(index, cache_bytes))
+    logging.info(f"Servindo {len(index.documents)} normativos em http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        index.close()
+
+
+def main():
+    """Serviço HTTP de consulta: python bcb_query_service.py [porta] [diretorio|arquivo.pack]"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+    source = sys.argv[2] if len(sys.argv) > 2 else 'normativos_txt'
+    serve(source, port=port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import sys
+import time
+import logging
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import WebDriverException
+
+from bcb_cdp import process_tree_rss
+
+
+# Página do BCB aberta depois do reinício, para devolver cookies e localStorage ao domínio
+HOME_URL = 'https://www.bcb.gov.br/'
+# Campos de cookie aceitos pelo add_cookie do webdriver
+COOKIE_FIELDS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'expiry', 'sameSite')
+# Tentativas de abrir o navegador novo antes de interromper a execução
+RESTART_ATTEMPTS = 2
+
+
+class BrowserRestartError(RuntimeError):
+    """O navegador foi fechado e não voltou: a execução não pode seguir"""
+
+
+def driver_memory(driver):
+    """RSS (bytes) do navegador e do driver: chromedriver no Selenium, nenhum no CDP"""
+    service = getattr(driver, 'service', None)
+    process = getattr(service, 'process', None)
+    if process is not None:
+        # O Chrome e os renderizadores são filhos do chromedriver
+        total = process_tree_rss(process.pid)
+        own = process_tree_rss(process.pid, recursive=False)
+        if total is None or own is None:
+            return None
+        return {'navegador': total - own, 'driver': own}
+
+    browser = getattr(driver, 'browser', None)
+    if browser is not None:
+        rss = browser.process.rss()
+        return {'navegador': rss, 'driver': 0} if rss is not None else None
+    return None
+
+
+class BrowserRecycler:
+    """Reinicia o navegador a cada N documentos ou quando a memória passa do teto.
+
+    O Chrome acumula memória ao longo de milhares de páginas; o reinício é
+    feito entre um documento e outro, dentro do laço do scraper, então a
+    posição na fila não muda. Cookies e localStorage do BCB são copiados
+    antes de fechar e devolvidos ao navegador novo.
+    """
+
+    def __init__(self, max_documents=500, max_rss_mb=2048, sample_every=5, home_url=HOME_URL):
+        self.max_documents = max_documents
+        self.max_rss = max_rss_mb * 2**20 if max_rss_mb else None
+        self.sample_every = sample_every
+        self.home_url = home_url
+
+        self.documents = 0
+        self.recycles = 0
+        self.peak = {'navegador': 0, 'driver': 0}
+        self.last = None
+
+    def sample(self, driver):
+        """Mede e guarda a memória atual (e o pico da execução)"""
+        memory = driver_memory(driver)
+        if memory is not None:
+            self.last = memory
+            for key, value in memory.items():
+                self.peak[key] = max(self.peak[key], value)
+        return memory
+
+    def reason(self, driver):
+        """Motivo para reiniciar agora (ou None); chamar uma vez por documento"""
+        self.documents += 1
+        if self.max_documents and self.documents >= self.max_documents:
+            return f"{self.documents} documentos"
+        if self.max_rss and self.documents % self.sample_every == 0:
+            memory = self.sample(driver)
+            if memory is not None and sum(memory.values()) > self.max_rss:
+                return f"memória {sum(memory.values()) / 2**20:.0f} MB acima de {self.max_rss / 2**20:.0f} MB"
+        return None
+
+    def _same_site(self, url):
+        return urlparse(url).hostname == urlparse(self.home_url).hostname
+
+    def save_session(self, driver):
+        """Cookies e localStorage do domínio do BCB"""
+        state = {'cookies': [], 'local_storage': {}}
+        try:
+            state['cookies'] = [{key: cookie[key] for key in COOKIE_FIELDS if key in cookie}
+                                for cookie in driver.get_cookies()]
+            if self._same_site(driver.current_url):
+                state['local_storage'] = driver.execute_script("return Object.assign({}, window.localStorage)") or {}
+        except WebDriverException as e:
+            logging.warning(f"Não foi possível copiar a sessão do navegador: {e}")
+        return state
+
+    def restore_session(self, driver, state):
+        """Devolve cookies e localStorage ao navegador novo (precisa estar no domínio)"""
+        if not state['cookies'] and not state['local_storage']:
+            return
+        try:
+            driver.get(self.home_url)
+        except WebDriverException as e:
+            logging.warning(f"Sessão não restaurada (falha ao abrir {self.home_url}): {e}")
+            return
+        restored = 0
+        for cookie in state['cookies']:
+            try:
+                driver.add_cookie(cookie)
+                restored += 1
+            except WebDriverException as e:
+                logging.debug(f"Cookie {cookie.get('name')} não restaurado: {e}")
+        stored = 0
+        for key, value in state['local_storage'].items():
+            try:
+                driver.execute_script("window.localStorage.setItem(arguments[0], arguments[1])", key, value)
+                stored += 1
+            except WebDriverException as e:
+                logging.debug(f"Chave {key} do localStorage não restaurada: {e}")
+        logging.info(f"Sessão restaurada: {restored} cookies, {stored} chaves de localStorage")
+
+    def maybe_recycle(self, driver, restart):
+        """Reinicia se preciso (restart() fecha o driver atual e devolve o novo); True se reiniciou"""
+        reason = self.reason(driver)
+        if reason is None:
+            return False
+
+        before = self.sample(driver)
+        state = self.save_session(driver)
+        started = time.monotonic()
+        driver = self._restart(restart, reason)
+        self.restore_session(driver, state)
+
+        self.recycles += 1
+        self.documents = 0
+        after = self.sample(driver)
+        logging.info(f"Navegador reiniciado ({reason}) em {time.monotonic() - started:.1f}s; "
+                     f"memória {_mb(before)} -> {_mb(after)}")
+        return True
+
+    def _restart(self, restart, reason):
+        """Chama restart() com uma nova tentativa; sem navegador, BrowserRestartError"""
+        for attempt in range(1, RESTART_ATTEMPTS + 1):
+            try:
+                driver = restart()
+            except Exception as e:
+                logging.warning(f"Falha ao reiniciar o navegador ({reason}), "
+                                f"tentativa {attempt}/{RESTART_ATTEMPTS}: {e}")
+                continue
+            if driver is not None:
+                return driver
+            logging.warning(f"Reinício do navegador ({reason}) não devolveu driver, "
+                            f"tentativa {attempt}/{RESTART_ATTEMPTS}")
+        raise BrowserRestartError(f"Navegador não reabriu após {RESTART_ATTEMPTS} tentativas ({reason}); "
+                                  f"execução interrompida")
+
+    def summary(self):
+        """Reinícios e picos de memória da execução"""
+        return {
+            'reinicios': self.recycles,
+            'pico_navegador_mb': self.peak['navegador'] / 2**20,
+            'pico_driver_mb': self.peak['driver'] / 2**20,
+        }
+
+
+def _mb(memory):
+    return f"{sum(memory.values()) / 2**20:.0f} MB" if memory else "?"
+
+
+def main():
+    """Mostra a memória de um processo e descendentes: pid"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if len(sys.argv) < 2:
+        print("Uso: python bcb_recycling.py <pid do chromedriver ou do Chrome>")
+        return
+    pid = int(sys.argv[1])
+    total = process_tree_rss(pid)
+    own = process_tree_rss(pid, recursive=False)
+    if total is None:
+        print(f"Processo {pid} não encontrado")
+        return
+    print(f"Processo: {own / 2**20:.0f} MB, com descendentes: {total / 2**20:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import sys
+import math
+import heapq
+import logging
+import itertools
+from pathlib import Path
+from datetime import date, datetime
+
+from bcb_catalog import NO_DATE, parse_date
+from bcb_identity import (canonical_key, canonical_numero, canonical_tipo, display_numero, document_url,
+                          find_references, parse_reference)
+from bcb_storage import parse_document
+
+
+# Peso de cada sinal na prioridade (cada sinal vai de 0 a 1)
+DEFAULT_WEIGHTS = {'recencia': 0.5, 'desatualizacao': 0.3, 'citacoes': 0.2}
+# Um normativo publicado há RECENCY_HALF_LIFE dias vale metade de um publicado hoje
+RECENCY_HALF_LIFE = 365
+# Dias desde a última busca para a desatualização chegar ao máximo
+STALE_DAYS = 30
+# Citações recebidas que já dão o peso máximo
+CITATION_CAP = 50
+# Pinos ficam à frente de qualquer combinação de sinais
+PIN_BONUS = 10.0
+
+
+class ScrapeScheduler:
+    """Fila de prioridade (heap) dos documentos a buscar.
+
+    A prioridade soma três sinais ponderados: recência da publicação,
+    tempo desde a última busca (nunca buscado conta como o máximo) e
+    citações recebidas de outros normativos; documentos fixados pelo usuário
+    vão na frente. Quando uma busca revela novas citações, a prioridade dos
+    citados é recalculada e uma nova entrada vai para o heap; a antiga fica
+    lá e é descartada ao sair (remoção preguiçosa), então cada mudança custa
+    O(log n).
+    """
+
+    def __init__(self, history=None, pins=(), weights=None, follow_citations=False, today=None):
+        self.history = history
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.follow_citations = follow_citations
+        self.today = (today or date.today()).toordinal()
+        self.now = datetime.now()
+
+        self.pins = {canonical_key(tipo, numero) for tipo, numero in pins}
+        self.rows = {}
+        self.citations = {}
+        # Citantes já contados por citado: a mesma fonte buscada de novo não conta duas vezes
+        self._cited_by = {}
+        self._priority = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self.done = set()
+        self.discovered = 0
+
+    def __len__(self):
+        return len(self._priority)
+
+    def __iter__(self):
+        while True:
+            row = self.pop()
+            if row is None:
+                return
+            yield row
+
+    def _staleness(self, row):
+        if self.history is None:
+            return 1.0
+        fetched_at = self.history.last_fetch(row['tipo'], row['numero'])
+        if fetched_at is None:
+            return 1.0
+        days = (self.now - datetime.fromisoformat(fetched_at)).total_seconds() / 86400
+        return min(max(days, 0) / STALE_DAYS, 1.0)
+
+    def priority(self, key):
+        """Prioridade atual do documento (maior sai primeiro)"""
+        row = self.rows[key]
+        published = parse_date(row.get('data'))
+        # Sem data (ex.: descoberto por citação): recência neutra
+        recency = 0.5 if published == NO_DATE else 0.5 ** (max(self.today - published, 0) / RECENCY_HALF_LIFE)
+        citations = math.log1p(self.citations.get(key, 0)) / math.log1p(CITATION_CAP)
+        score = (self.weights['recencia'] * recency
+                 + self.weights['desatualizacao'] * row['_desatualizacao']
+                 + self.weights['citacoes'] * min(citations, 1.0))
+        return score + PIN_BONUS if key in self.pins else score
+
+    def _push(self, key):
+        priority = self.priority(key)
+        self._priority[key] = priority
+        heapq.heappush(self._heap, (-priority, next(self._counter), key))
+
+    def add(self, row):
+        """Enfileira uma linha do catálogo (dict com tipo, numero, data...); False se já conhecida"""
+        key = canonical_key(row['tipo'], row['numero'])
+        if key in self.rows:
+            return False
+        row = dict(row)
+        row['_desatualizacao'] = self._staleness(row)
+        self.rows[key] = row
+        self._push(key)
+        return True
+
+    def pin(self, tipo, numero):
+        """Coloca o documento à frente da fila"""
+        key = canonical_key(tipo, numero)
+        self.pins.add(key)
+        if key in self._priority:
+            self._push(key)
+
+    def cite(self, source, cited):
+        """Conta a citação source -> cited e reprioriza o citado se ainda estiver na fila"""
+        if source == cited:
+            return
+        sources = self._cited_by.setdefault(cited, set())
+        if source in sources:
+            return
+        sources.add(source)
+        self.citations[cited] = self.citations.get(cited, 0) + 1
+        if cited in self._priority:
+            self._push(cited)
+
+    def observe(self, row, text):
+        """Citações de um documento recém-buscado; com follow_citations, enfileira citados fora da fila"""
+        source = canonical_key(row['tipo'], row['numero'])
+        for cited in find_references(text):
+            self.cite(source, cited)
+            if self.follow_citations and cited not in self.rows:
+                tipo, numero = cited.split('|', 1)
+                self.add({'tipo': tipo, 'numero': display_numero(numero), 'data': None, 'assunto': '',
+                          'url_bcb': document_url(tipo, numero)})
+                self.discovered += 1
+                logging.info(f"Descoberto por citação: {tipo} nro. {display_numero(numero)}")
+
+    def load_citations(self, input_dir='normativos_txt'):
+        """Conta as citações entre os documentos já salvos"""
+        for path in sorted(Path(input_dir).glob('*.txt')):
+            meta, body = parse_document(path.read_text(encoding='utf-8', errors='replace'))
+            if 'tipo' in meta and 'numero' in meta:
+                source = canonical_key(meta['tipo'], meta['numero'])
+                for cited in find_references(body):
+                    self.cite(source, cited)
+
+    def pop(self):
+        """Próxima linha (a de maior prioridade) ou None com a fila vazia"""
+        while self._heap:
+            negative, _, key = heapq.heappop(self._heap)
+            # Entrada antiga de um documento repriorizado ou já entregue
+            if self._priority.get(key) != -negative:
+                continue
+            del self._priority[key]
+            self.done.add(key)
+            row = dict(self.rows[key])
+            row['prioridade'] = -negative
+            del row['_desatualizacao']
+            return row
+        return None
+
+    def preview(self, limit=20):
+        """Próximos documentos na ordem da fila, sem retirá-los"""
+        return [(self.rows[key], priority) for key, priority in
+                sorted(self._priority.items(), key=lambda item: -item[1])[:limit]]
+
+
+def parse_pin(text):
+    """Pino da linha de comando: 'Resolucao BCB|501' ou 'Resolução BCB nº 501'"""
+    if '|' in text:
+        tipo, numero = text.split('|', 1)
+        return canonical_tipo(tipo), canonical_numero(numero)
+    reference = parse_reference(text)
+    if reference is None:
+        raise ValueError(f"pino não reconhecido: {text}")
+    return reference
+
+
+def main():
+    """Mostra a ordem de busca: [csv] [saída] [pinos...]"""
+    import csv
+    from bcb_history import HistoryStore
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else 'normativos_spb_bcb.csv'
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else 'normativos_txt'
+    scheduler = ScrapeScheduler(history=HistoryStore(), pins=[parse_pin(pin) for pin in sys.argv[3:]])
+    scheduler.load_citations(output_dir)
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            scheduler.add(row)
+
+    print(f"{'prioridade':>10} {'citações':>8}  documento")
+    for row, priority in scheduler.preview(len(scheduler)):
+        key = canonical_key(row['tipo'], row['numero'])
+        print(f"{priority:10.3f} {scheduler.citations.get(key, 0):8d}  {row['tipo']} nro. {row['numero']} ({row['data']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import os
+import sys
+import gzip
+import json
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+
+try:
+    import zstandard
+except ImportError:  # zstd é opcional; sem ele os snapshots usam gzip
+    zstandard = None
+
+from bcb_extraction import accept_catalog_text, find_catalog_content, find_url_content
+
+
+def _element_text(element):
+    """Texto do elemento com quebras de linha entre blocos (como o .text do Selenium)"""
+    return '\n'.join(line.strip() for line in element.get_text('\n').split('\n') if line.strip())
+
+
+def extract_text(html, layout='url'):
+    """Roda sobre o HTML salvo a mesma extração dos scrapers (bcb_extraction); texto bruto ou None"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    for element in soup(['script', 'style', 'noscript']):
+        element.decompose()
+
+    if layout == 'catalog':
+        candidates = lambda: soup.find_all(['body', 'main', 'article', 'section', 'div'])
+        element = find_catalog_content(soup.select, candidates, _element_text)
+        if element is None:
+            return None
+        text = _element_text(element)
+        return text if accept_catalog_text(text) else None
+
+    element = find_url_content(soup.select_one, _element_text, lambda: soup.body or soup)
+    return _element_text(element) or None
+
+
+def load_snapshot(path):
+    """Registro completo (metadados + html) de um snapshot"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("Snapshot comprimido com zstd; instale o pacote zstandard")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        data = gzip.decompress(data)
+    return json.loads(data)
+
+
+def snapshot_job(job):
+    """Job de pós-processamento a partir de um snapshot (roda no processo do pool)"""
+    record = load_snapshot(job['snapshot'])
+    layout = record.get('layout', 'url')
+    fetched_at = datetime.fromisoformat(record['fetched_at'])
+    fields = record.get('campos')
+    if fields is not None:
+        # Snapshot da resposta da API (bcb_network_capture): o HTML já é só o normativo
+        from bcb_network_capture import html_text
+        text = html_text(record['html'])
+    else:
+        text = extract_text(record['html'], layout)
+    return {
+        **job,
+        'layout': layout,
+        'tipo': record['tipo'],
+        'numero': record['numero'],
+        'data': record.get('data') or (fields or {}).get('data'),
+        'url': record['url'],
+        'assunto': record.get('assunto') or (fields or {}).get('assunto') or '',
+        'accessed': fetched_at.strftime('%d/%m/%Y %H:%M:%S'),
+        # O histórico registra a versão na data da busca original, não na da reextração
+        'fetched_at': record['fetched_at'],
+        'text': text,
+        # Mesmas opções dos scrapers que gravam cada layout
+        'normalize': 'paragraphs' if layout == 'catalog' else None,
+        'boilerplate': True,
+        'min_length': 500 if layout == 'catalog' else 0,
+    }
+
+
+class SnapshotCache:
+    """HTML renderizado de cada busca, comprimido, por URL e data da busca"""
+
+    def __init__(self, cache_dir='page_snapshots', ttl_days=30, level=6):
+        self.cache_dir = cache_dir
+        self.ttl = timedelta(days=ttl_days)
+        self.level = level
+        Path(self.cache_dir).mkdir(parents=True, exist_ok=True)
+
+    def _url_dir(self, url):
+        """Diretório de uma URL: dois níveis pelo hash para não lotar uma pasta"""
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest)
+
+    def _compress(self, data):
+        if zstandard is not None:
+            return '.zst', zstandard.ZstdCompressor(level=self.level).compress(data)
+        return '.gz', gzip.compress(data, self.level)
+
+    def put(self, url, html, fetched_at=None, **meta):
+        """Guarda o snapshot com os campos necessários para refazer a gravação"""
+        fetched_at = fetched_at or datetime.now()
+        record = {'url': url, 'fetched_at': fetched_at.isoformat(timespec='seconds'), **meta, 'html': html}
+        suffix, payload = self._compress(json.dumps(record, ensure_ascii=False).encode('utf-8'))
+
+        url_dir = self._url_dir(url)
+        Path(url_dir).mkdir(parents=True, exist_ok=True)
+        path = os.path.join(url_dir, fetched_at.strftime('%Y%m%dT%H%M%S') + '.json' + suffix)
+        fd, temp_path = tempfile.mkstemp(prefix='.snapshot.', suffix='.tmp', dir=url_dir)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(temp_path, path)
+        return path
+
+    def load(self, path):
+        """Registro completo (metadados + html) de um snapshot"""
+        return load_snapshot(path)
+
+    def snapshots(self, url):
+        """Snapshots de uma URL, do mais antigo ao mais recente"""
+        url_dir = Path(self._url_dir(url))
+        if not url_dir.exists():
+            return []
+        return sorted(str(p) for p in url_dir.glob('*.json.*'))
+
+    def latest_paths(self):
+        """Snapshot mais recente de cada URL"""
+        for url_dir in sorted(Path(self.cache_dir).glob('*/*')):
+            paths = sorted(url_dir.glob('*.json.*'))
+            if paths:
+                yield str(paths[-1])
+
+    def evict(self, now=None):
+        """Remove snapshots mais velhos que o TTL, mantendo sempre o último de cada URL"""
+        cutoff = ((now or datetime.now()) - self.ttl).strftime('%Y%m%dT%H%M%S')
+        removed = 0
+        for url_dir in Path(self.cache_dir).glob('*/*'):
+            paths = sorted(url_dir.glob('*.json.*'))
+            for path in paths[:-1]:
+                if path.name.split('.', 1)[0] < cutoff:
+                    path.unlink()
+                    removed += 1
+        if removed:
+            logging.info(f"{removed} snapshots expirados removidos")
+        return removed
+
+    def stats(self):
+        """Quantidade de URLs, snapshots e bytes em disco"""
+        urls = snapshots = size = 0
+        for url_dir in Path(self.cache_dir).glob('*/*'):
+            urls += 1
+            for path in url_dir.glob('*.json.*'):
+                snapshots += 1
+                size += path.stat().st_size
+        return {'urls': urls, 'snapshots': snapshots, 'bytes': size}
+
+
+def reextract(cache=None, output_dir='normativos_txt', workers=None):
+    """Refaz extração e gravação a partir dos snapshots, sem rede, em paralelo"""
+    from bcb_boilerplate import BoilerplateModel
+    from bcb_history import HistoryStore
+    from bcb_output_writer import AtomicOutputWriter
+    from bcb_postprocess import PostProcessingPipeline, default_workers
+
+    cache = cache or SnapshotCache()
+    writer = AtomicOutputWriter(output_dir)
+    pipeline = PostProcessingPipeline(writer, HistoryStore(), BoilerplateModel(),
+                                      workers=default_workers() if workers is None else workers)
+
+    submitted = 0
+    for path in cache.latest_paths():
+        # Só o caminho vai para o pool; leitura, parse do HTML e extração rodam lá
+        pipeline.submit_snapshot(path)
+        submitted += 1
+
+    utilization = pipeline.close()
+    writer.close()
+    pipeline.boilerplate.save()
+    logging.info(f"{submitted} snapshots reprocessados: {dict(pipeline.results)}")
+    pipeline.print_report(utilization)
+    return pipeline.results
+
+
+def main():
+    """reextract [saida] [processos] | evict | stats"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    cache = SnapshotCache()
+    if command == 'reextract':
+        output_dir = sys.argv[2] if len(sys.argv) > 2 else 'normativos_txt'
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        reextract(cache, output_dir, workers)
+    elif command == 'evict':
+        print(f"{cache.evict()} snapshots removidos")
+    elif command == 'stats':
+        print(cache.stats())
+    else:
+        print("Uso: python bcb_snapshots.py reextract [saida] [processos] | evict | stats")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import os
+import re
+import sys
+import json
+import zlib
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+from bcb_output_writer import AtomicOutputWriter
+from bcb_identity import canonical_key, canonical_numero, canonical_tipo, display_numero
+
+try:
+    import zstandard
+except ImportError:  # zstd é opcional; sem ele os blobs novos usam zlib
+    zstandard = None
+
+
+HEADER_SEPARATOR = "=" * 80
+
+
+def parse_document(text):
+    """Separa cabeçalho e corpo nos dois formatos gravados pelos scrapers"""
+    meta = {}
+    lines = text.split('\n')
+
+    if lines and lines[0].startswith('# '):
+        # Formato do BCBNormativesScraperFinal: "# Tipo nro. N"
+        match = re.match(r'# (.+?) nro\. (.+)', lines[0])
+        if match:
+            meta['tipo'], meta['numero'] = match.group(1).strip(), match.group(2).strip()
+        body_start = 1
+        for i, line in enumerate(lines[1:], start=1):
+            if line.startswith('# ====='):
+                body_start = i + 1
+                break
+            if line.startswith('# Data de acesso:'):
+                meta['data_acesso'] = line.split(':', 1)[1].strip()
+            elif line.startswith('# Data:'):
+                meta['data'] = line.split(':', 1)[1].strip()
+            elif line.startswith('# Assunto:'):
+                meta['assunto'] = line.split(':', 1)[1].strip()
+        return meta, '\n'.join(lines[body_start:]).lstrip('\n')
+
+    fields = {'Tipo': 'tipo', 'Número': 'numero', 'Data': 'data', 'URL': 'url'}
+    for i, line in enumerate(lines[:10]):
+        if line.startswith('====='):
+            if not meta:
+                # Linha de '=' em texto sem campos de cabeçalho é do próprio corpo
+                break
+            return meta, '\n'.join(lines[i + 1:]).lstrip('\n')
+        name, sep, value = line.partition(':')
+        if sep and name in fields:
+            meta[fields[name]] = value.strip()
+
+    # Sem cabeçalho reconhecido: todo o texto é corpo
+    return {}, text
+
+
+def compose_document(tipo, numero, data, url, body):
+    """Monta o texto no formato Tipo:/Número:/Data:/URL: do normativos_txt"""
+    return (
+        f"Tipo: {tipo}\n"
+        f"Número: {numero}\n"
+        f"Data: {data}\n"
+        f"URL: {url}\n"
+        + HEADER_SEPARATOR + "\n\n"
+        + body
+    )
+
+
+class CorpusStore:
+    """Armazenamento endereçado por conteúdo, comprimido em um único pack"""
+
+    PACK_NAME = 'corpus.pack'
+    INDEX_NAME = 'corpus_index.json'
+
+    def __init__(self, store_dir='normativos_store', level=10):
+        self.store_dir = store_dir
+        self.level = level
+        self.pack_path = os.path.join(store_dir, self.PACK_NAME)
+        self.index_path = os.path.join(store_dir, self.INDEX_NAME)
+
+        Path(self.store_dir).mkdir(parents=True, exist_ok=True)
+        self.index = {'blobs': {}, 'documents': {}}
+        self._load_index()
+
+    def _load_index(self):
+        """Carrega o índice de blobs e documentos"""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            self.index = json.load(f)
+
+    def _save_index(self):
+        """Grava o índice de forma atômica"""
+        fd, temp_path = tempfile.mkstemp(prefix='.index.', suffix='.tmp', dir=self.store_dir)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, self.index_path)
+
+    def _compress(self, data):
+        """Comprime com zstd quando disponível, senão zlib"""
+        if zstandard is not None:
+            return 'zstd', zstandard.ZstdCompressor(level=self.level).compress(data)
+        return 'zlib', zlib.compress(data, 9)
+
+    def _decompress(self, codec, data):
+        """Descomprime um blob conforme o codec gravado no índice"""
+        if codec == 'zstd':
+            if zstandard is None:
+                raise RuntimeError("Blob comprimido com zstd; instale o pacote zstandard")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    def _append_blob(self, digest, data):
+        """Acrescenta um blob ao pack, se ainda não existir"""
+        if digest in self.index['blobs']:
+            return False
+
+        codec, compressed = self._compress(data)
+        with open(self.pack_path, 'ab') as f:
+            offset = f.tell()
+            f.write(compressed)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.index['blobs'][digest] = {
+            'offset': offset,
+            'length': len(compressed),
+            'size': len(data),
+            'codec': codec,
+        }
+        return True
+
+    def read_blob(self, digest):
+        """Lê e descomprime um blob do pack"""
+        entry = self.index['blobs'][digest]
+        with open(self.pack_path, 'rb') as f:
+            f.seek(entry['offset'])
+            data = f.read(entry['length'])
+        return self._decompress(entry['codec'], data)
+
+    def put(self, tipo, numero, body, data=None, url=None, assunto=None, fetched_at=None, save=True):
+        """Guarda uma versão do documento; conteúdo idêntico não é duplicado"""
+        raw = body.encode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+        key = canonical_key(tipo, numero)
+
+        document = self.index['documents'].setdefault(key, {
+            'tipo': canonical_tipo(tipo),
+            'numero': canonical_numero(numero),
+            'versions': [],
+        })
+
+        versions = document['versions']
+        if versions and versions[-1]['sha256'] == digest:
+            logging.info(f"Conteúdo inalterado para {key}, versão {versions[-1]['version']} mantida")
+            return versions[-1]
+
+        self._append_blob(digest, raw)
+        version = {
+            'version': len(versions) + 1,
+            'sha256': digest,
+            'data': data,
+            'url': url,
+            'assunto': assunto,
+            'fetched_at': fetched_at or datetime.now().isoformat(timespec='seconds'),
+        }
+        versions.append(version)
+        if save:
+            self._save_index()
+
+        logging.info(f"Armazenado {key} versão {version['version']} ({len(raw)} bytes)")
+        return version
+
+    def versions(self, tipo, numero):
+        """Lista as versões conhecidas de um documento"""
+        document = self.index['documents'].get(canonical_key(tipo, numero))
+        return list(document['versions']) if document else []
+
+    def get(self, tipo, numero, version=None):
+        """Retorna o corpo do documento (última versão por padrão)"""
+        versions = self.versions(tipo, numero)
+        if not versions:
+            return None
+        entry = versions[-1] if version is None else versions[version - 1]
+        return self.read_blob(entry['sha256']).decode('utf-8')
+
+    def __contains__(self, item):
+        tipo, numero = item
+        return canonical_key(tipo, numero) in self.index['documents']
+
+    def import_directory(self, input_dir='normativos_txt'):
+        """Importa os .txt soltos gerados pelos scrapers"""
+        imported = 0
+        for filepath in sorted(Path(input_dir).glob('*.txt')):
+            meta, body = parse_document(filepath.read_text(encoding='utf-8'))
+            if 'tipo' not in meta or 'numero' not in meta:
+                logging.warning(f"Cabeçalho não reconhecido, ignorando: {filepath.name}")
+                continue
+            self.put(meta['tipo'], meta['numero'], body, data=meta.get('data'),
+                     url=meta.get('url'), assunto=meta.get('assunto'), save=False)
+            imported += 1
+
+        self._save_index()
+        logging.info(f"{imported} arquivos importados de {input_dir}")
+        return imported
+
+    def export_filename(self, document, version):
+        """Nome de arquivo no padrão do normativos_txt, sem o artefato '.0'"""
+        tipo = document['tipo'].replace(' ', '_')
+        numero = display_numero(document['numero'])
+        data = (version.get('data') or '').replace('/', '_')
+        return f"{tipo}_{numero}_{data}.txt" if data else f"{tipo}_{numero}.txt"
+
+    def export(self, output_dir='normativos_txt'):
+        """Materializa a última versão de cada documento no layout do normativos_txt"""
+        exported = 0
+        with AtomicOutputWriter(output_dir) as writer:
+            for document in self.index['documents'].values():
+                version = document['versions'][-1]
+                filename = self.export_filename(document, version)
+                text = self._export_text(document, version)
+                digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+                # Legados e pendentes não estão no manifesto deste writer: são regravados
+                if writer.manifest.get(filename, {}).get('sha256') == digest and writer.is_complete(filename):
+                    continue
+                writer.write(filename, text)
+                exported += 1
+
+        logging.info(f"{exported} documentos exportados para {output_dir}")
+        return exported
+
+    def _export_text(self, document, version):
+        """Texto completo (cabeçalho + corpo) de uma versão exportada"""
+        body = self.read_blob(version['sha256']).decode('utf-8')
+        return compose_document(document['tipo'], display_numero(document['numero']),
+                                version.get('data') or '', version.get('url') or '', body)
+
+    def stats(self):
+        """Resumo do armazenamento"""
+        blobs = self.index['blobs'].values()
+        return {
+            'documents': len(self.index['documents']),
+            'versions': sum(len(d['versions']) for d in self.index['documents'].values()),
+            'blobs': len(self.index['blobs']),
+            'raw_bytes': sum(b['size'] for b in blobs),
+            'packed_bytes': sum(b['length'] for b in blobs),
+        }
+
+
+def main():
+    """Importa o normativos_txt para o pack ou exporta o pack para um diretório"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if len(sys.argv) < 2 or sys.argv[1] not in ('import', 'export', 'stats'):
+        print("Uso: python bcb_storage.py import|export|stats [diretorio]")
+        return
+
+    store = CorpusStore()
+    command = sys.argv[1]
+    directory = sys.argv[2] if len(sys.argv) > 2 else 'normativos_txt'
+
+    if command == 'import':
+        store.import_directory(directory)
+    elif command == 'export':
+        store.export(directory)
+    print(store.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import sys
+import csv
+import time
+import logging
+from collections import deque
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from selenium.common.exceptions import WebDriverException
+
+from bcb_network_capture import PayloadCapture
+
+
+# Fim do iterador de documentos (None pode ser um item válido)
+_END = object()
+
+
+class TabSlot:
+    """Uma aba da rotação e o documento que ela está carregando"""
+
+    def __init__(self, driver, name):
+        self.driver = driver
+        self.name = name
+        self.capture = PayloadCapture(driver)
+        self.item = None
+        # Identificação do documento atual nos eventos
+        self.event_id = None
+        self.loaded = None
+        self.started = None
+        self.loaded_at = None
+
+
+class TabRotation:
+    """K abas de um mesmo Chrome (backend CDP) revezando documentos.
+
+    Cada documento começa a navegar em uma aba livre sem esperar a carga; a
+    extração pega as abas na ordem em que foram disparadas, então enquanto
+    uma aba é lida as outras K-1 continuam carregando. Cookies e cache são
+    do navegador, compartilhados por todas as abas, e a memória cresce por
+    renderizador e não por processo do Chrome.
+
+    Com events (EventStream), cada documento vira 'inicio'/'etapa'/'fim' com
+    a aba como worker; describe(item) dá o nome mostrado no painel.
+    """
+
+    def __init__(self, driver, tabs=4, interval=0.5, load_timeout=60, setup=None, events=None, describe=str):
+        self.browser = driver.browser
+        self.interval = interval
+        self.load_timeout = load_timeout
+        self._own_tabs = [self.browser.new_tab() for _ in range(tabs - 1)]
+        for tab in self._own_tabs:
+            if setup is not None:
+                setup(tab)
+        self.slots = [TabSlot(tab, f"aba {number}") for number, tab in enumerate([driver] + self._own_tabs, 1)]
+        self.events = events
+        self.describe = describe
+
+        self._last_navigation = 0.0
+        self.completed = 0
+        self.navigations = 0
+        self.elapsed = 0.0
+        self.rss_samples = []
+
+    def _navigate(self, slot, item, url):
+        """Dispara a navegação respeitando o intervalo mínimo entre documentos"""
+        wait = self._last_navigation + self.interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_navigation = time.monotonic()
+
+        slot.item = item
+        slot.loaded_at = None
+        self.navigations += 1
+        slot.event_id = self.navigations
+        self._emit('inicio', id=slot.event_id, documento=self.describe(item), worker=slot.name, etapa='carregando')
+        slot.capture.start()
+        slot.started = time.monotonic()
+        slot.loaded = slot.driver.navigate(url)
+        # Hora real da carga (a rotação só chega à aba depois de ler as anteriores)
+        slot.loaded.add_done_callback(lambda done: self._mark_loaded(slot, done))
+
+    def _emit(self, kind, **fields):
+        if self.events is not None:
+            self.events.emit(kind, **fields)
+
+    @staticmethod
+    def _mark_loaded(slot, done):
+        if slot.loaded is done and slot.loaded_at is None:
+            slot.loaded_at = time.monotonic()
+
+    def _sample_rss(self):
+        rss = self.browser.process.rss()
+        if rss is not None:
+            self.rss_samples.append(rss)
+
+    def run(self, items, url_for, extract):
+        """Gera (item, resultado) na ordem dos itens; extract(slot) roda com a página carregada"""
+        items = iter(items)
+        free = deque(self.slots)
+        in_flight = deque()
+        started = time.monotonic()
+
+        def refill():
+            while free:
+                item = next(items, _END)
+                if item is _END:
+                    return
+                slot = free.popleft()
+                try:
+                    self._navigate(slot, item, url_for(item))
+                except WebDriverException as e:
+                    logging.warning(f"Falha ao navegar na aba: {e}")
+                    slot.loaded = None
+                in_flight.append(slot)
+
+        refill()
+        try:
+            while in_flight:
+                slot = in_flight.popleft()
+                result = None
+                if slot.loaded is not None:
+                    try:
+                        remaining = max(self.load_timeout - (time.monotonic() - slot.started), 0.1)
+                        slot.loaded.result(remaining)
+                        self._mark_loaded(slot, slot.loaded)
+                        self._emit('etapa', id=slot.event_id, etapa='extraindo')
+                        result = extract(slot)
+                    except FutureTimeout:
+                        logging.warning(f"Página não carregou em {self.load_timeout}s na aba")
+                    except WebDriverException as e:
+                        logging.warning(f"Erro na aba: {e}")
+
+                item = slot.item
+                self._emit('fim', id=slot.event_id, ok=bool(result))
+                self.completed += 1
+                self._sample_rss()
+                # A aba lida volta para o fim da fila já navegando para o próximo documento
+                free.append(slot)
+                refill()
+                yield item, result
+        finally:
+            self.elapsed += time.monotonic() - started
+
+    def stats(self):
+        """Vazão e memória do Chrome (processo principal + renderizadores) nesta rotação"""
+        minutes = self.elapsed / 60
+        samples = self.rss_samples
+        return {
+            'abas': len(self.slots),
+            'documentos': self.completed,
+            'docs_por_minuto': self.completed / minutes if minutes else 0.0,
+            'rss_medio_mb': sum(samples) / len(samples) / 2**20 if samples else None,
+            'rss_pico_mb': max(samples) / 2**20 if samples else None,
+        }
+
+    def close(self):
+        """Fecha as abas abertas pela rotação (a primeira é do chamador)"""
+        for tab in self._own_tabs:
+            try:
+                tab.close()
+            except WebDriverException:
+                pass
+        self._own_tabs = []
+
+
+def benchmark_tabs(urls, tab_counts=(1, 2, 4, 8), headless=True, interval=0.5):
+    """Vazão e RSS para cada número de abas, cada um em um Chrome novo"""
+    from bcb_cdp import CDPDriver
+
+    def extract(slot):
+        return slot.driver.execute_script("return document.body ? document.body.innerText.length : 0")
+
+    report = []
+    for tabs in tab_counts:
+        driver = CDPDriver(headless=headless)
+        rotation = TabRotation(driver, tabs, interval=interval)
+        try:
+            loaded = sum(1 for _, length in rotation.run(urls, lambda url: url, extract) if length)
+        finally:
+            rotation.close()
+            driver.quit()
+        stats = rotation.stats()
+        stats['carregados'] = loaded
+        report.append(stats)
+        logging.info(f"{tabs} abas: {stats['docs_por_minuto']:.1f} docs/min, RSS pico {stats['rss_pico_mb'] or 0:.0f} MB")
+    return report
+
+
+def main():
+    """Compara vazão e memória com 1, 2, 4 e 8 abas: [csv] [documentos] [abas]"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else 'normativos_spb_bcb.csv'
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    tab_counts = [int(k) for k in sys.argv[3].split(',')] if len(sys.argv) > 3 else [1, 2, 4, 8]
+
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        urls = [row['url_bcb'] for row in csv.DictReader(f) if row.get('url_bcb')][:limit]
+
+    print(f"{'abas':>5} {'docs':>5} {'docs/min':>9} {'RSS médio':>10} {'RSS pico':>9}")
+    for stats in benchmark_tabs(urls, tab_counts):
+        print(f"{stats['abas']:5d} {stats['documentos']:5d} {stats['docs_por_minuto']:9.1f} "
+              f"{stats['rss_medio_mb'] or 0:9.0f}M {stats['rss_pico_mb'] or 0:8.0f}M")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import re
+import sys
+import time
+import logging
+from collections import Counter
+
+
+# Caracteres que aparecem nos normativos e suas formas corrompidas quando o
+# UTF-8 é lido como cp1252 ("Ã§" no lugar de "ç", "â€“" no lugar de "–")
+_REPAIRABLE = 'áàâãäéèêëíìîïóòôõöúùûüçñÁÀÂÃÄÉÈÊËÍÌÎÏÓÒÔÕÖÚÙÛÜÇÑºª°§–—‘’“”•…€'
+
+
+def _cp1252_mojibake(char):
+    """Forma corrompida de um caractere (UTF-8 decodificado como cp1252)"""
+    try:
+        return char.encode('utf-8').decode('cp1252')
+    except UnicodeDecodeError:
+        # Bytes sem mapeamento no cp1252 (0x81, 0x8D, ...) ficam como latin-1
+        return char.encode('utf-8').decode('latin-1')
+
+
+MOJIBAKE = {_cp1252_mojibake(c): c for c in _REPAIRABLE}
+# Variante em que o NBSP de "Ã\xa0" (à) virou espaço comum; "Ã " também é
+# português correto em caixa alta ("IRMÃ E"), então só vale em texto que já
+# tinha outra forma corrompida
+CRASE_MOJIBAKE = ('Ã ', 'à')
+
+# Variante do catálogo em que o "Ã" inicial foi trocado por "i" ("Pai\xads",
+# "depi³sito", "i  vista"); só é aplicada dentro de palavras
+FOLDED = {'i' + m[1:]: c for m, c in MOJIBAKE.items()
+          if m.startswith('Ã') and len(m) == 2 and not m[1].isascii()}
+FOLDED_CRASE = (' i  ', ' à ')
+
+_MOJIBAKE_RE = re.compile('|'.join(sorted(map(re.escape, MOJIBAKE), key=len, reverse=True)))
+_FOLDED_RE = re.compile('i[' + re.escape(''.join(sorted(k[1] for k in FOLDED))) + ']')
+
+# Ordinais: "n°", "N.º", "n º" -> "nº"; "art. 1°", "§ 2°", "1° de" -> "º"
+ORDINAL_VARIANTS = [(f"{n}{sep}{mark}", f"{n}º") for n in 'nN' for sep in ('. ', '.', ' ', '')
+                    for mark in '°º˚' if sep or mark != 'º']
+# Grau depois de número só é ordinal após "art."/"artigo"/"§"/"parágrafo" ou
+# em "1° de" (datas: "1° de janeiro"); "30° C" fica como está
+_DEGREE_RE = re.compile(r'((?:\b(?:arts?\.?|artigos?|par[aá]grafos?)|§§?)\s*)?(\d+)[°˚](\s+de\b)?',
+                        re.IGNORECASE)
+
+# Tabela de tradução: aspas, espaços especiais e caracteres de controle (os
+# bytes C1 só são apagados depois do reparo de encoding)
+TRANSLATION_TABLE = {
+    0x201C: '"', 0x201D: '"', 0x201E: '"', 0x201F: '"',
+    0x2018: "'", 0x2019: "'", 0x201A: "'", 0x201B: "'",
+    0x00A0: ' ', 0x2009: ' ', 0x202F: ' ', 0x09: ' ',
+    0x200B: None, 0xFEFF: None, 0x0D: None,
+}
+TRANSLATION_TABLE.update({c: None for c in range(0x20) if c not in (0x09, 0x0A)})
+TRANSLATION_TABLE.update({c: None for c in range(0x7F, 0xA0)})
+# Em texto não-ASCII, buscar a classe de caracteres é bem mais rápido que str.translate
+_TRANSLATE_RE = re.compile('[' + re.escape(''.join(map(chr, TRANSLATION_TABLE))) + ']')
+
+_SPACES_RE = re.compile('  +')
+_BLANK_LINES_RE = re.compile('\n\n\n+')
+_LINE_BREAKS_RE = re.compile('\n+')
+
+
+def _repair(match):
+    return MOJIBAKE[match.group()]
+
+
+def _unfold(match):
+    """Desfaz "Pai\xads" -> "País" apenas dentro de palavras"""
+    start = match.start()
+    if start and match.string[start - 1].isalpha():
+        return FOLDED[match.group()]
+    return match.group()
+
+
+def _translate(match):
+    return TRANSLATION_TABLE[ord(match.group())] or ''
+
+
+def _degree(match):
+    """"art. 1°" e "1° de" viram ordinal; outros usos do sinal de grau ficam como estão"""
+    prefix, number, date = match.groups()
+    if prefix or (date and number == '1'):
+        return f"{prefix or ''}{number}º{date or ''}"
+    return match.group()
+
+
+class TextNormalizer:
+    """Normaliza texto de normativos e conta os reparos feitos"""
+
+    def __init__(self, paragraphs=False):
+        # paragraphs=True reproduz o clean_text: toda quebra vira linha em branco
+        self.paragraphs = paragraphs
+        self.stats = Counter()
+
+    def normalize(self, text):
+        """Repara encoding, unifica aspas/ordinais e colapsa espaços"""
+        if not text:
+            return text
+        original = text
+        stats = self.stats
+
+        # As estatísticas contam campos reparados por categoria
+        repaired = text
+        if 'Ã' in text or 'Â' in text or 'â€' in text:
+            text, count = _MOJIBAKE_RE.subn(_repair, text)
+            if count and CRASE_MOJIBAKE[0] in text:
+                text = text.replace(*CRASE_MOJIBAKE)
+        text = _FOLDED_RE.sub(_unfold, text)
+        if FOLDED_CRASE[0] in text:
+            text = text.replace(*FOLDED_CRASE)
+        if text != repaired:
+            stats['mojibake'] += 1
+
+        text, count = _TRANSLATE_RE.subn(_translate, text)
+        if count:
+            stats['characters'] += 1
+
+        repaired = text
+        for variant, replacement in ORDINAL_VARIANTS:
+            if variant in text:
+                text = text.replace(variant, replacement)
+        if '°' in text or '˚' in text:
+            text = _DEGREE_RE.sub(_degree, text)
+        if text != repaired:
+            stats['ordinals'] += 1
+
+        text = _SPACES_RE.sub(' ', text).replace(' \n', '\n').replace('\n ', '\n')
+        if self.paragraphs:
+            text = _LINE_BREAKS_RE.sub('\n\n', text)
+        else:
+            text = _BLANK_LINES_RE.sub('\n\n', text)
+        text = text.strip()
+
+        stats['fields'] += 1
+        if text != original:
+            stats['repaired'] += 1
+        return text
+
+    def normalize_batch(self, texts):
+        """Normaliza uma lista de textos"""
+        return [self.normalize(text) for text in texts]
+
+
+def normalize_text(text, paragraphs=False):
+    """Atalho para normalizar um único texto"""
+    return TextNormalizer(paragraphs=paragraphs).normalize(text)
+
+
+def normalize_catalog(df, columns=None):
+    """Normaliza as colunas de texto do catálogo com operações vetorizadas do pandas"""
+    columns = columns or [c for c in df.columns if df[c].dtype == object]
+    stats = Counter()
+    df = df.copy()
+
+    for column in columns:
+        mask = df[column].notna()
+        original = df.loc[mask, column].astype(str)
+
+        values = original.str.replace(_MOJIBAKE_RE, _repair, regex=True)
+        # "Ã " só é reparado em campos que tinham outra forma corrompida
+        corrupted = values != original
+        values[corrupted] = values[corrupted].str.replace(CRASE_MOJIBAKE[0], CRASE_MOJIBAKE[1], regex=False)
+        values = values.str.replace(_FOLDED_RE, _unfold, regex=True)
+        values = values.str.replace(FOLDED_CRASE[0], FOLDED_CRASE[1], regex=False)
+        values = values.str.translate(TRANSLATION_TABLE)
+        for variant, replacement in ORDINAL_VARIANTS:
+            values = values.str.replace(variant, replacement, regex=False)
+        values = values.str.replace(_DEGREE_RE, _degree, regex=True)
+        values = values.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+        stats[column] = int((values != original).sum())
+        df.loc[mask, column] = values
+
+    total = sum(stats.values())
+    logging.info(f"Catálogo normalizado: {total} campos reparados {dict(stats)}")
+    stats['total'] = total
+    return df, stats
+
+
+def normalize_corpus(directory='normativos_txt', batch_size=1000):
+    """Normaliza os .txt do corpus em lotes, regravando só os que mudaram"""
+    from pathlib import Path
+    from bcb_output_writer import AtomicOutputWriter
+    from bcb_storage import parse_document
+
+    normalizer = TextNormalizer()
+    paths = sorted(Path(directory).glob('*.txt'))
+    started = time.perf_counter()
+
+    with AtomicOutputWriter(directory, fsync_every=batch_size) as writer:
+        for start in range(0, len(paths), batch_size):
+            batch = paths[start:start + batch_size]
+            texts = [path.read_text(encoding='utf-8') for path in batch]
+            for path, text in zip(batch, texts):
+                _, body = parse_document(text)
+                normalized = normalizer.normalize(body)
+                if normalized != body:
+                    writer.write(path.name, text[:len(text) - len(body)] + normalized)
+
+    elapsed = time.perf_counter() - started
+    logging.info(f"{len(paths)} documentos normalizados em {elapsed:.2f}s: {dict(normalizer.stats)}")
+    return normalizer.stats
+
+
+def main():
+    """Normaliza o catálogo CSV (csv) ou os textos do corpus (corpus)"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'csv':
+        import pandas as pd
+
+        csv_file = sys.argv[2] if len(sys.argv) > 2 else 'normativos_spb_bcb.csv'
+        df, stats = normalize_catalog(pd.read_csv(csv_file, encoding='utf-8', dtype=str))
+        df.to_csv(csv_file, index=False, encoding='utf-8')
+        print(f"{stats['total']} campos reparados em {csv_file}")
+    elif command == 'corpus':
+        stats = normalize_corpus(sys.argv[2] if len(sys.argv) > 2 else 'normativos_txt')
+        print(f"{stats['repaired']} documentos alterados")
+    else:
+        print("Uso: python bcb_text_normalizer.py csv [arquivo] | corpus [diretorio]")
+
+
+if __name__ == "__main__":
+    main()
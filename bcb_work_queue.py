@@ -0,0 +1,463 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import logging
+import threading
+from pathlib import Path
+
+from bcb_identity import canonical_key
+
+
+# Um lease sem heartbeat por mais que isso volta para a fila
+DEFAULT_LEASE_SECONDS = 300
+# Tentativas antes de o job ir para "failed"
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def job_id(tipo, numero):
+    """Identificador do job, seguro para nome de arquivo e chave do Redis"""
+    return re.sub(r'[^A-Za-z0-9]+', '_', canonical_key(tipo, numero)).strip('_')
+
+
+def catalog_jobs(csv_file='normativos_spb_bcb.csv'):
+    """Lê o catálogo e devolve os jobs (uma linha do CSV cada), na ordem do arquivo"""
+    import pandas as pd
+    from bcb_text_normalizer import normalize_catalog
+
+    df = pd.read_csv(csv_file, encoding='utf-8', dtype={'numero': str})
+    df, _ = normalize_catalog(df, columns=['tipo', 'assunto'])
+    df = df.astype(object).where(df.notna(), None)
+
+    jobs = {}
+    for row in df.to_dict('records'):
+        jobs.setdefault(job_id(row['tipo'], row['numero']), {'row': row})
+    return [{'id': key, **job} for key, job in jobs.items()]
+
+
+class FileWorkQueue:
+    """Fila em diretório compartilhado (NFS/SMB): cada estado é uma pasta e
+    toda transição é um rename atômico, então só um worker ganha cada job"""
+
+    STATES = ('pending', 'leased', 'done', 'failed')
+
+    def __init__(self, queue_dir='work_queue', lease_seconds=DEFAULT_LEASE_SECONDS,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.queue_dir = queue_dir
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        for state in self.STATES:
+            Path(queue_dir, state).mkdir(parents=True, exist_ok=True)
+
+    def _path(self, state, name):
+        return os.path.join(self.queue_dir, state, name)
+
+    def _write_json(self, path, data):
+        """Grava o job de forma atômica (temporário + rename)"""
+        temp_path = f"{os.path.dirname(path)}/.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        os.replace(temp_path, path)
+
+    def _read_json(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _names(self, state):
+        return sorted(name for name in os.listdir(os.path.join(self.queue_dir, state))
+                      if not name.startswith('.'))
+
+    def _claim(self, source, state, name):
+        """Move o job para um nome oculto em state e o devolve (None se outro processo o moveu antes).
+
+        Com nome oculto o job não aparece para workers nem para o coordenador,
+        então ler, atualizar e publicar com o nome final não disputa com o
+        requeue_expired; sem isso, gravar depois de um requeue recriaria o
+        lease e o job rodaria duas vezes.
+        """
+        claim = self._path(state, f".{name}.claim")
+        try:
+            os.rename(source, claim)
+        except FileNotFoundError:
+            return None
+        return claim
+
+    def enqueue(self, jobs):
+        """Acrescenta os jobs ainda desconhecidos (em qualquer estado)"""
+        known = set()
+        for state in self.STATES:
+            known.update(name.split('__', 1)[1].split('@', 1)[0].rsplit('.json', 1)[0]
+                         for name in self._names(state))
+
+        sequence = len(known)
+        added = 0
+        for job in jobs:
+            if job['id'] in known:
+                continue
+            # O prefixo numérico mantém a ordem do catálogo na listagem
+            name = f"{sequence:08d}__{job['id']}.json"
+            self._write_json(self._path('pending', name), {**job, 'attempts': 0})
+            known.add(job['id'])
+            sequence += 1
+            added += 1
+        return added
+
+    def lease(self, worker):
+        """Reserva o próximo job; devolve o lease ou None se a fila estiver vazia"""
+        for name in self._names('pending'):
+            token = uuid.uuid4().hex[:12]
+            leased_name = f"{name}@{token}"
+            claim = self._claim(self._path('pending', name), 'leased', leased_name)
+            if claim is None:
+                # Outro worker reservou primeiro
+                continue
+
+            try:
+                job = self._read_json(claim)
+                job['attempts'] = job.get('attempts', 0) + 1
+                job['worker'] = worker
+                # A gravação também renova o mtime (o rename preserva o antigo)
+                self._write_json(claim, job)
+                if job['attempts'] > self.max_attempts:
+                    os.rename(claim, self._path('failed', name))
+                    logging.error(f"Job {job['id']} excedeu {self.max_attempts} tentativas")
+                    continue
+                os.rename(claim, self._path('leased', leased_name))
+            except FileNotFoundError:
+                # Transição interrompida e devolvida à fila pelo coordenador
+                continue
+            return {'id': job['id'], 'name': name, 'token': token, 'job': job}
+        return None
+
+    def heartbeat(self, lease):
+        """Renova o lease; False se ele expirou e o job foi devolvido à fila"""
+        try:
+            os.utime(self._path('leased', f"{lease['name']}@{lease['token']}"))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def complete(self, lease):
+        """Marca como concluído; False se o lease já não pertence a este worker"""
+        try:
+            os.rename(self._path('leased', f"{lease['name']}@{lease['token']}"),
+                      self._path('done', lease['name']))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def fail(self, lease, error=None):
+        """Devolve o job ao fim da fila para nova tentativa; False se o lease já não é deste worker"""
+        # O prefixo "r" ordena as novas tentativas depois do catálogo
+        name = f"r{time.time_ns()}__{lease['id']}.json"
+        claim = self._claim(self._path('leased', f"{lease['name']}@{lease['token']}"), 'pending', name)
+        if claim is None:
+            return False
+        try:
+            job = self._read_json(claim)
+            job['last_error'] = str(error) if error else None
+            self._write_json(claim, job)
+            os.rename(claim, self._path('pending', name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def requeue_expired(self):
+        """Devolve à fila os leases sem heartbeat (worker morto ou travado)"""
+        cutoff = time.time() - self.lease_seconds
+        requeued = 0
+        for leased_name in self._names('leased'):
+            path = self._path('leased', leased_name)
+            try:
+                if os.path.getmtime(path) > cutoff:
+                    continue
+                os.rename(path, self._path('pending', leased_name.split('@', 1)[0]))
+                requeued += 1
+                logging.warning(f"Lease expirado devolvido à fila: {leased_name}")
+            except FileNotFoundError:
+                continue
+
+        # Jobs ocultos por _claim de um worker que morreu no meio da transição
+        # (o ctime muda no rename, então conta o tempo desde o _claim)
+        for state in ('pending', 'leased'):
+            for claim in Path(self.queue_dir, state).glob('.*.claim'):
+                try:
+                    if claim.stat().st_ctime > cutoff:
+                        continue
+                    name = claim.name[1:-len('.claim')].split('@', 1)[0]
+                    os.rename(claim, self._path('pending', name))
+                    requeued += 1
+                    logging.warning(f"Job interrompido devolvido à fila: {name}")
+                except FileNotFoundError:
+                    continue
+        return requeued
+
+    def stats(self):
+        return {state: len(self._names(state)) for state in self.STATES}
+
+
+# Scripts Lua: cada transição roda atomicamente no servidor Redis
+_LEASE_SCRIPT = """
+local id = redis.call('RPOP', KEYS[1])
+if not id then return nil end
+redis.call('HSET', KEYS[2], id, ARGV[1])
+redis.call('ZADD', KEYS[3], ARGV[2], id)
+local attempts = redis.call('HINCRBY', KEYS[4], id, 1)
+return {id, attempts}
+"""
+_HEARTBEAT_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+return 1
+"""
+_RELEASE_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('HDEL', KEYS[1], ARGV[1])
+if ARGV[4] ~= '' then redis.call('HSET', KEYS[4], ARGV[1], ARGV[4]) end
+redis.call('ZREM', KEYS[2], ARGV[1])
+if ARGV[3] == 'pending' then
+    redis.call('LPUSH', KEYS[3], ARGV[1])
+else
+    redis.call('SADD', KEYS[3], ARGV[1])
+end
+return 1
+"""
+_REQUEUE_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, id in ipairs(ids) do
+    redis.call('HDEL', KEYS[1], id)
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('RPUSH', KEYS[3], id)
+end
+return #ids
+"""
+
+
+class RedisWorkQueue:
+    """Mesma fila sobre um servidor compatível com Redis (Redis, Valkey, KeyDB)"""
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='bcb:queue',
+                 lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        import redis
+
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.keys = {name: f"{prefix}:{name}" for name in
+                     ('jobs', 'pending', 'tokens', 'expiry', 'attempts', 'errors', 'done', 'failed')}
+        self._lease = self.redis.register_script(_LEASE_SCRIPT)
+        self._heartbeat = self.redis.register_script(_HEARTBEAT_SCRIPT)
+        self._release = self.redis.register_script(_RELEASE_SCRIPT)
+        self._requeue = self.redis.register_script(_REQUEUE_SCRIPT)
+
+    def enqueue(self, jobs):
+        """Acrescenta os jobs ainda desconhecidos; pending é consumido pela direita"""
+        keys = self.keys
+        added = 0
+        for job in jobs:
+            if self.redis.hsetnx(keys['jobs'], job['id'], json.dumps(job, ensure_ascii=False, default=str)):
+                self.redis.lpush(keys['pending'], job['id'])
+                added += 1
+        return added
+
+    def lease(self, worker):
+        keys = self.keys
+        while True:
+            token = f"{worker}:{uuid.uuid4().hex[:12]}"
+            result = self._lease(keys=[keys['pending'], keys['tokens'], keys['expiry'], keys['attempts']],
+                                 args=[token, time.time() + self.lease_seconds])
+            if not result:
+                return None
+            key, attempts = result[0], int(result[1])
+            if attempts > self.max_attempts:
+                self._release(keys=[keys['tokens'], keys['expiry'], keys['failed'], keys['errors']],
+                              args=[key, token, 'failed', ''])
+                logging.error(f"Job {key} excedeu {self.max_attempts} tentativas")
+                continue
+            job = json.loads(self.redis.hget(keys['jobs'], key))
+            job['attempts'] = attempts
+            job['worker'] = worker
+            job['last_error'] = self.redis.hget(keys['errors'], key)
+            return {'id': key, 'token': token, 'job': job}
+
+    def heartbeat(self, lease):
+        keys = self.keys
+        return bool(self._heartbeat(keys=[keys['tokens'], keys['expiry']],
+                                    args=[lease['id'], lease['token'], time.time() + self.lease_seconds]))
+
+    def complete(self, lease):
+        keys = self.keys
+        return bool(self._release(keys=[keys['tokens'], keys['expiry'], keys['done'], keys['errors']],
+                                  args=[lease['id'], lease['token'], 'done', '']))
+
+    def fail(self, lease, error=None):
+        """Devolve o job à fila; o erro fica em last_error, como na fila em diretório"""
+        keys = self.keys
+        return bool(self._release(keys=[keys['tokens'], keys['expiry'], keys['pending'], keys['errors']],
+                                  args=[lease['id'], lease['token'], 'pending', str(error) if error else '']))
+
+    def requeue_expired(self):
+        keys = self.keys
+        requeued = self._requeue(keys=[keys['tokens'], keys['expiry'], keys['pending']], args=[time.time()])
+        if requeued:
+            logging.warning(f"{requeued} leases expirados devolvidos à fila")
+        return requeued
+
+    def stats(self):
+        keys = self.keys
+        return {
+            'pending': self.redis.llen(keys['pending']),
+            'leased': self.redis.hlen(keys['tokens']),
+            'done': self.redis.scard(keys['done']),
+            'failed': self.redis.scard(keys['failed']),
+        }
+
+
+def open_queue(location, **kwargs):
+    """Fila a partir de uma URL redis:// ou de um diretório compartilhado"""
+    if location.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisWorkQueue(location, **kwargs)
+    return FileWorkQueue(location, **kwargs)
+
+
+class LeaseKeeper:
+    """Thread que renova o lease enquanto o documento é processado"""
+
+    def __init__(self, queue, lease, interval):
+        self.queue = queue
+        self.lease = lease
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self.queue.heartbeat(self.lease):
+                self.lost = True
+                logging.warning(f"Lease perdido para {self.lease['id']}")
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def run_coordinator(queue, csv_file='normativos_spb_bcb.csv', interval=30):
+    """Enfileira o catálogo e devolve leases expirados até a fila esvaziar"""
+    added = queue.enqueue(catalog_jobs(csv_file))
+    logging.info(f"{added} jobs adicionados à fila")
+
+    while True:
+        queue.requeue_expired()
+        stats = queue.stats()
+        logging.info(f"Fila: {stats}")
+        if not stats['pending'] and not stats['leased']:
+            break
+        time.sleep(interval)
+
+    print(f"\n=== FILA CONCLUÍDA === {queue.stats()}")
+
+
+def run_worker(queue, output_dir='normativos_txt', history_dir='normativos_history', delay=3, worker=None,
+               dashboard_port=None):
+    """Processa jobs da fila até ela esvaziar, gravando no armazenamento compartilhado
+
+    Com dashboard_port, o progresso deste worker fica em http://127.0.0.1:<porta>/.
+    """
+    from bcb_dashboard import Dashboard, worker_name
+    from bcb_history import HistoryStore
+    from bcb_normas_scraper import BCBNormativesScraperFinal
+    from bcb_output_writer import AtomicOutputWriter
+
+    worker = worker or worker_name()
+    # Manifesto próprio e fsync por documento: o arquivo precisa estar
+    # persistido antes de o job ser marcado como concluído
+    writer = AtomicOutputWriter(output_dir, fsync_every=1, manifest_name=f".manifest.{worker}.json",
+                                temp_grace=queue.lease_seconds)
+    scraper = BCBNormativesScraperFinal(output_dir=output_dir, writer=writer,
+                                        history=HistoryStore(history_dir), worker=worker)
+    # Os eventos do scraper vão para o painel (ou só para o resumo no log)
+    dashboard = Dashboard(scraper.events, port=dashboard_port)
+    dashboard.gauge('fila', lambda: queue.stats()['pending'])
+    dashboard.start()
+
+    successful = 0
+    failed = 0
+    try:
+        while True:
+            lease = queue.lease(worker)
+            if lease is None:
+                break
+
+            row = dict(lease['job']['row'])
+            row['assunto'] = row.get('assunto') or ''
+            logging.info(f"[{worker}] {lease['id']} (tentativa {lease['job']['attempts']})")
+
+            with LeaseKeeper(queue, lease, max(queue.lease_seconds / 3, 1)) as keeper:
+                try:
+                    ok = scraper.scrape_document(row)
+                    writer.flush()
+                except Exception as e:
+                    logging.error(f"Erro inesperado em {lease['id']}: {e}")
+                    ok = False
+
+            if keeper.lost:
+                # Outro worker já recebeu o job; o arquivo gravado é idêntico e atômico
+                logging.warning(f"Resultado de {lease['id']} descartado (lease expirado)")
+            elif ok and queue.complete(lease):
+                successful += 1
+            else:
+                queue.fail(lease, 'scraping falhou')
+                failed += 1
+
+            if delay > 0:
+                time.sleep(delay)
+    except KeyboardInterrupt:
+        logging.info("Worker interrompido pelo usuário")
+    finally:
+        writer.close()
+        scraper.http.close()
+        scraper.boilerplate.save()
+        scraper.close_driver()
+        dashboard.stop()
+
+    print(f"\n=== WORKER {worker} === Sucessos: {successful}, Falhas: {failed}")
+
+
+def main():
+    """coordinator FILA [csv] | worker FILA [saida] [--delay S] [--historico DIR] [--painel PORTA] | status FILA"""
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(prog='bcb_work_queue.py')
+    parser.add_argument('comando', choices=('coordinator', 'worker', 'status'))
+    parser.add_argument('fila', help="diretório compartilhado ou redis://host:6379/0")
+    parser.add_argument('alvo', nargs='?', default=None, help="csv (coordinator) ou diretório de saída (worker)")
+    parser.add_argument('--delay', type=float, default=3.0, help="segundos entre documentos (worker)")
+    parser.add_argument('--historico', default='normativos_history', help="diretório do histórico (worker)")
+    parser.add_argument('--lease', type=int, default=DEFAULT_LEASE_SECONDS, help="segundos sem heartbeat")
+    parser.add_argument('--tentativas', type=int, default=DEFAULT_MAX_ATTEMPTS)
+    parser.add_argument('--painel', type=int, default=None, metavar='PORTA', help="painel de progresso (worker)")
+    args = parser.parse_args()
+
+    queue = open_queue(args.fila, lease_seconds=args.lease, max_attempts=args.tentativas)
+    if args.comando == 'coordinator':
+        run_coordinator(queue, args.alvo or 'normativos_spb_bcb.csv')
+    elif args.comando == 'worker':
+        run_worker(queue, args.alvo or 'normativos_txt', history_dir=args.historico, delay=args.delay,
+                   dashboard_port=args.painel)
+    else:
+        print(queue.stats())
+
+
+if __name__ == "__main__":
+    main()
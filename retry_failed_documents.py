@@ -1,5 +1,4 @@
 import pandas as pd
-import requests
 from bs4 import BeautifulSoup
 import time
 import os
@@ -16,6 +15,9 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
 from datetime import datetime
+from bcb_output_writer import AtomicOutputWriter
+from bcb_http import shared_client
+from bcb_catalog import load_catalog
 
 # Configuração de logging
 logging.basicConfig(
@@ -28,8 +30,12 @@ logging.basicConfig(
 )
 
 class RetryFailedDocuments:
-    def __init__(self, output_dir='normativos_txt', debug=True):
+    # Documentos que falharam na última execução completa
+    FAILED_DOCUMENTS = [('Resolucao CMN', '4.734'), ('Resolucao CMN', '4.282')]
+
+    def __init__(self, output_dir='normativos_txt', debug=True, csv_file='normativos_spb_bcb.csv'):
         self.output_dir = output_dir
+        self.csv_file = csv_file
         self.debug = debug
         self.driver = None
         self.wait = None
@@ -37,6 +43,11 @@ class RetryFailedDocuments:
         # Criar diretório de saída
         Path(self.output_dir).mkdir(parents=True, exist_ok=True)
         Path(f"{self.output_dir}/normativos_pdf").mkdir(parents=True, exist_ok=True)
+        self.writer = AtomicOutputWriter(self.output_dir)
+        # Cache HTTP em disco, compartilhado com os outros scripts
+        self.http = shared_client()
+        # Só para consultar URL e assunto: scraped não é usado
+        self.catalog = load_catalog(self.csv_file, output_dir=None)
         
         # Configurar Selenium WebDriver
         self._setup_driver(headless=not debug)
@@ -175,13 +186,14 @@ class RetryFailedDocuments:
             filename = f"{document_type.replace(' ', '_')}_{document_number}_{document_date.replace('/', '_')}.txt"
             filepath = os.path.join(self.output_dir, filename)
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(f"Tipo: {document_type}\n")
-                f.write(f"Número: {document_number}\n")
-                f.write(f"Data: {document_date}\n")
-                f.write(f"URL: {self.driver.current_url}\n")
-                f.write("="*80 + "\n\n")
-                f.write(content_text)
+            header = (
+                f"Tipo: {document_type}\n"
+                f"Número: {document_number}\n"
+                f"Data: {document_date}\n"
+                f"URL: {self.driver.current_url}\n"
+                + "="*80 + "\n\n"
+            )
+            self.writer.write(filename, header + content_text)
             
             logging.info(f"Conteúdo salvo: {filepath}")
             
@@ -204,13 +216,11 @@ class RetryFailedDocuments:
                 href = link.get_attribute('href')
                 if href and '.pdf' in href.lower():
                     # Baixar o PDF
-                    response = requests.get(href, timeout=30)
+                    response = self.http.get(href, timeout=30)
                     if response.status_code == 200:
                         pdf_filename = f"{document_type.replace(' ', '_')}_{document_number}_{document_date.replace('/', '_')}.pdf"
-                        pdf_filepath = os.path.join(self.output_dir, "normativos_pdf", pdf_filename)
-                        
-                        with open(pdf_filepath, 'wb') as f:
-                            f.write(response.content)
+                        pdf_filepath = self.writer.write(os.path.join("normativos_pdf", pdf_filename),
+                                                         response.content, binary=True)
                         
                         logging.info(f"PDF baixado: {pdf_filepath}")
                         break
@@ -218,23 +228,17 @@ class RetryFailedDocuments:
         except Exception as e:
             logging.warning(f"Erro ao baixar PDF para {document_type} {document_number}: {e}")
 
-    def process_failed_documents(self):
-        """Processa apenas os documentos que falharam"""
-        # Documentos que falharam
-        failed_documents = [
-            {
-                'tipo': 'Resolucao CMN',
-                'numero': '4.734',
-                'data': '27/6/2019',
-                'url_bcb': 'https://www.bcb.gov.br/estabilidadefinanceira/exibenormativo?tipo=Resolu%C3%A7%C3%A3o%20CMN&numero=4.734'
-            },
-            {
-                'tipo': 'Resolucao CMN',
-                'numero': '4.282',
-                'data': '4/11/2013',
-                'url_bcb': 'https://www.bcb.gov.br/estabilidadefinanceira/exibenormativo?tipo=Resolu%C3%A7%C3%A3o%20CMN&numero=4.282'
-            }
-        ]
+    def process_failed_documents(self, documents=None):
+        """Processa apenas os documentos que falharam (pares tipo/número)"""
+        # Documentos que falharam; data e URL vêm do catálogo
+        failed_documents = []
+        for tipo, numero in documents or self.FAILED_DOCUMENTS:
+            entry = self.catalog.lookup(tipo, numero)
+            if entry is None or not entry['url']:
+                logging.error(f"Documento fora do catálogo: {tipo} {numero}")
+                continue
+            failed_documents.append({'tipo': tipo, 'numero': numero, 'data': entry['data'],
+                                     'url_bcb': entry['url']})
         
         total_docs = len(failed_documents)
         successful_docs = 0
@@ -274,9 +278,12 @@ class RetryFailedDocuments:
                 continue
         
         logging.info(f"Reprocessamento concluído. Sucessos: {successful_docs}, Falhas: {failed_docs}")
+        self.http.print_report()
 
     def close(self):
         """Fecha o driver"""
+        self.writer.close()
+        self.http.close()
         if self.driver:
             self.driver.quit()
             logging.info("WebDriver fechado")
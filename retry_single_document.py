@@ -1,5 +1,4 @@
 import pandas as pd
-import requests
 from bs4 import BeautifulSoup
 import time
 import os
@@ -16,6 +15,8 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
 from datetime import datetime
+from bcb_output_writer import AtomicOutputWriter
+from bcb_http import shared_client
 
 # Configuração de logging
 logging.basicConfig(
@@ -37,6 +38,9 @@ class RetrySingleDocument:
         # Criar diretório de saída
         Path(self.output_dir).mkdir(parents=True, exist_ok=True)
         Path(f"{self.output_dir}/normativos_pdf").mkdir(parents=True, exist_ok=True)
+        self.writer = AtomicOutputWriter(self.output_dir)
+        # Cache HTTP em disco, compartilhado com os outros scripts
+        self.http = shared_client()
         
         # Configurar Selenium WebDriver
         self._setup_driver(headless=not debug)
@@ -167,13 +171,14 @@ class RetrySingleDocument:
             filename = f"{document_type.replace(' ', '_')}_{document_number}_{document_date.replace('/', '_')}.txt"
             filepath = os.path.join(self.output_dir, filename)
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(f"Tipo: {document_type}\n")
-                f.write(f"Número: {document_number}\n")
-                f.write(f"Data: {document_date}\n")
-                f.write(f"URL: {self.driver.current_url}\n")
-                f.write("="*80 + "\n\n")
-                f.write(content_text)
+            header = (
+                f"Tipo: {document_type}\n"
+                f"Número: {document_number}\n"
+                f"Data: {document_date}\n"
+                f"URL: {self.driver.current_url}\n"
+                + "="*80 + "\n\n"
+            )
+            self.writer.write(filename, header + content_text)
             
             logging.info(f"Conteúdo salvo: {filepath}")
             
@@ -197,13 +202,11 @@ class RetrySingleDocument:
                 href = link.get_attribute('href')
                 if href and '.pdf' in href.lower():
                     # Baixar o PDF
-                    response = requests.get(href, timeout=30)
+                    response = self.http.get(href, timeout=30)
                     if response.status_code == 200:
                         pdf_filename = f"{document_type.replace(' ', '_')}_{document_number}_{document_date.replace('/', '_')}.pdf"
-                        pdf_filepath = os.path.join(self.output_dir, "normativos_pdf", pdf_filename)
-                        
-                        with open(pdf_filepath, 'wb') as f:
-                            f.write(response.content)
+                        pdf_filepath = self.writer.write(os.path.join("normativos_pdf", pdf_filename),
+                                                         response.content, binary=True)
                         
                         logging.info(f"PDF baixado: {pdf_filepath}")
                         break
@@ -213,6 +216,8 @@ class RetrySingleDocument:
 
     def close(self):
         """Fecha o driver"""
+        self.writer.close()
+        self.http.close()
         if self.driver:
             self.driver.quit()
             logging.info("WebDriver fechado")
@@ -231,6 +236,7 @@ def main():
             logging.info("✓ Documento processado com sucesso!")
         else:
             logging.error("✗ Falha ao processar o documento")
+        scraper.http.print_report()
         
     except KeyboardInterrupt:
         logging.info("Processamento interrompido pelo usuário")
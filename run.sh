@@ -1,5 +1,4 @@
 #!/bin/bash
 # Activate virtual environment and run the scraper
 source venv/bin/activate
-python bcb_normas_scraper.py
-
+python bcb_normas.py scrape "$@"
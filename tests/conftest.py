@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Os módulos ficam na raiz do repositório (sem pacote)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
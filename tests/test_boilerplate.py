@@ -0,0 +1,62 @@
+from bcb_boilerplate import BoilerplateModel
+from bcb_identity import canonical_key, find_references
+from bcb_output_writer import AtomicOutputWriter
+from bcb_postprocess import PostProcessingPipeline
+
+
+SUBJECTS = ['câmbio', 'crédito', 'pagamentos', 'consórcios', 'cooperativas', 'seguros', 'leasing', 'ouvidoria']
+
+
+def _page(i):
+    return (f"Menu\nInício\nCircular n° {i}.{i:03d} de 1/1/2020\nTexto vigente(PDF 1kb)\n"
+            f"Art. 1º Dispõe sobre {SUBJECTS[i]}.\nRodapé\nContato")
+
+
+def _trained(n=5):
+    model = BoilerplateModel(model_file=None)
+    for i in range(1, n + 1):
+        model.add_document(_page(i))
+    return model
+
+
+def test_strip_removes_repeated_edges():
+    model = _trained()
+    assert model.strip(_page(1)) == 'Art. 1º Dispõe sobre crédito.'
+
+
+def test_keep_protects_own_title():
+    model = _trained()
+    own = canonical_key('Circular', '1.001')
+    stripped = model.strip(_page(1), keep=lambda line: own in find_references(line))
+    assert stripped.startswith('Circular n° 1.001 de 1/1/2020')
+    assert 'Menu' not in stripped and 'Rodapé' not in stripped
+
+
+def test_untrained_model_keeps_text():
+    model = BoilerplateModel(model_file=None)
+    assert model.strip(_page(1)) == _page(1)
+
+
+def test_frozen_model_ignores_later_learning():
+    model = BoilerplateModel(model_file=None)
+    model.freeze()
+    for i in range(1, 6):
+        model.add_document(_page(i))
+    # O que foi aprendido depois do freeze não muda a limpeza desta execução
+    assert model.strip(_page(6)) == _page(6)
+    model.freeze()
+    assert 'Menu' not in model.strip(_page(6))
+
+
+def test_pipeline_cleans_every_document_with_the_same_model(tmp_path):
+    model = BoilerplateModel(model_file=None)
+    writer = AtomicOutputWriter(str(tmp_path))
+    pipeline = PostProcessingPipeline(writer, boilerplate=model)
+    for i in range(1, 8):
+        assert pipeline.submit('url', 'Circular', f"{i}.{i:03d}", _page(i), data='1/1/2020', url='u',
+                               boilerplate=True)
+    pipeline.close()
+
+    # Modelo vazio no início: nenhum documento da execução perde linhas, mas todos ensinam
+    assert all('Menu' in path.read_text(encoding='utf-8') for path in tmp_path.glob('*.txt'))
+    assert model.n_docs == 7
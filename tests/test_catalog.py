@@ -0,0 +1,122 @@
+from datetime import date
+
+import pytest
+
+from bcb_catalog import CATALOG_MAGIC, DocumentCatalog, load_catalog
+from bcb_output_writer import AtomicOutputWriter, completed_files
+from bcb_postprocess import catalog_filename, url_filename
+
+
+CSV = """tipo,numero,data,assunto,situacao,url_bcb
+Resolução BCB,429.0,11/9/2025,Altera o regulamento do SPB,Vigente,https://www.bcb.gov.br/a
+Circular,4282,2/1/2024,Dispõe sobre o STR,Vigente,
+Resolução BCB,501,10/3/2025,Regulamenta o Pix,Vigente,https://www.bcb.gov.br/b
+"""
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / 'catalogo.csv'
+    path.write_text(CSV, encoding='utf-8')
+    return str(path)
+
+
+def test_lookup_canonicalizes_numero(csv_file):
+    catalog = DocumentCatalog.from_csv(csv_file)
+
+    assert len(catalog) == 3
+    assert catalog.find('Resolução BCB', '429') == catalog.find('Resolução BCB', 429.0) == 0
+    assert catalog.lookup('Circular', '4.282')['numero'] == '4.282'
+    assert catalog.url('Resolução BCB', '501') == 'https://www.bcb.gov.br/b'
+
+
+def test_between_is_ordered_by_date(csv_file):
+    catalog = DocumentCatalog.from_csv(csv_file)
+    positions = catalog.between(date(2024, 1, 1), date(2025, 12, 31))
+
+    assert [catalog.row(position)['numero'] for position in positions] == ['4.282', '501', '429']
+
+
+def test_records_keep_csv_columns(csv_file):
+    rows = list(DocumentCatalog.from_csv(csv_file).records())
+
+    assert rows[0] == {'tipo': 'Resolução BCB', 'numero': '429', 'data': '11/9/2025',
+                       'assunto': 'Altera o regulamento do SPB', 'situacao': 'Vigente',
+                       'url_bcb': 'https://www.bcb.gov.br/a'}
+    assert rows[1]['url_bcb'] is None
+
+
+def test_save_and_load_round_trip(csv_file, tmp_path):
+    catalog_file = str(tmp_path / 'catalogo.bin')
+    DocumentCatalog.from_csv(csv_file).save(catalog_file)
+
+    loaded = DocumentCatalog.load(catalog_file)
+    assert list(loaded.records()) == list(DocumentCatalog.from_csv(csv_file).records())
+    assert not loaded.is_stale(csv_file)
+
+
+def test_old_catalog_format_is_rebuilt(csv_file, tmp_path):
+    catalog_file = tmp_path / 'catalogo.bin'
+    catalog_file.write_bytes(b'BCBCAT01' + b'\0' * 32)
+    assert CATALOG_MAGIC != b'BCBCAT01'
+
+    catalog = load_catalog(csv_file, str(catalog_file), output_dir=None)
+    assert len(catalog) == 3
+    assert catalog_file.read_bytes().startswith(CATALOG_MAGIC)
+
+
+def test_load_without_save_leaves_the_file_alone(csv_file, tmp_path):
+    catalog_file = tmp_path / 'catalogo.bin'
+    assert len(load_catalog(csv_file, str(catalog_file), output_dir=None, save=False)) == 3
+    assert not catalog_file.exists()
+
+    catalog_file.write_bytes(b'BCBCAT01')
+    load_catalog(csv_file, str(catalog_file), output_dir=None, save=False)
+    assert catalog_file.read_bytes() == b'BCBCAT01'
+
+
+def test_scraped_follows_the_manifest(csv_file, tmp_path):
+    output_dir = tmp_path / 'saida'
+    output_dir.mkdir()
+    with AtomicOutputWriter(str(output_dir)) as writer:
+        writer.write(catalog_filename('Resolução BCB', '429', 'Altera o regulamento do SPB'), 'texto')
+        writer.write(url_filename('Circular', '4.282', '2/1/2024'), 'texto')
+    # Gravado pela metade: o tamanho não confere com o manifesto
+    truncated = output_dir / url_filename('Circular', '4.282', '2/1/2024')
+    truncated.write_text('tex', encoding='utf-8')
+
+    catalog_file = str(tmp_path / 'catalogo.bin')
+    catalog = load_catalog(csv_file, catalog_file, output_dir=str(output_dir))
+    assert list(catalog.scraped) == [1, 0, 0]
+    assert truncated.name not in completed_files(str(output_dir))
+
+    # O estado não é persistido: sem output_dir, nada marcado
+    assert not any(load_catalog(csv_file, catalog_file, output_dir=None).scraped)
+
+
+def test_scraped_reads_headers_of_unknown_names(csv_file, tmp_path):
+    output_dir = tmp_path / 'saida'
+    output_dir.mkdir()
+    # Gravado por outro writer (ex.: o ingestor do BC Correio), com manifesto próprio
+    with AtomicOutputWriter(str(output_dir), manifest_name='.manifest.correio.json') as writer:
+        writer.write('Resolucao_BCB_501_10_03_2025.txt',
+                     'Tipo: Resolução BCB\nNúmero: 501\n' + '=' * 80 + '\ntexto\n')
+    # Fora de qualquer manifesto: pode estar truncado, não conta
+    (output_dir / 'Circular_4282_legado.txt').write_text(
+        'Tipo: Circular\nNúmero: 4282\n' + '=' * 80 + '\ntexto\n', encoding='utf-8')
+
+    catalog = DocumentCatalog.from_csv(csv_file)
+    assert catalog.mark_scraped(str(output_dir)) == 1
+    assert catalog.is_scraped('Resolução BCB', '501')
+    assert not catalog.is_scraped('Circular', '4282')
+
+
+def test_track_sees_writes_after_load(csv_file, tmp_path):
+    output_dir = tmp_path / 'saida'
+    writer = AtomicOutputWriter(str(output_dir))
+    catalog = load_catalog(csv_file, str(tmp_path / 'catalogo.bin'), output_dir=str(output_dir), writer=writer)
+    assert not catalog.is_scraped('Circular', '4282')
+
+    writer.write(catalog_filename('Circular', '4282', 'Dispõe sobre o STR'), 'texto')
+    assert catalog.is_scraped('Circular', '4282')
+    assert catalog.row(1)['scraped']
@@ -0,0 +1,70 @@
+from bcb_changes import BODY_PATH, ChangeDetector, describe, read_feed
+
+
+ORIGINAL = """Resolve:
+Art. 1º Fica instituído o arranjo de pagamentos.
+§ 1º O arranjo observa o regulamento.
+§ 2º Aplica-se às instituições participantes.
+Art. 2º Esta resolução entra em vigor na data de sua publicação.
+"""
+
+
+def observe(detector, text):
+    return detector.observe('Resolução BCB', '1', text, detected_at=None)
+
+
+def test_first_observation_is_new(tmp_path):
+    detector = ChangeDetector(str(tmp_path))
+    entry = observe(detector, ORIGINAL)
+
+    assert entry['mudanca'] == 'novo'
+    assert entry['artigos'] == 3
+    assert observe(detector, ORIGINAL) is None
+    assert describe(entry).endswith('novo (3 artigos)')
+
+
+def test_whitespace_only_is_formatting(tmp_path):
+    detector = ChangeDetector(str(tmp_path))
+    observe(detector, ORIGINAL)
+
+    entry = observe(detector, ORIGINAL.replace('Art. 2º Esta', 'Art. 2º  Esta') + '\n')
+    assert entry['mudanca'] == 'formatacao'
+
+
+def test_substantive_change_lists_paragraphs(tmp_path):
+    detector = ChangeDetector(str(tmp_path))
+    observe(detector, ORIGINAL)
+
+    changed = ORIGINAL.replace('participantes', 'autorizadas') + 'Art. 3º Revoga-se a norma anterior.\n'
+    entry = observe(detector, changed)
+    assert entry['mudanca'] == 'substancial'
+    assert entry['adicionados'] == ['art3']
+    assert entry['modificados'] == {'art1': ['par2']}
+    assert describe(entry) == 'Resolucao BCB nro. 1: +art3 ~art1(par2)'
+    assert [item['mudanca'] for item in read_feed(str(tmp_path), entry['detectado_em'][:10])] == \
+        ['novo', 'substancial']
+
+
+def test_change_outside_articles_gets_body_marker(tmp_path):
+    detector = ChangeDetector(str(tmp_path))
+    compiled = "Art. 1º Redação original.\nArt. 1º-A Incluído depois.\nArt. 1º Redação atual.\n"
+    detector.observe('Circular', '2', compiled)
+
+    # A primeira redação do art. 1º fica de fora do hash por artigo (o caminho se repete)
+    entry = detector.observe('Circular', '2', compiled.replace('original', 'revogada'))
+    assert entry['mudanca'] == 'substancial'
+    assert entry['modificados'] == {BODY_PATH: []}
+    assert describe(entry) == f'Circular nro. 2: ~{BODY_PATH}'
+
+
+def test_describe_old_entries_without_marker():
+    entry = {'tipo': 'Circular', 'numero': '3.681', 'mudanca': 'substancial'}
+    assert describe(entry) == f'Circular nro. 3.681: ~{BODY_PATH}'
+
+
+def test_state_persists_between_runs(tmp_path):
+    detector = ChangeDetector(str(tmp_path))
+    observe(detector, ORIGINAL)
+    detector.save()
+
+    assert observe(ChangeDetector(str(tmp_path)), ORIGINAL) is None
@@ -0,0 +1,86 @@
+import gc
+
+import pytest
+
+from bcb_corpus_reader import CorpusReader, PackedCorpusReader, pack_corpus, split_articles
+from bcb_storage import compose_document, parse_document
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    directory = tmp_path / 'txt'
+    directory.mkdir()
+    (directory / 'Circular_3.681.txt').write_text(
+        compose_document('Circular', '3.681', '4/11/2013', 'https://exemplo', 'Art. 1º Corpo da circular.\n'),
+        encoding='utf-8')
+    (directory / 'Resolucao_BCB_n1.txt').write_text(
+        "# Resolucao BCB nro. 1\n# Data de acesso: 2024-01-01\n# Assunto: Pix\n# " + "=" * 40
+        + "\n\nArt. 1º Institui o Pix.\n", encoding='utf-8')
+    (directory / 'sem_cabecalho.txt').write_text(
+        "Texto solto\n==========\nsublinhado que não é cabeçalho\n", encoding='utf-8')
+    return directory
+
+
+def test_reader_matches_parse_document(corpus):
+    with CorpusReader(str(corpus)) as reader:
+        for path in reader.paths:
+            meta, body = parse_document(path.read_text(encoding='utf-8'))
+            assert reader.header(path) == meta
+            assert bytes(reader.body(path)).decode('utf-8') == body
+
+
+def test_headerless_body_with_separator_is_not_a_header(corpus):
+    with CorpusReader(str(corpus)) as reader:
+        path = corpus / 'sem_cabecalho.txt'
+        assert reader.body_range(path)[0] == 0
+        assert reader.header(path) == {}
+
+
+def test_pack_integrity(corpus, tmp_path):
+    pack_path = str(tmp_path / 'normativos.pack')
+    assert pack_corpus(str(corpus), pack_path) == 3
+
+    with PackedCorpusReader(pack_path) as packed, CorpusReader(str(corpus)) as reader:
+        assert len(packed) == 3
+        for position, (name, meta) in enumerate(packed.headers()):
+            path = corpus / name
+            assert meta == reader.header(path)
+            assert packed.body(position).tobytes() == bytes(reader.body(path))
+        # Corpos começam alinhados à página, depois do índice
+        assert packed.entries[0]['offset'] % 4096 == 0
+        assert packed.text(packed.find('Circular', '3681')).startswith('Art. 1º Corpo')
+        assert packed.find('Resolução BCB', '1') is not None
+
+
+def test_pack_rejects_other_files(tmp_path):
+    path = tmp_path / 'outro.pack'
+    path.write_bytes(b'nada a ver' * 10)
+    with pytest.raises(ValueError):
+        PackedCorpusReader(str(path))
+
+
+def test_close_with_live_view(corpus):
+    reader = CorpusReader(str(corpus))
+    view = reader.body(reader.paths[0])
+    reader.close()
+    # A view continua válida até ser solta
+    assert bytes(view).startswith(b'Art. 1')
+    view.release()
+    gc.collect()
+
+
+def test_split_articles_with_annex():
+    text = "Preâmbulo\nArt. 1º Um.\nArt. 2º Dois.\nArt. 1º Anexo um.\n"
+    paths = [path for path, _ in split_articles(text)]
+    assert paths == ['preambulo', 'art1', 'art2', 'anexo1/art1']
+
+
+def test_catalog_header_date_round_trip():
+    from bcb_postprocess import catalog_header
+
+    meta, body = parse_document(catalog_header('Resolução BCB', '429', 'Pix', '01/01/2025 10:00:00', '11/9/2025')
+                                + 'Art. 1º Corpo.\n')
+    assert meta == {'tipo': 'Resolução BCB', 'numero': '429', 'data': '11/9/2025',
+                    'data_acesso': '01/01/2025 10:00:00', 'assunto': 'Pix'}
+    assert body == 'Art. 1º Corpo.\n'
+    assert 'data' not in parse_document(catalog_header('Circular', '1', '', '01/01/2025 10:00:00'))[0]
@@ -0,0 +1,176 @@
+import base64
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+import pytest
+
+from bcb_correio import MANIFEST_NAME, BCCorreioClient, BCCorreioError, BCCorreioIngestor
+from bcb_output_writer import completed_files
+from bcb_storage import parse_document
+
+NAMESPACE = 'urn:bccorreio-mock'
+SOAP_ENV = 'http://schemas.xmlsoap.org/soap/envelope/'
+CREDENTIALS = 'Basic ' + base64.b64encode(b'usuario:senha').decode()
+
+COMUNICACOES = {
+    '1001': {'NUOP': '1001', 'TipoDocumento': 'Resolução BCB', 'NumeroDocumento': '501',
+             'DataDocumento': '10/03/2025 18:00', 'Assunto': 'Pix', 'Texto': 'Art. 1º Altera o regulamento.'},
+    '1002': {'NUOP': '1002', 'TipoDocumento': 'Circular', 'NumeroDocumento': '3.978',
+             'DataDocumento': '11/03/2025', 'Assunto': 'PLD', 'Texto': 'Art. 1º Dispõe sobre a política.'},
+    # Comunicação geral sem número: não é normativo
+    '1003': {'NUOP': '1003', 'Assunto': 'Manutenção programada', 'Texto': 'Aviso.'},
+}
+PASTAS = {'10': [{'NUOP': '2001', 'Assunto': 'Ofício'}, {'NUOP': '2002', 'Assunto': 'Resposta'}]}
+
+
+def _fields(item):
+    return ''.join(f"<{name}>{escape(value)}</{name}>" for name, value in item.items())
+
+
+class _MockService(BaseHTTPRequestHandler):
+    """Web service do BC Correio com as operações listadas no manual (SOAP 1.1)"""
+
+    def _reply(self, status, content):
+        body = (f'<?xml version="1.0" encoding="utf-8"?><soap:Envelope xmlns:soap="{SOAP_ENV}">'
+                f'<soap:Body>{content}</soap:Body></soap:Envelope>').encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/xml; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _fault(self, message):
+        self._reply(500, f"<soap:Fault><faultcode>soap:Server</faultcode>"
+                         f"<faultstring>{escape(message)}</faultstring></soap:Fault>")
+
+    def do_POST(self):
+        data = self.rfile.read(int(self.headers['Content-Length']))
+        if self.headers.get('Authorization') != CREDENTIALS:
+            return self._fault('Usuário ou senha inválidos')
+
+        body = next(el for el in ElementTree.fromstring(data).iter() if el.tag == f"{{{SOAP_ENV}}}Body")
+        request = body[0]
+        operation = request.tag.split('}')[1]
+        if self.headers.get('SOAPAction') != f'"{NAMESPACE}/{operation}"':
+            return self._fault('SOAPAction inválida')
+        params = {child.tag.split('}')[1]: child.text for child in request}
+        self.server.calls.append((operation, params))
+
+        if operation == 'ConsultarComunicacaoGeralDocumentoDivulgacao':
+            items = ''.join(f"<Comunicacao>{_fields({k: v for k, v in item.items() if k != 'Texto'})}</Comunicacao>"
+                            for item in COMUNICACOES.values())
+            result = f"<ConsultarComunicacaoGeralDocumentoDivulgacaoResult>{items}" \
+                     f"</ConsultarComunicacaoGeralDocumentoDivulgacaoResult>"
+        elif operation == 'LerComunicacaoGeralDocumentoDivulgacao':
+            if params.get('NUOP') not in COMUNICACOES:
+                return self._fault(f"Comunicação {params.get('NUOP')} não encontrada")
+            result = _fields(COMUNICACOES[params['NUOP']])
+        elif operation == 'ConsultarCorreiosPorPasta':
+            if params.get('CodigoPasta') not in PASTAS:
+                return self._fault('Pasta não autorizada')
+            result = ''.join(f"<Correio>{_fields(item)}</Correio>" for item in PASTAS[params['CodigoPasta']])
+        elif operation == 'TransmitirCorreio':
+            if not params.get('Assunto'):
+                return self._fault('Assunto obrigatório')
+            self.server.sent.append(params)
+            result = f"<NUOP>{3000 + len(self.server.sent)}</NUOP>"
+        else:
+            return self._fault(f"Operação desconhecida: {operation}")
+        self._reply(200, f'<{operation}Response xmlns="{NAMESPACE}">{result}</{operation}Response>')
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def service():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _MockService)
+    server.calls = []
+    server.sent = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(service):
+    return BCCorreioClient('usuario', 'senha', endpoint=f"http://127.0.0.1:{service.server_port}/",
+                           namespace=NAMESPACE, timeout=5)
+
+
+def test_endpoint_must_be_configured(monkeypatch):
+    monkeypatch.delenv('BCCORREIO_WS_URL', raising=False)
+    monkeypatch.delenv('BCCORREIO_WS_NAMESPACE', raising=False)
+    with pytest.raises(BCCorreioError):
+        BCCorreioClient('usuario', 'senha')
+
+
+def test_transmitir_correio(client, service):
+    response = client.transmitir_correio(Assunto='Consulta <urgente> & importante', Texto='Olá')
+    assert response == {'NUOP': '3001'}
+    assert service.sent == [{'Assunto': 'Consulta <urgente> & importante', 'Texto': 'Olá'}]
+
+
+def test_list_operations(client, service):
+    correios = client.consultar_correios_por_pasta('10')
+    assert [item['NUOP'] for item in correios] == ['2001', '2002']
+    assert service.calls[-1] == ('ConsultarCorreiosPorPasta', {'CodigoPasta': '10', 'Pagina': '1'})
+
+    comunicacoes = client.consultar_comunicacoes(datetime(2025, 3, 1), datetime(2025, 3, 31))
+    assert [item['NUOP'] for item in comunicacoes] == ['1001', '1002', '1003']
+    assert service.calls[-1][1] == {'DataInicial': '01/03/2025', 'DataFinal': '31/03/2025'}
+
+
+def test_faults_raise(client, service):
+    with pytest.raises(BCCorreioError, match='não encontrada'):
+        client.ler_comunicacao('9999')
+    with pytest.raises(BCCorreioError, match='Assunto obrigatório'):
+        client.transmitir_correio(Texto='sem assunto')
+    with pytest.raises(BCCorreioError, match='Pasta não autorizada'):
+        client.consultar_correios_por_pasta('99')
+
+    wrong = BCCorreioClient('usuario', 'errada', endpoint=client.endpoint, namespace=NAMESPACE, timeout=5)
+    with pytest.raises(BCCorreioError, match='senha inválidos'):
+        wrong.consultar_pastas_autorizadas()
+
+
+def test_invalid_response(client):
+    client.session.post = lambda *args, **kwargs: type('R', (), {'content': b'<html>erro', 'status_code': 502})()
+    with pytest.raises(BCCorreioError, match='HTTP 502'):
+        client.consultar_pastas_autorizadas()
+
+
+def test_ingestor_polls_new_publications(client, service, tmp_path):
+    output_dir = tmp_path / 'txt'
+    ingestor = BCCorreioIngestor(client, output_dir=str(output_dir), state_file=str(tmp_path / 'state.json'))
+
+    saved = ingestor.poll()
+    assert sorted(saved) == ['Circular_3.978_11_03_2025.txt', 'Resolucao_BCB_501_10_03_2025.txt']
+    meta, body = parse_document((output_dir / 'Resolucao_BCB_501_10_03_2025.txt').read_text(encoding='utf-8'))
+    assert meta['numero'] == '501' and meta['url'] == 'bccorreio:1001'
+    assert body == 'Art. 1º Altera o regulamento.'
+
+    # NUOPs já vistos (inclusive o que não é normativo) não são lidos de novo
+    reads = sum(operation == 'LerComunicacaoGeralDocumentoDivulgacao' for operation, _ in service.calls)
+    restarted = BCCorreioIngestor(client, output_dir=str(output_dir), state_file=str(tmp_path / 'state.json'))
+    assert restarted.poll() == []
+    assert sum(operation == 'LerComunicacaoGeralDocumentoDivulgacao' for operation, _ in service.calls) == reads
+
+
+def test_ingestor_keeps_its_own_manifest(client, service, tmp_path):
+    output_dir = tmp_path / 'txt'
+    output_dir.mkdir()
+    # Temporário de um scraper gravando no mesmo diretório
+    (output_dir / '.scraper.tmp').write_text('parcial', encoding='utf-8')
+
+    ingestor = BCCorreioIngestor(client, output_dir=str(output_dir), state_file=str(tmp_path / 'state.json'))
+    ingestor.poll()
+
+    assert (output_dir / MANIFEST_NAME).exists()
+    assert not (output_dir / '.manifest.json').exists()
+    assert (output_dir / '.scraper.tmp').exists()
+    assert completed_files(str(output_dir)) == {'Circular_3.978_11_03_2025.txt', 'Resolucao_BCB_501_10_03_2025.txt'}
@@ -0,0 +1,128 @@
+import pytest
+
+import bcb_dashboard
+from bcb_dashboard import RATE_WINDOW, EventStream, ProgressState, render_text
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Relógio fixo para ProgressState (time.time do módulo)"""
+    now = [1000.0]
+    monkeypatch.setattr(bcb_dashboard.time, 'time', lambda: now[0])
+    return now
+
+
+def finish(state, key, started, ended, ok=True, worker=None):
+    state.apply(started, 'inicio', {'id': key, 'documento': key, 'worker': worker})
+    state.apply(ended, 'fim', {'id': key, 'ok': ok})
+
+
+def test_latency_percentiles(clock):
+    state = ProgressState()
+    for seconds in range(1, 11):
+        finish(state, f"doc{seconds}", 900, 900 + seconds)
+
+    latency = state.snapshot()['latencia']
+    assert latency == {'p50': 5, 'p90': 9, 'p99': 10}
+
+
+def test_percentiles_without_samples(clock):
+    assert ProgressState().snapshot()['latencia'] == {'p50': None, 'p90': None, 'p99': None}
+
+
+def test_rate_counts_only_the_window(clock):
+    state = ProgressState()
+    state.started = 0.0
+    clock[0] = 2000.0
+    for number in range(3):
+        finish(state, f"antigo{number}", 100, 110)
+    for number in range(6):
+        finish(state, f"recente{number}", 1900, 1950)
+
+    status = state.snapshot()
+    assert status['docs_por_minuto'] == pytest.approx(6 / RATE_WINDOW * 60)
+    assert status['concluidos'] == 9
+    # Os fora da janela saem da fila de vazão
+    assert len(state.finished) == 6
+
+
+def test_rate_window_shorter_than_elapsed_at_start(clock):
+    state = ProgressState()
+    state.started = clock[0] - 60
+    for number in range(4):
+        finish(state, f"doc{number}", clock[0] - 30, clock[0] - 10)
+
+    assert state.snapshot()['docs_por_minuto'] == pytest.approx(4.0)
+
+
+def test_eta_from_rate_and_remaining(clock):
+    state = ProgressState(total=100)
+    state.started = clock[0] - 60
+    for number in range(10):
+        finish(state, f"doc{number}", clock[0] - 30, clock[0] - 10)
+
+    status = state.snapshot()
+    # 10 docs/min e 90 restantes
+    assert status['eta'] == pytest.approx(90 * 60 / 10)
+
+
+def test_eta_unknown_without_total_or_rate(clock):
+    assert ProgressState().snapshot()['eta'] is None
+    assert ProgressState(total=10).snapshot()['eta'] is None
+
+
+def test_plan_event_updates_total(clock):
+    state = ProgressState(total=5)
+    state.apply(clock[0], 'plano', {'total': 8})
+    assert state.snapshot()['total'] == 8
+
+
+def test_skipped_counts_progress_but_not_rate_or_failures(clock):
+    state = ProgressState(total=4)
+    state.started = clock[0] - 60
+    state.apply(clock[0] - 5, 'inicio', {'id': 'salvo', 'documento': 'salvo'})
+    state.apply(clock[0] - 5, 'fim', {'id': 'salvo', 'ok': True, 'pulado': True})
+    finish(state, 'ok', clock[0] - 20, clock[0] - 10)
+    finish(state, 'falha', clock[0] - 20, clock[0] - 15, ok=False)
+
+    status = state.snapshot()
+    assert status['concluidos'] == 3
+    assert status['pulados'] == 1
+    assert status['falhas'] == 1
+    # A taxa de falha considera só os buscados
+    assert status['taxa_falha'] == pytest.approx(0.5)
+    assert status['docs_por_minuto'] == pytest.approx(2.0)
+    assert sorted(state.latencies) == [5, 10]
+
+
+def test_in_flight_shows_worker_and_stage(clock):
+    state = ProgressState()
+    state.apply(clock[0] - 30, 'inicio', {'id': 1, 'documento': 'Resolução BCB 1', 'worker': 'aba 2',
+                                          'etapa': 'carregando'})
+    state.apply(clock[0] - 10, 'etapa', {'id': 1, 'etapa': 'extraindo'})
+    state.apply(clock[0] - 5, 'inicio', {'id': 2, 'documento': 'Circular 3', 'worker': 'host-42'})
+
+    in_flight = state.snapshot()['em_andamento']
+    assert [document['worker'] for document in in_flight] == ['aba 2', 'host-42']
+    assert in_flight[0]['etapa'] == 'extraindo'
+    assert in_flight[0]['decorrido'] == 30
+    assert in_flight[0]['na_etapa'] == 10
+    assert '[aba 2] Resolução BCB 1' in render_text(state.snapshot())
+
+
+def test_strategy_failure_rate(clock):
+    state = ProgressState()
+    for ok in (True, False, False, True):
+        state.apply(clock[0], 'tentativa', {'estrategia': 'headless', 'ok': ok})
+
+    assert state.snapshot()['estrategias'] == {'headless': {'tentativas': 4, 'sucessos': 2, 'taxa_falha': 0.5}}
+
+
+def test_event_stream_drains_in_order():
+    events = EventStream()
+    events.emit('inicio', id='a')
+    events.emit('fim', id='a', ok=True)
+
+    assert [(kind, fields) for _, kind, fields in events.drain()] == [('inicio', {'id': 'a'}),
+                                                                      ('fim', {'id': 'a', 'ok': True})]
+    assert events.drain() == []
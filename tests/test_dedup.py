@@ -0,0 +1,66 @@
+import random
+
+from bcb_dedup import (SIGNATURE_SIZE, DuplicateDetector, _hash, find_duplicates, shingles, signature,
+                       similarity)
+
+
+def _text(seed, words=400):
+    rng = random.Random(seed)
+    vocabulary = ['instituição', 'pagamento', 'arranjo', 'resolução', 'conselho', 'monetário', 'prazo',
+                  'liquidação', 'sistema', 'participante', 'regulamento', 'câmara', 'crédito', 'ativo']
+    return ' '.join(rng.choice(vocabulary) + str(rng.randrange(50)) for _ in range(words))
+
+
+def test_shingles_ignore_case_accents_and_punctuation():
+    assert shingles('Resolução  CMN, n. 4.282: Dispõe sobre') == shingles('resolucao cmn n 4 282 dispoe sobre')
+    assert shingles('') == set()
+    assert len(shingles('duas palavras')) == 1
+
+
+def test_signature_is_deterministic_and_fills_every_slot():
+    first = signature(shingles(_text(1)))
+    assert first == signature(shingles(_text(1)))
+    assert len(first) == SIGNATURE_SIZE
+    # Um único shingle preenche todos os compartimentos (cópias com deslocamento)
+    assert len(signature({_hash('única')})) == SIGNATURE_SIZE
+    assert signature(set()) is None
+
+
+def test_similarity_estimates_jaccard():
+    universe = [_hash(str(i)) for i in range(4000)]
+    first = signature(set(universe[:3000]))
+    second = signature(set(universe[1000:]))
+    # Jaccard real 2000/4000; com 128 posições o desvio padrão é ~0,044
+    assert abs(similarity(first, second) - 0.5) < 0.15
+    assert similarity(first, first) == 1.0
+    assert similarity(first, signature({_hash(str(i)) for i in range(5000, 8000)})) < 0.1
+
+
+def test_detector_groups_near_duplicates_only(tmp_path):
+    base = _text(7)
+    (tmp_path / 'Circular_3681.txt').write_text(base, encoding='utf-8')
+    # Mesma norma com uma linha a mais: fica com o texto mais completo como canônico
+    (tmp_path / 'Circular_3681_copia.txt').write_text(base + ' Publicada no DOU.', encoding='utf-8')
+    (tmp_path / 'Circular_3682.txt').write_text(_text(8), encoding='utf-8')
+
+    detector = DuplicateDetector(threshold=0.8)
+    for path in sorted(tmp_path.glob('*.txt')):
+        detector.add(path)
+    clusters = detector.clusters()
+
+    assert len(clusters) == 1
+    assert clusters[0]['canonicos'] == {'txt': str(tmp_path / 'Circular_3681_copia.txt')}
+    assert clusters[0]['copias'] == [str(tmp_path / 'Circular_3681.txt')]
+
+
+def test_identical_bytes_group_without_text(tmp_path):
+    txt, pdf = tmp_path / 'txt', tmp_path / 'pdf'
+    txt.mkdir()
+    pdf.mkdir()
+    (pdf / 'a.pdf').write_bytes(b'%PDF-1.4 sem texto')
+    (pdf / 'b.pdf').write_bytes(b'%PDF-1.4 sem texto')
+
+    clusters = find_duplicates((str(txt), str(pdf)), cache_file=None, workers=1)
+    assert len(clusters) == 1
+    assert len(clusters[0]['copias']) == 1
+    assert clusters[0]['bytes_recuperaveis'] == len(b'%PDF-1.4 sem texto')
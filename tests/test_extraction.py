@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from bcb_extraction import LOAD_CHECK_SCRIPT, accept_catalog_text, content_ready, content_score, selector_match
+from bcb_snapshots import SnapshotCache, extract_text, snapshot_job
+
+
+BODY = ('RESOLUÇÃO BCB Nº 501. O BANCO CENTRAL DO BRASIL, considerando o disposto na lei, resolve: '
+        + ' '.join(f'Art. {n}º Disposição número {n} do regulamento do arranjo de pagamentos.' for n in range(1, 40)))
+NAV = 'ACESSIBILIDADE ALTO CONTRASTE ENGLISH Home Estabilidade financeira'
+
+
+def test_catalog_page_picks_the_document_block():
+    html = (f'<html><body><nav>{NAV}</nav><div class="normativo-conteudo"><p>{BODY}</p></div>'
+            '<script>var x = "RESOLUÇÃO";</script></body></html>')
+    assert extract_text(html, layout='catalog') == BODY
+
+
+def test_catalog_page_falls_back_to_scoring():
+    html = f'<html><body><section><p>{BODY}</p><p>{BODY}</p></section><footer>{NAV}</footer></body></html>'
+    text = extract_text(html, layout='catalog')
+    assert text.startswith('RESOLUÇÃO BCB') and 'ALTO CONTRASTE' not in text
+
+
+def test_catalog_page_without_document_is_rejected():
+    assert extract_text(f'<html><body><div class="conteudo">{NAV}</div></body></html>', layout='catalog') is None
+
+
+def test_url_page_uses_first_selector_with_text_or_body():
+    html = '<html><body><div class="documento-conteudo"> </div><main>Texto do normativo</main></body></html>'
+    assert extract_text(html) == 'Texto do normativo'
+    assert extract_text('<html><body><p>Só o body</p></body></html>') == 'Só o body'
+
+
+def test_shared_heuristics():
+    assert selector_match(BODY) and not selector_match(BODY[:500])
+    assert content_score(BODY * 2) > content_score(BODY * 2 + NAV)
+    assert content_score('curto') is None
+    assert accept_catalog_text('RESOLUÇÃO do BANCO CENTRAL') and not accept_catalog_text(NAV)
+    assert 'INSTRUÇÃO' in LOAD_CHECK_SCRIPT
+    assert content_ready({'found': ['Art.', 'BANCO CENTRAL'], 'hasContent': True, 'hasNavigation': False,
+                          'hasDocumentContent': True})
+
+
+def test_snapshot_job_keeps_the_original_fetch_time(tmp_path):
+    cache = SnapshotCache(str(tmp_path))
+    fetched_at = datetime(2024, 3, 1, 10, 30)
+    path = cache.put('https://exemplo/normativo', f'<html><body><main>{BODY}</main></body></html>',
+                     fetched_at=fetched_at, layout='url', tipo='Resolução BCB', numero='501', data='1/3/2024')
+
+    job = snapshot_job({'snapshot': path})
+    assert job['fetched_at'] == '2024-03-01T10:30:00'
+    assert job['accessed'] == '01/03/2024 10:30:00'
+    assert job['text'] == BODY
@@ -0,0 +1,113 @@
+import os
+
+from bcb_history import HistoryStore
+
+
+def _versions():
+    base = [f"Art. {i}º Texto do artigo {i}." for i in range(1, 40)]
+    second = list(base)
+    second[4] = "Art. 5º Texto alterado."
+    third = second[:10] + ["Art. 10-A. Incluído."] + second[10:]
+    return ['\n'.join(base), '\n'.join(second), '\n'.join(third)]
+
+
+def test_delta_round_trip(tmp_path):
+    history = HistoryStore(str(tmp_path))
+    texts = _versions()
+    for i, text in enumerate(texts):
+        assert history.record('Resolução BCB', '1', text, fetched_at=f"2024-01-0{i + 1}T00:00:00") == i + 1
+
+    # Uma instância nova relê o log e reconstrói cada versão pelos deltas
+    history = HistoryStore(str(tmp_path))
+    for number, text in enumerate(texts, 1):
+        assert history.get('Resolucao BCB', '1', number) == text
+    assert history.get('Resolucao BCB', '1') == texts[-1]
+
+
+def test_unchanged_text_only_records_fetch(tmp_path):
+    history = HistoryStore(str(tmp_path))
+    text = _versions()[0]
+    assert history.record('Circular', '3681', text, fetched_at='2024-01-01T00:00:00') == 1
+    assert history.record('Circular', '3.681', text, fetched_at='2024-02-01T00:00:00') == 1
+
+    assert len(history.versions('Circular', '3681')) == 1
+    assert history.last_fetch('Circular', '3681') == '2024-02-01T00:00:00'
+
+
+def test_as_of(tmp_path):
+    history = HistoryStore(str(tmp_path))
+    texts = _versions()
+    for day, text in zip(('01', '10', '20'), texts):
+        history.record('Circular', '1', text, fetched_at=f"2024-01-{day}T00:00:00")
+
+    assert history.as_of('Circular', '1', '2023-12-31T00:00:00') is None
+    assert history.as_of('Circular', '1', '2024-01-01T00:00:00') == texts[0]
+    assert history.as_of('Circular', '1', '2024-01-15T00:00:00') == texts[1]
+    assert history.as_of('Circular', '1', '2025-01-01T00:00:00') == texts[2]
+
+
+def test_full_text_after_max_chain(tmp_path):
+    history = HistoryStore(str(tmp_path), max_chain=2)
+    text = _versions()[0]
+    for i in range(5):
+        history.record('Circular', '2', text + f"\nLinha {i}")
+
+    records = history._load('Circular|2')['versions']
+    assert ['full' in record for record in records] == [True, False, False, True, False]
+    assert history.get('Circular', '2', 5) == text + "\nLinha 4"
+
+
+def test_as_of_date_only_covers_the_whole_day(tmp_path):
+    history = HistoryStore(str(tmp_path))
+    texts = _versions()
+    history.record('Circular', '1', texts[0], fetched_at='2024-01-01T08:00:00')
+    history.record('Circular', '1', texts[1], fetched_at='2024-01-15T14:30:00')
+
+    assert history.as_of('Circular', '1', '2024-01-01') == texts[0]
+    assert history.as_of('Circular', '1', '2024-01-15') == texts[1]
+    assert history.as_of('Circular', '1', '2024-01-14') == texts[0]
+    assert history.as_of('Circular', '1', '2023-12-31') is None
+
+
+def test_older_fetch_recorded_later_is_placed_by_date(tmp_path):
+    history = HistoryStore(str(tmp_path))
+    texts = _versions()
+    history.record('Circular', '1', texts[2], fetched_at='2024-03-01T00:00:00')
+    # Snapshot antigo reextraído depois
+    history.record('Circular', '1', texts[0], fetched_at='2024-01-01T00:00:00')
+    # Mesmo texto da versão vigente na data: só uma busca
+    assert history.record('Circular', '1', texts[0], fetched_at='2024-02-01T00:00:00') == 2
+
+    for reopened in (history, HistoryStore(str(tmp_path))):
+        assert reopened.as_of('Circular', '1', '2024-01-20') == texts[0]
+        assert reopened.as_of('Circular', '1', '2024-02-20') == texts[0]
+        assert reopened.as_of('Circular', '1', '2024-03-01') == texts[2]
+        # A versão atual é a da busca mais recente, não a última gravada
+        assert reopened.get('Circular', '1') == texts[2]
+        assert reopened.last_fetch('Circular', '1') == '2024-03-01T00:00:00'
+        assert len(reopened.versions('Circular', '1')) == 2
+
+
+def test_last_fetch_from_log_uses_latest_date(tmp_path):
+    history = HistoryStore(str(tmp_path))
+    text = _versions()[0]
+    history.record('Circular', '7', text, fetched_at='2024-05-01T00:00:00')
+    history.record('Circular', '7', text, fetched_at='2024-04-01T00:00:00')
+
+    assert HistoryStore(str(tmp_path)).last_fetch('Circular', '7') == '2024-05-01T00:00:00'
+
+
+def test_import_directory_in_mtime_order(tmp_path):
+    input_dir = tmp_path / 'txt'
+    input_dir.mkdir()
+    texts = _versions()
+    # Nome em ordem alfabética inversa à da data
+    for name, text, mtime in (('a.txt', texts[1], 2_000_000_000), ('b.txt', texts[0], 1_000_000_000)):
+        path = input_dir / name
+        path.write_text(f"# Circular nro. 9\n# {'=' * 20}\n\n{text}", encoding='utf-8')
+        os.utime(path, (mtime, mtime))
+
+    history = HistoryStore(str(tmp_path / 'history'))
+    assert history.import_directory(str(input_dir)) == 2
+    assert history.get('Circular', '9', 1) == texts[0]
+    assert history.get('Circular', '9') == texts[1]
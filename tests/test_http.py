@@ -0,0 +1,193 @@
+import threading
+import time
+
+import pytest
+
+from bcb_http import HTTPClient, freshness_lifetime, parse_cache_control
+
+
+class StubResponse:
+    def __init__(self, url, status_code, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+
+class StubSession:
+    """Sessão do requests com respostas programadas por URL; guarda as requisições feitas"""
+
+    def __init__(self):
+        self.responses = {}
+        self.calls = []
+        self.gate = None
+
+    def respond(self, url, content=b'', status=200, **headers):
+        self.responses[url] = (status, {name.replace('_', '-'): value for name, value in headers.items()}, content)
+
+    def get(self, url, timeout=None, headers=None):
+        self.calls.append((url, dict(headers or {})))
+        if self.gate is not None:
+            self.gate.wait(5)
+        status, response_headers, content = self.responses[url]
+        return StubResponse(url, status, response_headers, content)
+
+
+@pytest.fixture
+def session():
+    return StubSession()
+
+
+@pytest.fixture
+def client(session, tmp_path):
+    return HTTPClient(cache_dir=str(tmp_path / 'cache'), session=session)
+
+
+def test_parse_cache_control():
+    assert parse_cache_control('max-age=60, No-Cache, private="x"') == {'max-age': '60', 'no-cache': None,
+                                                                       'private': 'x'}
+
+
+def test_freshness_lifetime():
+    assert freshness_lifetime({'cache-control': 'max-age=60'}) == 60
+    assert freshness_lifetime({'cache-control': 'max-age=60, no-cache'}) == 0
+    assert freshness_lifetime({'expires': '0'}) == 0
+    assert freshness_lifetime({}, status=404) > 0
+    assert freshness_lifetime({}) == 0
+
+
+def test_fresh_response_comes_from_disk(client, session):
+    session.respond('http://bcb/a', b'corpo', cache_control='max-age=3600')
+
+    first = client.get('http://bcb/a')
+    second = client.get('http://bcb/a')
+    assert not first.from_cache and second.from_cache
+    assert second.content == b'corpo'
+    assert len(session.calls) == 1
+    assert client.stats['hits'] == 1 and client.stats['bytes_economizados'] == 5
+
+
+def test_stale_response_is_revalidated(client, session):
+    session.respond('http://bcb/a', b'corpo', etag='"v1"', cache_control='no-cache')
+    client.get('http://bcb/a')
+
+    session.respond('http://bcb/a', b'', status=304, etag='"v1"')
+    response = client.get('http://bcb/a')
+    assert response.from_cache and response.status_code == 200
+    assert response.content == b'corpo'
+    assert session.calls[-1][1] == {'If-None-Match': '"v1"'}
+    assert client.stats['revalidados'] == 1
+
+
+def test_changed_response_replaces_the_body(client, session):
+    session.respond('http://bcb/a', b'antigo', etag='"v1"', cache_control='no-cache')
+    client.get('http://bcb/a')
+
+    session.respond('http://bcb/a', b'novo', etag='"v2"', cache_control='no-cache')
+    assert client.get('http://bcb/a').content == b'novo'
+    assert client.entries[client._key('http://bcb/a')]['headers']['etag'] == '"v2"'
+
+
+def test_no_store_is_not_cached(client, session):
+    session.respond('http://bcb/a', b'corpo', cache_control='no-store, max-age=60')
+    client.get('http://bcb/a')
+    client.get('http://bcb/a')
+    assert len(session.calls) == 2
+    assert not client.entries
+
+
+def test_lru_eviction(session, tmp_path):
+    client = HTTPClient(cache_dir=str(tmp_path / 'cache'), max_bytes=10, session=session)
+    for name in 'abc':
+        session.respond(f"http://bcb/{name}", b'x' * 4, cache_control='max-age=3600')
+    client.get('http://bcb/a')
+    client.get('http://bcb/b')
+    # a foi usada por último: b é a menos recente quando c não cabe
+    client.get('http://bcb/a')
+    client.get('http://bcb/c')
+
+    assert [entry['url'] for entry in client.entries.values()] == ['http://bcb/a', 'http://bcb/c']
+    assert client.total_bytes == 8
+    assert client.stats['removidos'] == 1
+    assert not (tmp_path / 'cache' / (client._key('http://bcb/b') + '.body')).exists()
+
+
+def test_concurrent_requests_are_deduplicated(client, session):
+    session.respond('http://bcb/a', b'corpo', cache_control='no-store')
+    session.gate = threading.Event()
+    results = []
+
+    def fetch():
+        results.append(client.get('http://bcb/a'))
+
+    leader = threading.Thread(target=fetch)
+    leader.start()
+    while not session.calls:
+        time.sleep(0.01)
+    follower = threading.Thread(target=fetch)
+    follower.start()
+    while not client.stats['deduplicados']:
+        time.sleep(0.01)
+    session.gate.set()
+    leader.join()
+    follower.join()
+
+    assert len(session.calls) == 1
+    assert [response.content for response in results] == [b'corpo', b'corpo']
+    # O corpo entregue à segunda thread conta como economia
+    assert client.stats['bytes_economizados'] == 5
+
+
+def test_failed_request_reaches_the_follower(client, session):
+    session.gate = threading.Event()
+    errors = []
+
+    def fetch():
+        try:
+            client.get('http://bcb/ausente')
+        except KeyError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=fetch) for _ in range(2)]
+    threads[0].start()
+    while not session.calls:
+        time.sleep(0.01)
+    threads[1].start()
+    while not client.stats['deduplicados']:
+        time.sleep(0.01)
+    session.gate.set()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 2
+
+
+def test_index_merges_entries_of_other_processes(session, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    session.respond('http://bcb/a', b'aaa', cache_control='max-age=3600')
+    session.respond('http://bcb/b', b'bbb', cache_control='max-age=3600')
+
+    first = HTTPClient(cache_dir=cache_dir, session=session)
+    second = HTTPClient(cache_dir=cache_dir, session=session)
+    first.get('http://bcb/a')
+    second.get('http://bcb/b')
+    first.save()
+    second.save()
+
+    reopened = HTTPClient(cache_dir=cache_dir, session=session)
+    assert {entry['url'] for entry in reopened.entries.values()} == {'http://bcb/a', 'http://bcb/b'}
+    assert reopened.total_bytes == 6
+    assert reopened.get('http://bcb/a').from_cache
+    assert len(session.calls) == 2
+
+
+def test_index_does_not_resurrect_dropped_entries(session, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    session.respond('http://bcb/a', b'aaa', cache_control='max-age=3600')
+    client = HTTPClient(cache_dir=cache_dir, session=session)
+    client.get('http://bcb/a')
+    client.save()
+
+    with client._lock:
+        client._drop(client._key('http://bcb/a'))
+    client.save()
+    assert not HTTPClient(cache_dir=cache_dir, session=session).entries
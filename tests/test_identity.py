@@ -0,0 +1,44 @@
+import pytest
+
+from bcb_identity import (canonical_key, canonical_numero, canonical_tipo, display_numero, document_url,
+                          find_references, parse_reference)
+
+
+@pytest.mark.parametrize('numero, expected', [
+    ('429', '429'), ('429.0', '429'), (429.0, '429'), (429, '429'),
+    ('4.282', '4282'), (4.28, '4280'), (' 3.681 ', '3681'), (float('nan'), ''),
+])
+def test_canonical_numero(numero, expected):
+    assert canonical_numero(numero) == expected
+
+
+def test_canonical_tipo_folds_variants():
+    assert canonical_tipo('RESOLUÇÃO  bcb') == 'Resolucao BCB'
+    assert canonical_tipo('Instrução Normativa BCB') == 'Instrucao Normativa BCB'
+    # Desconhecidos só perdem os acentos
+    assert canonical_tipo('Deliberação') == 'Deliberacao'
+
+
+def test_key_and_display_agree_across_forms():
+    keys = {canonical_key(tipo, numero) for tipo, numero in
+            [('Resolução CMN', '4.282'), ('Resolucao CMN', 4282), ('resolução cmn', '4282.0')]}
+    assert keys == {'Resolucao CMN|4282'}
+    assert display_numero('4282.0') == display_numero(4282) == '4.282'
+    assert display_numero('429.0') == '429'
+
+
+def test_document_url_uses_official_tipo():
+    assert document_url('Resolucao CMN', '4282') == \
+        'https://www.bcb.gov.br/estabilidadefinanceira/exibenormativo?tipo=Resolu%C3%A7%C3%A3o%20CMN&numero=4.282'
+
+
+def test_parse_reference():
+    assert parse_reference('Circular n. 3.681,') == ('Circular', '3681')
+    assert parse_reference('Resolucao BCB 501') == ('Resolucao BCB', '501')
+    assert parse_reference('sem número') is None
+
+
+def test_find_references_in_order_without_repeats():
+    text = ('Altera a Resolução Conjunta nº 1 e a Resolução CMN nº 4.282, de 2013; '
+            'revoga a Carta Circular nro. 3.000 e a Resolução CMN n. 4282.')
+    assert find_references(text) == ['Resolucao Conjunta|1', 'Resolucao CMN|4282', 'Carta Circular|3000']
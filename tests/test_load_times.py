@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+from bcb_load_times import BUCKETS, LoadTimeModel, size_class
+
+
+def model(**options):
+    options.setdefault('model_file', None)
+    return LoadTimeModel(**options)
+
+
+def test_size_class():
+    assert size_class(100) == 'pequeno'
+    assert size_class(50000) == 'medio'
+    assert size_class(10**6) == 'grande'
+
+
+def test_quantile_is_upper_bound_of_the_bucket():
+    times = model(percentile=0.9)
+    histogram = [0] * (len(BUCKETS) + 1)
+    histogram[BUCKETS.index(2)] = 9
+    histogram[BUCKETS.index(8)] = 1
+    assert times._quantile(histogram) == 2
+
+    histogram[BUCKETS.index(8)] = 2
+    assert times._quantile(histogram) == 8
+
+    # Acima do último limite: o teto
+    overflow = [0] * len(BUCKETS) + [1]
+    assert times._quantile(overflow) == times.ceiling
+
+
+def test_budget_default_without_samples():
+    times = model(default=60.0, min_samples=5)
+    for _ in range(4):
+        times.record('Circular', '1', 3.0, size=1000)
+    assert times.budget('Circular', '1') == 60.0
+
+
+def test_budget_falls_back_from_size_to_tipo_to_all():
+    times = model(margin=2.0, floor=0.0, min_samples=3)
+    # Todos: 3 amostras rápidas de Resolução BCB
+    for number in range(3):
+        times.record('Resolução BCB', str(number), 1.0, size=1000)
+    # Circular sem tamanho conhecido vai direto a todos
+    assert times.budget('Circular', '9') == 2.0
+
+    # Circular com 3 amostras de tamanho grande: o tipo passa a valer para os de outro tamanho
+    for number in range(3):
+        times.record('Circular', str(number), 8.0, size=500000)
+    times.record('Circular', '9', 3.0, size=1000)
+    assert times.budget('Circular', '9') == 16.0
+
+    # Com amostras suficientes na própria faixa, ela vence
+    for number in range(10, 12):
+        times.record('Circular', str(number), 3.0, size=1000)
+    assert times.budget('Circular', '9') == 6.0
+    assert times.budget('Circular', '0') == 16.0
+
+
+def test_budget_is_clamped():
+    times = model(margin=1.5, floor=5.0, ceiling=30.0, min_samples=1)
+    times.record('Circular', '1', 0.2)
+    assert times.budget('Circular', '1') == 5.0
+    times.record('Carta Circular', '1', 100.0)
+    assert times.budget('Carta Circular', '1') == 30.0
+
+
+def test_timeouts_do_not_escalate_the_budget():
+    times = model(margin=1.5, floor=0.0, ceiling=180.0, min_samples=5, percentile=0.95)
+    for number in range(19):
+        times.record('Circular', str(number), 4.0)
+    assert times.budget('Circular', '1') == 6.0
+
+    # Um estouro em vinte está dentro dos 5% fora do percentil
+    times.record_timeout('Circular', '1')
+    assert times.budget('Circular', '1') == 6.0
+
+    # Estouros seguidos ganham uma margem a mais, e não sobem até o teto
+    for _ in range(20):
+        times.record_timeout('Circular', '1')
+    assert times.budget('Circular', '1') == pytest.approx(9.0)
+    assert times.timeouts['Circular'] == 21
+
+
+def test_only_timeouts_fall_back_to_default():
+    times = model(default=60.0, min_samples=1)
+    times.record_timeout('Circular', '1')
+    assert times.budget('Circular', '1') == 60.0
+
+
+def test_old_counts_are_halved_past_max_samples():
+    times = model(margin=1.0, floor=0.0, min_samples=1, max_samples=10, percentile=0.5)
+    for number in range(10):
+        times.record('Circular', str(number), 30.0)
+    assert times.budget('Circular', '1') == 32
+
+    # O site ficou mais rápido: as amostras novas pesam mais que as antigas
+    for number in range(10):
+        times.record('Circular', str(number), 1.0)
+    assert sum(times.histograms['Circular']) <= 10
+    assert times.budget('Circular', '1') == 1
+
+
+def test_save_and_load(tmp_path):
+    model_file = tmp_path / 'load_times.json'
+    times = LoadTimeModel(str(model_file), min_samples=1)
+    times.record('Circular', '1', 3.0, size=1000)
+    times.record_timeout('Circular', '2')
+    times.save()
+
+    assert set(json.loads(model_file.read_text(encoding='utf-8'))) == {'histograms', 'timeouts', 'sizes'}
+    loaded = LoadTimeModel(str(model_file), min_samples=1)
+    assert loaded.histograms == times.histograms
+    assert loaded.timeouts == times.timeouts
+    assert loaded.budget('Circular', '1') == times.budget('Circular', '1')
@@ -0,0 +1,88 @@
+import gzip
+import http.client
+import json
+import threading
+
+import pytest
+
+from bcb_query_service import CorpusIndex, QueryServer, QueryService, fold
+from bcb_storage import compose_document
+
+
+@pytest.fixture
+def server(tmp_path):
+    directory = tmp_path / 'txt'
+    directory.mkdir()
+    articles = '\n'.join(f"Art. {i}º Disposição número {i} sobre arranjos de pagamento." for i in range(1, 30))
+    (directory / 'Circular_429.txt').write_text(
+        compose_document('Circular', '429.0', '1/1/2020', 'https://exemplo', articles + '\n§ 1º Parágrafo.\n'),
+        encoding='utf-8')
+    (directory / 'Resolucao_BCB_1.txt').write_text(
+        compose_document('Resolução BCB', '1', '12/8/2020', 'https://exemplo', 'Art. 1º Institui o Pix.\n'),
+        encoding='utf-8')
+
+    index = CorpusIndex(str(directory))
+    server = QueryServer(('127.0.0.1', 0), QueryService(index))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    index.close()
+
+
+def _get(server, path, headers=None):
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=5)
+    connection.request('GET', path, headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+
+def test_fold_keeps_positions():
+    assert fold('Resolução AÇÃO') == 'resolucao acao'
+
+
+def test_numero_is_canonical(server):
+    response, body = _get(server, '/normativos/Circular/429')
+    document = json.loads(body)
+    assert response.status == 200
+    assert document['numero'] == '429'
+    assert document['texto'].startswith('Art. 1º')
+
+
+def test_article_and_search(server):
+    _, body = _get(server, '/normativos/Resolucao_BCB/1/artigos/1')
+    assert json.loads(body)['texto'] == 'Art. 1º Institui o Pix.'
+    _, body = _get(server, '/busca?q=PIX')
+    assert [item['numero'] for item in json.loads(body)['resultados']] == ['1']
+    response, _ = _get(server, '/normativos/Circular/999')
+    assert response.status == 404
+
+
+def test_etag_depends_on_encoding(server):
+    plain, body = _get(server, '/normativos/Circular/429')
+    zipped, compressed = _get(server, '/normativos/Circular/429', {'Accept-Encoding': 'gzip'})
+    assert zipped.getheader('Content-Encoding') == 'gzip'
+    assert gzip.decompress(compressed) == body
+    assert plain.getheader('ETag') != zipped.getheader('ETag')
+
+    # Cada ETag só valida a própria representação
+    response, _ = _get(server, '/normativos/Circular/429',
+                       {'Accept-Encoding': 'gzip', 'If-None-Match': zipped.getheader('ETag')})
+    assert response.status == 304
+    response, _ = _get(server, '/normativos/Circular/429', {'If-None-Match': zipped.getheader('ETag')})
+    assert response.status == 200
+
+
+def test_internal_error_returns_500(server):
+    def broken(query, limit=20):
+        raise RuntimeError('falha')
+
+    server.service.index.search = broken
+    response, body = _get(server, '/busca?q=pix')
+    assert response.status == 500
+    assert json.loads(body) == {'erro': 'erro interno'}
+    # O servidor continua atendendo
+    response, _ = _get(server, '/normativos/Circular/429')
+    assert response.status == 200
@@ -0,0 +1,110 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from bcb_identity import canonical_key
+from bcb_scheduler import PIN_BONUS, ScrapeScheduler, parse_pin
+
+
+TODAY = date(2025, 6, 1)
+
+
+class FakeHistory:
+    """last_fetch do HistoryStore a partir de um dicionário chave -> datetime"""
+
+    def __init__(self, fetched):
+        self.fetched = {canonical_key(*key): value for key, value in fetched.items()}
+
+    def last_fetch(self, tipo, numero):
+        fetched_at = self.fetched.get(canonical_key(tipo, numero))
+        return fetched_at.isoformat() if fetched_at else None
+
+
+def row(tipo, numero, data='1/1/2020'):
+    return {'tipo': tipo, 'numero': numero, 'data': data, 'assunto': '', 'url_bcb': ''}
+
+
+def order(scheduler):
+    return [(item['tipo'], item['numero']) for item in scheduler]
+
+
+def test_recent_documents_come_first():
+    scheduler = ScrapeScheduler(today=TODAY)
+    scheduler.add(row('Circular', '3.681', '4/11/2013'))
+    scheduler.add(row('Resolução BCB', '501', '10/3/2025'))
+    scheduler.add(row('Circular', '4.000', '1/1/2020'))
+
+    assert order(scheduler) == [('Resolução BCB', '501'), ('Circular', '4.000'), ('Circular', '3.681')]
+    assert scheduler.pop() is None
+
+
+def test_recently_fetched_goes_after_never_fetched():
+    history = FakeHistory({('Circular', '1'): datetime.now() - timedelta(days=1)})
+    scheduler = ScrapeScheduler(history=history, today=TODAY)
+    scheduler.add(row('Circular', '1'))
+    scheduler.add(row('Circular', '2'))
+
+    assert order(scheduler) == [('Circular', '2'), ('Circular', '1')]
+
+
+def test_ties_keep_catalog_order():
+    scheduler = ScrapeScheduler(today=TODAY)
+    for numero in ('3', '1', '2'):
+        scheduler.add(row('Circular', numero))
+
+    assert [numero for _, numero in order(scheduler)] == ['3', '1', '2']
+
+
+def test_duplicate_rows_are_ignored():
+    scheduler = ScrapeScheduler(today=TODAY)
+    assert scheduler.add(row('Resolução BCB', '429'))
+    assert not scheduler.add(row('Resolucao BCB', '429.0'))
+    assert len(scheduler) == 1
+
+
+def test_pins_go_first_even_after_add():
+    scheduler = ScrapeScheduler(pins=[('Circular', '1')], today=TODAY)
+    scheduler.add(row('Circular', '1', '1/1/2000'))
+    scheduler.add(row('Circular', '2', '1/1/2000'))
+    scheduler.add(row('Resolução BCB', '501', '1/6/2025'))
+    scheduler.pin('Circular', '2')
+
+    first, second = scheduler.pop(), scheduler.pop()
+    assert {first['numero'], second['numero']} == {'1', '2'}
+    assert first['prioridade'] > PIN_BONUS and second['prioridade'] > PIN_BONUS
+    assert scheduler.pop()['numero'] == '501'
+    assert len(scheduler) == 0
+
+
+def test_citations_reprioritize_queued_documents():
+    scheduler = ScrapeScheduler(today=TODAY)
+    scheduler.add(row('Circular', '3.681'))
+    scheduler.add(row('Resolução BCB', '501'))
+    scheduler.add(row('Circular', '4.000'))
+    assert scheduler.pop()['numero'] == '3.681'
+
+    text = 'Altera a Resolução BCB nº 501, de 2025.'
+    scheduler.observe(row('Circular', '3.681'), text)
+    # A mesma fonte buscada de novo não conta duas vezes
+    scheduler.observe(row('Circular', '3.681'), text)
+
+    assert scheduler.citations == {'Resolucao BCB|501': 1}
+    assert order(scheduler) == [('Resolução BCB', '501'), ('Circular', '4.000')]
+
+
+def test_follow_citations_enqueues_unknown_documents():
+    scheduler = ScrapeScheduler(follow_citations=True, today=TODAY)
+    scheduler.add(row('Circular', '1'))
+    scheduler.observe(scheduler.pop(), 'Revoga a Circular nº 3.681.')
+
+    assert scheduler.discovered == 1
+    discovered = scheduler.pop()
+    assert (discovered['tipo'], discovered['numero'], discovered['data']) == ('Circular', '3.681', None)
+    assert 'exibenormativo' in discovered['url_bcb']
+
+
+def test_parse_pin():
+    assert parse_pin('Resolucao BCB|501') == ('Resolucao BCB', '501')
+    assert parse_pin('Resolução BCB nº 501') == ('Resolucao BCB', '501')
+    with pytest.raises(ValueError):
+        parse_pin('qualquer coisa')
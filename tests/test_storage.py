@@ -0,0 +1,50 @@
+from bcb_storage import CorpusStore, compose_document, parse_document
+
+
+def _store(tmp_path):
+    return CorpusStore(str(tmp_path / 'store'))
+
+
+def test_put_keeps_versions_without_duplicates(tmp_path):
+    store = _store(tmp_path)
+    store.put('Circular', '3.681', 'Art. 1º Primeira redação.\n', data='4/11/2013')
+    store.put('Circular', '3681', 'Art. 1º Primeira redação.\n', data='4/11/2013')
+    store.put('Circular', '3681.0', 'Art. 1º Segunda redação.\n', data='4/11/2013')
+
+    assert [v['version'] for v in store.versions('Circular', '3.681')] == [1, 2]
+    assert store.get('Circular', '3681') == 'Art. 1º Segunda redação.\n'
+    assert store.get('Circular', '3681', version=1) == 'Art. 1º Primeira redação.\n'
+    assert _store(tmp_path).stats()['versions'] == 2
+
+
+def test_import_and_export_round_trip(tmp_path):
+    source = tmp_path / 'txt'
+    source.mkdir()
+    (source / 'Circular_3.681_4_11_2013.txt').write_text(
+        compose_document('Circular', '3.681', '4/11/2013', 'https://exemplo', 'Art. 1º Corpo.\n'), encoding='utf-8')
+
+    store = _store(tmp_path)
+    assert store.import_directory(str(source)) == 1
+    target = tmp_path / 'export'
+    assert store.export(str(target)) == 1
+    meta, body = parse_document((target / 'Circular_3.681_4_11_2013.txt').read_text(encoding='utf-8'))
+    assert (meta['numero'], meta['data'], body) == ('3.681', '4/11/2013', 'Art. 1º Corpo.\n')
+    # Já no manifesto com o mesmo hash: nada a regravar
+    assert store.export(str(target)) == 0
+
+
+def test_export_over_legacy_output(tmp_path):
+    directory = tmp_path / 'txt'
+    directory.mkdir()
+    legacy = directory / 'Circular_3.681_4_11_2013.txt'
+    legacy.write_text(compose_document('Circular', '3.681', '4/11/2013', 'https://exemplo', 'Art. 1º Co'),
+                      encoding='utf-8')
+
+    store = _store(tmp_path)
+    store.import_directory(str(directory))
+    store.put('Circular', '3.681', 'Art. 1º Corpo completo.\n', data='4/11/2013', url='https://exemplo')
+
+    # O legado não está no manifesto: é regravado, sem KeyError
+    assert store.export(str(directory)) == 1
+    assert parse_document(legacy.read_text(encoding='utf-8'))[1] == 'Art. 1º Corpo completo.\n'
+    assert store.export(str(directory)) == 0
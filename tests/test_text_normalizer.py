@@ -0,0 +1,52 @@
+import pytest
+
+from bcb_text_normalizer import TextNormalizer, normalize_text
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('RegulamentaÃ§Ã£o do depÃ³sito', 'Regulamentação do depósito'),
+    ('prazo â€“ 30 dias', 'prazo – 30 dias'),
+    ('Nº 1', 'Nº 1'),
+    ('Pai\xads', 'País'),
+    ('pagamento Ã  vista e AÃ§Ã£o', 'pagamento à vista e Ação'),
+])
+def test_mojibake_repair(text, expected):
+    assert normalize_text(text) == expected
+
+
+@pytest.mark.parametrize('text', ['IRMÃ E FILHOS', 'SÃO PAULO', 'NAÇÃO E ESTADO', 'ÓRGÃOS'])
+def test_correct_uppercase_is_untouched(text):
+    assert normalize_text(text) == text
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('n° 4.282', 'nº 4.282'),
+    ('N.º 10', 'Nº 10'),
+    ('art. 1° e § 2°', 'art. 1º e § 2º'),
+    ('Artigo 3˚, parágrafo 1°', 'Artigo 3º, parágrafo 1º'),
+    ('em 1° de janeiro de 2024', 'em 1º de janeiro de 2024'),
+])
+def test_ordinals(text, expected):
+    assert normalize_text(text) == expected
+
+
+@pytest.mark.parametrize('text', ['temperatura de 30° C', 'ângulo de 45°', 'entre 2° e 8°', '30° de latitude'])
+def test_real_degree_signs_are_kept(text):
+    assert normalize_text(text) == text
+
+
+def test_quotes_spaces_and_control_characters():
+    assert normalize_text('﻿“Texto” com​  espaços\r\n\n\n\nfim ') == '"Texto" com espaços\n\nfim'
+
+
+def test_paragraphs_mode():
+    assert normalize_text('linha 1\nlinha 2', paragraphs=True) == 'linha 1\n\nlinha 2'
+
+
+def test_stats_count_repairs():
+    normalizer = TextNormalizer()
+    normalizer.normalize_batch(['AÃ§Ã£o', 'n° 1', 'nada a fazer', ''])
+    assert normalizer.stats['mojibake'] == 1
+    assert normalizer.stats['ordinals'] == 1
+    assert normalizer.stats['fields'] == 3
+    assert normalizer.stats['repaired'] == 2
@@ -0,0 +1,105 @@
+import os
+import time
+
+import pytest
+
+from bcb_work_queue import FileWorkQueue, job_id
+
+
+def _jobs(*numbers):
+    return [{'id': job_id('Circular', numero), 'row': {'tipo': 'Circular', 'numero': numero}} for numero in numbers]
+
+
+def _age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return FileWorkQueue(str(tmp_path / 'fila'), lease_seconds=60, max_attempts=2)
+
+
+def test_job_id_is_canonical():
+    assert job_id('Resolução CMN', '4.282') == job_id('Resolucao CMN', '4282') == 'Resolucao_CMN_4282'
+
+
+def test_enqueue_skips_known_jobs(queue):
+    assert queue.enqueue(_jobs('1', '2')) == 2
+    lease = queue.lease('w1')
+    queue.complete(lease)
+    assert queue.enqueue(_jobs('1', '2', '3')) == 1
+    assert queue.stats() == {'pending': 2, 'leased': 0, 'done': 1, 'failed': 0}
+
+
+def test_lease_in_catalog_order(queue):
+    queue.enqueue(_jobs('10', '2', '33'))
+    leased = [queue.lease('w1')['job']['row']['numero'] for _ in range(3)]
+    assert leased == ['10', '2', '33']
+    assert queue.lease('w1') is None
+
+
+def test_expired_lease_is_requeued_and_old_worker_loses_it(queue):
+    queue.enqueue(_jobs('1'))
+    lease = queue.lease('w1')
+    assert lease['job']['attempts'] == 1 and lease['job']['worker'] == 'w1'
+    assert queue.requeue_expired() == 0
+
+    leased_path = os.path.join(queue.queue_dir, 'leased', f"{lease['name']}@{lease['token']}")
+    _age(leased_path, 120)
+    assert queue.requeue_expired() == 1
+
+    # O worker antigo não consegue mais concluir, falhar nem renovar
+    assert not queue.heartbeat(lease)
+    assert not queue.complete(lease)
+    assert not queue.fail(lease, 'tarde demais')
+    assert queue.stats() == {'pending': 1, 'leased': 0, 'done': 0, 'failed': 0}
+
+    retry = queue.lease('w2')
+    assert retry['job']['attempts'] == 2 and retry['job']['worker'] == 'w2'
+    assert queue.complete(retry)
+    assert queue.stats() == {'pending': 0, 'leased': 0, 'done': 1, 'failed': 0}
+
+
+def test_heartbeat_keeps_lease(queue):
+    queue.enqueue(_jobs('1'))
+    lease = queue.lease('w1')
+    leased_path = os.path.join(queue.queue_dir, 'leased', f"{lease['name']}@{lease['token']}")
+    _age(leased_path, 120)
+    assert queue.heartbeat(lease)
+    assert queue.requeue_expired() == 0
+
+
+def test_fail_records_error_and_retries_after_catalog(queue):
+    queue.enqueue(_jobs('1', '2'))
+    first = queue.lease('w1')
+    assert queue.fail(first, 'timeout')
+    second = queue.lease('w1')
+    assert second['job']['row']['numero'] == '2'
+
+    retry = queue.lease('w1')
+    assert retry['id'] == first['id']
+    assert retry['job']['last_error'] == 'timeout'
+
+
+def test_max_attempts_moves_to_failed(queue):
+    queue.enqueue(_jobs('1'))
+    for _ in range(2):
+        assert queue.fail(queue.lease('w1'), 'erro')
+    assert queue.lease('w1') is None
+    assert queue.stats() == {'pending': 0, 'leased': 0, 'done': 0, 'failed': 1}
+
+
+def test_interrupted_claim_is_recovered(queue):
+    queue.enqueue(_jobs('1'))
+    name = os.listdir(os.path.join(queue.queue_dir, 'pending'))[0]
+    # Worker morto entre o _claim e a publicação do lease
+    claim = queue._claim(os.path.join(queue.queue_dir, 'pending', name), 'leased', f"{name}@abc")
+    assert queue.stats()['pending'] == 0 and queue.lease('w1') is None
+    assert queue.requeue_expired() == 0
+
+    queue.lease_seconds = 0
+    time.sleep(0.01)
+    assert queue.requeue_expired() == 1
+    assert not os.path.exists(claim)
+    assert queue.lease('w2')['id'] == job_id('Circular', '1')